@@ -0,0 +1,93 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+"""user inbox
+
+Revision ID: 2d6a8f4c9e51
+Revises: 9c2e4b7a1f63
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+import actidoo_wfe.database
+
+# revision identifiers, used by Alembic.
+revision = "2d6a8f4c9e51"
+down_revision = "9c2e4b7a1f63"
+branch_labels = None
+depends_on = None
+
+_COLUMNS = "user_id, workflow_instance_task_id, reason, state, workflow_instance_id, instance_created_at"
+
+_FROM_TASKS = """
+FROM workflow_instance_tasks t
+JOIN workflow_instances i ON i.id = t.workflow_instance_id
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_inbox",
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("workflow_instance_task_id", sa.Uuid(), nullable=False),
+        sa.Column("reason", sa.String(length=20), nullable=False),
+        sa.Column("state", sa.String(length=20), nullable=False),
+        sa.Column("workflow_instance_id", sa.Uuid(), nullable=False),
+        sa.Column("instance_created_at", actidoo_wfe.database.UTCDateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["workflow_users.id"], name=op.f("fk_user_inbox_user_id_workflow_users"), ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(
+            ["workflow_instance_task_id"],
+            ["workflow_instance_tasks.id"],
+            name=op.f("fk_user_inbox_workflow_instance_task_id_workflow_instance_tasks"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["workflow_instance_id"],
+            ["workflow_instances.id"],
+            name=op.f("fk_user_inbox_workflow_instance_id_workflow_instances"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("user_id", "workflow_instance_task_id", "reason", name=op.f("pk_user_inbox")),
+    )
+    op.create_index(op.f("ix_user_inbox_workflow_instance_id"), "user_inbox", ["workflow_instance_id"], unique=False)
+    op.create_index("ix_user_inbox_listing", "user_inbox", ["user_id", "state", "instance_created_at", "workflow_instance_id"], unique=False)
+
+    # Fill the inbox from the existing tasks, the same rows repository.sync_user_inbox writes
+    op.execute(
+        f"""INSERT INTO user_inbox ({_COLUMNS})
+        SELECT t.assigned_user_id, t.id, 'assigned', 'ready', t.workflow_instance_id, i.created_at {_FROM_TASKS}
+        WHERE t.manual = 1 AND t.state_ready = 1 AND t.assigned_user_id IS NOT NULL"""
+    )
+    op.execute(
+        f"""INSERT INTO user_inbox ({_COLUMNS})
+        SELECT t.assigned_delegate_user_id, t.id, 'delegate', 'ready', t.workflow_instance_id, i.created_at {_FROM_TASKS}
+        WHERE t.manual = 1 AND t.state_ready = 1 AND t.assigned_delegate_user_id IS NOT NULL"""
+    )
+    op.execute(
+        f"""INSERT INTO user_inbox ({_COLUMNS})
+        SELECT DISTINCT ur.user_id, t.id, 'role', 'ready', t.workflow_instance_id, i.created_at {_FROM_TASKS}
+        JOIN workflow_instance_task_roles tr ON tr.workflow_instance_task_id = t.id
+        JOIN workflow_roles r ON r.name = tr.name
+        JOIN workflow_users_roles ur ON ur.role_id = r.id
+        WHERE t.manual = 1 AND t.state_ready = 1 AND t.assigned_user_id IS NULL"""
+    )
+    op.execute(
+        f"""INSERT INTO user_inbox ({_COLUMNS})
+        SELECT user_id, id, 'completed', 'completed', workflow_instance_id, created_at FROM (
+            SELECT t.assigned_user_id AS user_id, t.id, t.workflow_instance_id, i.created_at {_FROM_TASKS}
+            WHERE t.manual = 1 AND t.state_completed = 1 AND t.assigned_user_id IS NOT NULL
+            UNION
+            SELECT t.completed_by_user_id, t.id, t.workflow_instance_id, i.created_at {_FROM_TASKS}
+            WHERE t.manual = 1 AND t.state_completed = 1 AND t.completed_by_user_id IS NOT NULL
+            UNION
+            SELECT t.completed_by_delegate_user_id, t.id, t.workflow_instance_id, i.created_at {_FROM_TASKS}
+            WHERE t.manual = 1 AND t.state_completed = 1 AND t.completed_by_delegate_user_id IS NOT NULL
+        ) AS participants"""
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_inbox")
@@ -0,0 +1,26 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+"""instance name completed_at index
+
+Revision ID: 3b9d2e6f1a47
+Revises: 7f2e1a9c4b30
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3b9d2e6f1a47"
+down_revision = "7f2e1a9c4b30"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_workflow_instances_name_completed_at", "workflow_instances", ["name", "completed_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_workflow_instances_name_completed_at", table_name="workflow_instances")
@@ -0,0 +1,60 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+"""form schemas
+
+Revision ID: 5e0c8b2d7f14
+Revises: 3b9d2e6f1a47
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+import actidoo_wfe.database
+
+# revision identifiers, used by Alembic.
+revision = "5e0c8b2d7f14"
+down_revision = "3b9d2e6f1a47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "form_schemas",
+        sa.Column("hash", sa.String(length=64), nullable=False),
+        sa.Column("data", actidoo_wfe.database.ZlibJSONBlob(), nullable=False),
+        sa.Column("created_at", actidoo_wfe.database.UTCDateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("hash", name=op.f("pk_form_schemas")),
+    )
+    op.add_column("workflow_instance_tasks", sa.Column("jsonschema_hash", sa.String(length=64), nullable=True))
+    op.add_column("workflow_instance_tasks", sa.Column("uischema_hash", sa.String(length=64), nullable=True))
+    op.create_index(op.f("ix_workflow_instance_tasks_jsonschema_hash"), "workflow_instance_tasks", ["jsonschema_hash"], unique=False)
+    op.create_index(op.f("ix_workflow_instance_tasks_uischema_hash"), "workflow_instance_tasks", ["uischema_hash"], unique=False)
+    op.create_foreign_key(
+        op.f("fk_workflow_instance_tasks_jsonschema_hash_form_schemas"),
+        "workflow_instance_tasks",
+        "form_schemas",
+        ["jsonschema_hash"],
+        ["hash"],
+    )
+    op.create_foreign_key(
+        op.f("fk_workflow_instance_tasks_uischema_hash_form_schemas"),
+        "workflow_instance_tasks",
+        "form_schemas",
+        ["uischema_hash"],
+        ["hash"],
+    )
+    # The existing inline schemas stay readable; move them with `cli migrate-form-schemas`.
+
+
+def downgrade() -> None:
+    op.drop_constraint(op.f("fk_workflow_instance_tasks_uischema_hash_form_schemas"), "workflow_instance_tasks", type_="foreignkey")
+    op.drop_constraint(op.f("fk_workflow_instance_tasks_jsonschema_hash_form_schemas"), "workflow_instance_tasks", type_="foreignkey")
+    op.drop_index(op.f("ix_workflow_instance_tasks_uischema_hash"), table_name="workflow_instance_tasks")
+    op.drop_index(op.f("ix_workflow_instance_tasks_jsonschema_hash"), table_name="workflow_instance_tasks")
+    op.drop_column("workflow_instance_tasks", "uischema_hash")
+    op.drop_column("workflow_instance_tasks", "jsonschema_hash")
+    op.drop_table("form_schemas")
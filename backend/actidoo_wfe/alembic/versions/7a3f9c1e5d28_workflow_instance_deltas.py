@@ -0,0 +1,48 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+"""workflow instance deltas
+
+Revision ID: 7a3f9c1e5d28
+Revises: 5e0c8b2d7f14
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+import actidoo_wfe.database
+
+# revision identifiers, used by Alembic.
+revision = "7a3f9c1e5d28"
+down_revision = "5e0c8b2d7f14"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("workflow_instances", sa.Column("delta_count", sa.Integer(), server_default="0", nullable=False))
+    op.add_column("workflow_instances", sa.Column("delta_size", sa.Integer(), server_default="0", nullable=False))
+    op.create_table(
+        "workflow_instance_deltas",
+        sa.Column("workflow_instance_id", sa.Uuid(), nullable=False),
+        sa.Column("sequence", sa.Integer(), nullable=False),
+        sa.Column("patch", actidoo_wfe.database.ZlibJSONBlob(), nullable=False),
+        sa.Column("created_at", actidoo_wfe.database.UTCDateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["workflow_instance_id"],
+            ["workflow_instances.id"],
+            name=op.f("fk_workflow_instance_deltas_workflow_instance_id_workflow_instances"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("workflow_instance_id", "sequence", name=op.f("pk_workflow_instance_deltas")),
+    )
+
+
+def downgrade() -> None:
+    # Older versions only read workflow_instances.data: fold pending deltas in with
+    # `cli compact-workflow-snapshots` before downgrading.
+    op.drop_table("workflow_instance_deltas")
+    op.drop_column("workflow_instances", "delta_size")
+    op.drop_column("workflow_instances", "delta_count")
@@ -0,0 +1,27 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+"""workflow instance version
+
+Revision ID: 9c2e4b7a1f63
+Revises: 7a3f9c1e5d28
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9c2e4b7a1f63"
+down_revision = "7a3f9c1e5d28"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("workflow_instances", sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column("workflow_instances", "version")
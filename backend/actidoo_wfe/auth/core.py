@@ -89,7 +89,7 @@ def refresh_token_if_needed(request: Request) -> None:
         return
 
     from actidoo_wfe.database import get_db_contextmanager
-    from actidoo_wfe.session import load_session_for_update
+    from actidoo_wfe.session import invalidate_cached_session, load_session_for_update
 
     # Only back off from a busy row while our own token is still usable; if it has already
     # expired, backing off would just 401, so wait for the in-flight refresh instead.
@@ -150,6 +150,10 @@ def refresh_token_if_needed(request: Request) -> None:
                 new_data[SESSION_IDP_CLAIMS_KEY] = new_claims
             row.data = new_data
 
+        # The row now holds a newer token than any cached copy of the session.
+        if isinstance(new_token, dict):
+            invalidate_cached_session(db=db, token=session_token)
+
     # Make the fresh token/claims visible to the rest of this request.
     if isinstance(new_token, dict):
         set_token_in_session(request, new_token)
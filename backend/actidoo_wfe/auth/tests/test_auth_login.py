@@ -31,6 +31,7 @@ from actidoo_wfe.session import (
     generate_session_id,
     load_session,
     save_session,
+    session_cache,
 )
 from actidoo_wfe.settings import settings
 
@@ -697,6 +698,8 @@ def test_login_state_refreshes_expired_token_with_refresh_token(oidc_environment
         mutated_token["expires_at"] = int(time.time()) - 20
         mutated_data[SESSION_TOKEN_KEY] = mutated_token
         record.data = mutated_data
+    # the row was changed behind the middleware's back, like another process would
+    session_cache.invalidate(session_cookie)
 
     login_state_url = client.app.url_path_for("auth_get_login_state")
     login_state_response = client.get(
@@ -741,6 +744,8 @@ def test_login_state_reports_logged_out_for_expired_token_without_refresh_token(
         mutated_token.pop("refresh_token", None)
         mutated_data[SESSION_TOKEN_KEY] = mutated_token
         record.data = mutated_data
+    # the row was changed behind the middleware's back, like another process would
+    session_cache.invalidate(session_cookie)
 
     login_state_url = client.app.url_path_for("auth_get_login_state")
     login_state_response = client.get(
@@ -151,5 +151,127 @@ def migrate_jsonblob():
     session.commit()
 
 
+@app.command()
+def migrate_form_schemas(batch_size: int = 500):
+    """Move the inline jsonschema/uischema of task rows into the deduplicated form_schemas table."""
+    from sqlalchemy import or_, select
+    from sqlalchemy.orm import load_only
+
+    from actidoo_wfe.wf.models import WorkflowInstanceTask
+    from actidoo_wfe.wf.repository import store_form_schema
+
+    database.setup_db(settings)
+    session: database.Session = database.SessionLocal()
+
+    migrated = 0
+    while True:
+        tasks = (
+            session.execute(
+                select(WorkflowInstanceTask)
+                .options(
+                    load_only(
+                        WorkflowInstanceTask.legacy_jsonschema,
+                        WorkflowInstanceTask.legacy_uischema,
+                        WorkflowInstanceTask.jsonschema_hash,
+                        WorkflowInstanceTask.uischema_hash,
+                    ),
+                )
+                .where(
+                    or_(
+                        WorkflowInstanceTask.legacy_jsonschema.is_not(None),
+                        WorkflowInstanceTask.legacy_uischema.is_not(None),
+                    ),
+                )
+                .limit(batch_size),
+            )
+            .scalars()
+            .all()
+        )
+        if not tasks:
+            break
+
+        for task in tasks:
+            if task.legacy_jsonschema is not None:
+                task.jsonschema_hash = store_form_schema(db=session, schema=task.legacy_jsonschema)
+                task.legacy_jsonschema = None
+            if task.legacy_uischema is not None:
+                task.uischema_hash = store_form_schema(db=session, schema=task.legacy_uischema)
+                task.legacy_uischema = None
+
+        session.commit()
+        migrated += len(tasks)
+        log.info(f"Moved the form schemas of {migrated} tasks to form_schemas")
+
+    log.info(f"Done, {migrated} tasks migrated")
+
+
+@app.command()
+def compact_workflow_snapshots(batch_size: int = 100):
+    """Fold the delta chains of all workflow instances into their base snapshots (see WORKFLOW_INSTANCE_DELTA_SNAPSHOTS)."""
+    from sqlalchemy import select
+
+    from actidoo_wfe.wf.models import WorkflowInstance
+    from actidoo_wfe.wf.repository import compact_workflow_instance
+
+    database.setup_db(settings)
+    session: database.Session = database.SessionLocal()
+
+    compacted = 0
+    while True:
+        ids = session.execute(select(WorkflowInstance.id).where(WorkflowInstance.delta_count > 0).limit(batch_size)).scalars().all()
+        if not ids:
+            break
+
+        for workflow_instance_id in ids:
+            compact_workflow_instance(db=session, workflow_instance_id=workflow_instance_id)
+        session.commit()
+        compacted += len(ids)
+        log.info(f"Compacted {compacted} workflow instances")
+
+    log.info(f"Done, {compacted} workflow instances compacted")
+
+
+@app.command()
+def train_zstd_dictionary(samples: int = 1000, dictionary_size: int = 112640, output_dir: str = settings.blob_compression_zstd_dictionary_dir):
+    """Train a zstd dictionary on the most recently created workflow instance blobs.
+
+    Writes <dictionary id>.zdict to output_dir; enable it with BLOB_COMPRESSION_CODEC=zstd and BLOB_COMPRESSION_ZSTD_DICTIONARY_ID=<dictionary id>."""
+    import pathlib
+
+    import zstandard
+    from sqlalchemy import select
+
+    from actidoo_wfe.wf.models import WorkflowInstance
+
+    if not output_dir:
+        raise typer.BadParameter("Set --output-dir or BLOB_COMPRESSION_ZSTD_DICTIONARY_DIR")
+
+    database.setup_db(settings)
+    session: database.Session = database.SessionLocal()
+
+    blobs = [
+        database.dump_json(data)
+        for data in session.execute(
+            select(WorkflowInstance.data).order_by(WorkflowInstance.created_at.desc()).limit(samples),
+        ).scalars()
+    ]
+    if not blobs:
+        log.error("No workflow instances to train on")
+        raise typer.Exit(code=1)
+
+    dictionary = zstandard.train_dictionary(dictionary_size, blobs)
+
+    path = pathlib.Path(output_dir) / f"{dictionary.dict_id()}.zdict"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(dictionary.as_bytes())
+
+    raw_size = sum(len(blob) for blob in blobs)
+    zlib_size = sum(len(zlib.compress(blob)) for blob in blobs)
+    compressor = zstandard.ZstdCompressor(level=settings.blob_compression_zstd_level, dict_data=dictionary)
+    zstd_size = sum(len(compressor.compress(blob)) for blob in blobs)
+    log.info(f"Trained on {len(blobs)} blobs ({raw_size} bytes): zlib {zlib_size} bytes, zstd with dictionary {zstd_size} bytes")
+    log.info(f"Written {path}; set BLOB_COMPRESSION_ZSTD_DICTIONARY_ID={dictionary.dict_id()} to use it")
+
+
 if __name__ == "__main__":
     app()
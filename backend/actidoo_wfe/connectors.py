@@ -8,18 +8,33 @@ Extensions register connector *types* (name + config schema + factory).
 Deployments configure named *instances* via ``settings.connectors``.
 Workflow code obtains a context-manager handle via
 ``sth.get_connector(type_name, instance_name)``.
+
+The config of an instance is validated once and kept until its entry in
+``settings.connectors`` changes. A type may also declare a ``client_factory``:
+its client (e.g. ``http_client()`` or ``sql_engine()``) is created once per
+instance, shared by all handles and thereby keeps its connections pooled;
+the factory is then called as ``factory(config, client)``. A client replaced
+because its config changed or its health check failed is closed once the
+last handle using it is released.
 """
 
 from __future__ import annotations
 
 import contextlib
+import copy
 import logging
+import threading
+import time
 from dataclasses import dataclass, field
-from typing import Any, Callable, ContextManager, Dict, List, Type
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Dict, List, Tuple, Type
 
 import venusian
 from pydantic import BaseModel, ValidationError
 
+if TYPE_CHECKING:
+    import httpx
+    from sqlalchemy.engine import Engine
+
 log = logging.getLogger(__name__)
 
 
@@ -35,15 +50,46 @@ class ConnectorInstanceNotFoundError(KeyError):
 class ConnectorType:
     name: str
     config_schema: Type[BaseModel]
-    factory: Callable[[BaseModel], ContextManager]
+    factory: Callable[..., ContextManager]
     source_name: str = ""
+    # Pooled client shared by all handles of an instance, see the module docstring
+    client_factory: Callable[[BaseModel], Any] | None = None
+    # Called with the client before it is handed out, at most every connector_health_check_interval_seconds;
+    # a client failing it is replaced by a new one and closed once no handle uses it anymore
+    health_check: Callable[[Any], bool] | None = None
+    close_client: Callable[[Any], None] | None = None
+
+
+@dataclass
+class PooledClient:
+    client: Any
+    checked_at: float
+    # Open handles using the client; a retired client is closed when the last one is released
+    handles: int = 0
+    retired: bool = False
+
+
+@dataclass
+class ConnectorInstance:
+    raw_config: dict
+    config: BaseModel
+    pooled: PooledClient | None = None
+    # Set once the instance was replaced (config change) or closed
+    retired: bool = False
+    # Serializes health checks and client creation of this instance, which may do network calls
+    client_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
 
 
 class ConnectorRegistry:
-    """Singleton-style registry for connector types."""
+    """Singleton-style registry for connector types and the validated instances of them.
+
+    ``_instances_lock`` only guards the bookkeeping; health checks, client creation and
+    closing clients happen outside of it."""
 
     def __init__(self) -> None:
         self._types: Dict[str, ConnectorType] = {}
+        self._instances: Dict[Tuple[str, str], ConnectorInstance] = {}
+        self._instances_lock = threading.Lock()
 
     def register(self, ct: ConnectorType) -> None:
         existing = self._types.get(ct.name)
@@ -67,7 +113,115 @@ class ConnectorRegistry:
     def list_types(self) -> List[str]:
         return sorted(self._types)
 
+    def get_instance(self, ct: ConnectorType, instance_name: str, raw_config: dict) -> ConnectorInstance:
+        """The validated instance for ``raw_config``; validated again (and its client retired) only when the config changed."""
+        key = (ct.name, instance_name)
+        with self._instances_lock:
+            instance = self._instances.get(key)
+            if instance is not None and instance.raw_config == raw_config:
+                return instance
+
+        config = ct.config_schema(**raw_config)
+        to_close = None
+        with self._instances_lock:
+            previous = self._instances.get(key)
+            if previous is not None and previous.raw_config == raw_config:
+                return previous  # validated by another thread meanwhile
+            instance = self._instances[key] = ConnectorInstance(raw_config=copy.deepcopy(raw_config), config=config)
+            if previous is not None:
+                to_close = self._retire_instance(previous)
+        if to_close is not None:
+            self._close_client(ct, to_close)
+        return instance
+
+    @contextlib.contextmanager
+    def pooled_handle(self, ct: ConnectorType, instance_name: str, instance: ConnectorInstance):
+        """The handle of ``ct.factory`` on the pooled client of the instance, which stays open while the handle is used."""
+        pooled = self._lease_client(ct, instance_name, instance)
+        try:
+            with ct.factory(instance.config, pooled.client) as handle:
+                yield handle
+        finally:
+            self._release_client(ct, pooled)
+
+    def _lease_client(self, ct: ConnectorType, instance_name: str, instance: ConnectorInstance) -> PooledClient:
+        from actidoo_wfe.settings import settings
+
+        assert ct.client_factory is not None
+        with instance.client_lock:
+            pooled = instance.pooled
+            if pooled is not None and ct.health_check is not None and time.monotonic() - pooled.checked_at >= settings.connector_health_check_interval_seconds:
+                try:
+                    healthy = ct.health_check(pooled.client)
+                except Exception:
+                    log.exception("Health check of connector %s/%s failed", ct.name, instance_name)
+                    healthy = False
+                if healthy:
+                    pooled.checked_at = time.monotonic()
+                else:
+                    log.warning("Connector %s/%s is unhealthy, creating a new client", ct.name, instance_name)
+                    with self._instances_lock:
+                        instance.pooled = None
+                        close_now = self._retire_client(pooled)
+                    if close_now:
+                        self._close_client(ct, pooled)
+                    pooled = None
+
+            if pooled is None:
+                pooled = PooledClient(client=ct.client_factory(instance.config), checked_at=time.monotonic())
+
+            with self._instances_lock:
+                pooled.handles += 1
+                if instance.retired:
+                    # Replaced while the client was created: serve this handle, then close it
+                    pooled.retired = True
+                else:
+                    instance.pooled = pooled
+        return pooled
+
+    def _release_client(self, ct: ConnectorType, pooled: PooledClient) -> None:
+        with self._instances_lock:
+            pooled.handles -= 1
+            close_now = pooled.retired and pooled.handles == 0
+        if close_now:
+            self._close_client(ct, pooled)
+
+    def _retire_client(self, pooled: PooledClient) -> bool:
+        """Marks the client for closing; returns True if no handle uses it and it can be closed now. Needs ``_instances_lock``."""
+        pooled.retired = True
+        return pooled.handles == 0
+
+    def _retire_instance(self, instance: ConnectorInstance) -> PooledClient | None:
+        """Returns the client of the instance if it can be closed now. Needs ``_instances_lock``."""
+        instance.retired = True
+        pooled, instance.pooled = instance.pooled, None
+        if pooled is not None and self._retire_client(pooled):
+            return pooled
+        return None
+
+    def _close_client(self, ct: ConnectorType, pooled: PooledClient) -> None:
+        if ct.close_client is None:
+            return
+        try:
+            ct.close_client(pooled.client)
+        except Exception:
+            log.exception("Closing a client of connector %s failed", ct.name)
+
+    def close_instances(self) -> None:
+        """Closes the pooled clients of all instances, e.g. at shutdown; clients still in use are closed when released."""
+        to_close = []
+        with self._instances_lock:
+            for (type_name, _instance_name), instance in self._instances.items():
+                pooled = self._retire_instance(instance)
+                ct = self._types.get(type_name)
+                if pooled is not None and ct is not None:
+                    to_close.append((ct, pooled))
+            self._instances.clear()
+        for ct, pooled in to_close:
+            self._close_client(ct, pooled)
+
     def clear(self) -> None:
+        self.close_instances()
         self._types.clear()
 
 
@@ -79,8 +233,8 @@ def get_connector(type_name: str, instance_name: str) -> ContextManager:
 
     1. Look up the registered *type*.
     2. Load the raw config dict from ``settings.connectors[type_name][instance_name]``.
-    3. Validate via the type's Pydantic config schema.
-    4. Call the factory to obtain a context manager.
+    3. Validate via the type's Pydantic config schema, unless done before for this config.
+    4. Call the factory to obtain a context manager, with the pooled client if the type has one.
     """
     from actidoo_wfe.settings import settings
 
@@ -98,8 +252,10 @@ def get_connector(type_name: str, instance_name: str) -> ContextManager:
             f"Connector instance '{instance_name}' not found for type '{type_name}'. Available instances: {sorted(type_instances)}",
         )
 
-    validated = ct.config_schema(**raw_config)
-    return ct.factory(validated)
+    instance = connector_registry.get_instance(ct, instance_name, raw_config)
+    if ct.client_factory is not None:
+        return connector_registry.pooled_handle(ct, instance_name, instance)
+    return ct.factory(instance.config)
 
 
 def validate_configured_connectors() -> List[str]:
@@ -123,7 +279,8 @@ def validate_configured_connectors() -> List[str]:
 
         for instance_name, raw_config in instances.items():
             try:
-                ct.config_schema(**raw_config)
+                # keeps the validated config for get_connector(); clients are created on first use
+                connector_registry.get_instance(ct, instance_name, raw_config)
             except ValidationError as exc:
                 warnings.append(f"Connector {type_name}/{instance_name}: {exc}")
             except Exception as exc:
@@ -137,6 +294,9 @@ def register_connector_type(
     name: str,
     config_schema: Type[BaseModel],
     source_name: str = "",
+    client_factory: Callable[[BaseModel], Any] | None = None,
+    health_check: Callable[[Any], bool] | None = None,
+    close_client: Callable[[Any], None] | None = None,
 ):
     """Decorator to register a connector factory via venusian scan.
 
@@ -154,14 +314,30 @@ def register_connector_type(
                 yield jira
             finally:
                 jira.close()
+
+    With a pooled client, shared by all handles of an instance::
+
+        @register_connector_type(
+            name="crm",
+            config_schema=CrmConfig,
+            client_factory=lambda config: http_client(base_url=config.url),
+            health_check=lambda client: client.get("/health").is_success,
+            close_client=lambda client: client.close(),
+        )
+        @contextlib.contextmanager
+        def crm_connector(config: CrmConfig, client: httpx.Client):
+            yield CrmApi(client)
     """
 
-    def decorator(factory: Callable[[BaseModel], ContextManager]):
+    def decorator(factory: Callable[..., ContextManager]):
         ct = ConnectorType(
             name=name,
             config_schema=config_schema,
             factory=factory,
             source_name=source_name or getattr(factory, "__qualname__", str(factory)),
+            client_factory=client_factory,
+            health_check=health_check,
+            close_client=close_client,
         )
 
         def callback(scanner, _name, _ob):
@@ -172,3 +348,40 @@ def register_connector_type(
         return factory
 
     return decorator
+
+
+def http_client(*, base_url: str = "", headers: Dict[str, str] | None = None, timeout: float = 30.0) -> "httpx.Client":
+    """A client for ``client_factory`` keeping up to ``settings.connector_http_max_connections`` connections alive."""
+    import httpx
+
+    from actidoo_wfe.settings import settings
+
+    return httpx.Client(
+        base_url=base_url,
+        headers=headers,
+        timeout=httpx.Timeout(timeout),
+        limits=httpx.Limits(
+            max_connections=settings.connector_http_max_connections,
+            max_keepalive_connections=settings.connector_http_max_connections,
+        ),
+    )
+
+
+def sql_engine(url: str, **kwargs: Any) -> "Engine":
+    """An engine for ``client_factory`` with a connection pool checked before use (pre-ping)."""
+    from sqlalchemy import create_engine
+
+    from actidoo_wfe.settings import settings
+
+    kwargs.setdefault("pool_size", settings.connector_sql_pool_size)
+    kwargs.setdefault("pool_recycle", 3600)
+    return create_engine(url, pool_pre_ping=True, **kwargs)
+
+
+def sql_engine_is_healthy(engine: "Engine") -> bool:
+    """A ``health_check`` for ``sql_engine()`` clients."""
+    from sqlalchemy import text
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return True
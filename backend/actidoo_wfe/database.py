@@ -2,8 +2,10 @@
 # Copyright (c) 2025 ActiDoo GmbH
 
 import datetime
+import decimal
 import json
 import logging
+import math
 import uuid
 import zlib
 from contextlib import contextmanager
@@ -11,6 +13,7 @@ from typing import Any, Generator
 from urllib import parse
 
 import alembic.config
+import orjson
 from asgi_correlation_id.context import correlation_id
 from sqlalchemy import TIMESTAMP, MetaData, NullPool, TypeDecorator, Uuid, literal, text
 from sqlalchemy.dialects.mysql import LONGBLOB, LONGTEXT
@@ -22,6 +25,7 @@ from actidoo_wfe.constants import ALEMBIC_PATH
 
 # load_all_models() is only used dynamically by CLI function, so there's no static dependency to actidoo_wfe.database_models
 from actidoo_wfe.database_models import load_all_models
+from actidoo_wfe.helpers.compression import compress_blob, decompress_blob
 from actidoo_wfe.helpers.wait_for_server import wait_for_server
 from actidoo_wfe.settings import Settings
 
@@ -459,26 +463,79 @@ class FlexibleUuid(TypeDecorator):
         return value
 
 
+### JSON codec of the JSON column types
+
+# Non-string dict keys are stringified, as the stdlib encoder does
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _json_default(obj):
+    """Serialize types orjson does not support natively (datetime, date, UUID and enums it does)."""
+    if isinstance(obj, decimal.Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _contains_non_finite_float(value: Any) -> bool:
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, float):
+            if not math.isfinite(item):
+                return True
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return False
+
+
+def dump_json(value: Any) -> bytes:
+    """Serialize a value of a JSON column to UTF-8 encoded JSON.
+
+    The output is compact (no whitespace) and not ASCII-escaped, so it differs byte-wise
+    from what the stdlib encoder wrote before; both are read by load_json."""
+    try:
+        dumped = orjson.dumps(value, default=_json_default, option=_ORJSON_OPTIONS)
+    except orjson.JSONEncodeError:
+        # Integers beyond 64 bit or lone surrogates in strings, which the stdlib encoder accepts
+        return json.dumps(value, default=_json_default).encode("utf-8")
+    # orjson writes NaN and +-Infinity as null; keep them like the stdlib encoder does
+    if b"null" in dumped and _contains_non_finite_float(value):
+        return json.dumps(value, default=_json_default).encode("utf-8")
+    return dumped
+
+
+def load_json(value: str | bytes) -> Any:
+    """Parse the JSON of a JSON column."""
+    try:
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        # The stdlib encoder wrote NaN/Infinity and escaped lone surrogates, which orjson rejects
+        return json.loads(value)
+
+
 class JSONBlob(TypeDecorator):
     impl = LONGTEXT
     cache_ok = True
 
     def process_bind_param(self, value, dialect):
         if value is not None:
-            # Convert Python object to JSON string and then encode as bytes
-            value = json.dumps(value)
+            # Convert Python object to JSON string
+            value = dump_json(value).decode("utf-8")
         return value
 
     def process_result_value(self, value, dialect):
         if value is not None:
-            # Decode bytes to JSON string and then convert to Python object
-            value = json.loads(value)
+            # Convert JSON string to Python object
+            value = load_json(value)
         return value
 
 
 class ZlibJSONBlob(TypeDecorator):
     """
-    SQLAlchemy type for storing JSON as zlib-compressed binary data.
+    SQLAlchemy type for storing JSON as compressed binary data.
+    The codec is configurable (see helpers/compression.py, zlib by default); rows written with any codec stay readable.
     On load it falls back to plain JSON if decompression fails.
     """
 
@@ -496,8 +553,7 @@ class ZlibJSONBlob(TypeDecorator):
         if value is None:
             return None
         try:
-            json_str = json.dumps(value)
-            return zlib.compress(json_str.encode("utf-8"))
+            return compress_blob(dump_json(value))
         except Exception as e:
             raise ValueError(f"Error compressing JSON data: {e}") from e
 
@@ -508,23 +564,19 @@ class ZlibJSONBlob(TypeDecorator):
         # 1) Fallback for uncompressed JSON str
         if isinstance(value, str):
             try:
-                return json.loads(value)
+                return load_json(value)
             except Exception as e:
                 raise ValueError(f"Error parsing plain JSON string: {e}") from e
 
         # 2) If Bytes, decompress
         if isinstance(value, (bytes, bytearray)):
-            decompressor = zlib.decompressobj()
             try:
-                data = decompressor.decompress(value, self.max_decompress_size)
-                if decompressor.unconsumed_tail:
-                    raise ValueError("Decompressed data exceeds allowed size limit.")
-                return json.loads(data.decode("utf-8"))
+                return load_json(decompress_blob(value, self.max_decompress_size))
             except zlib.error:
                 # Fallback: Decode Bytes as UTF-8 and parse as JSON
                 try:
                     text = value.decode("utf-8")
-                    return json.loads(text)
+                    return load_json(text)
                 except Exception as e2:
                     raise ValueError(f"Error parsing fallback JSON from bytes: {e2}") from e2
 
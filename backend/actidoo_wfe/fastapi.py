@@ -31,7 +31,7 @@ from actidoo_wfe.settings import settings
 from actidoo_wfe.storage import setup_storage
 from actidoo_wfe.testing.utils import in_test
 from actidoo_wfe.venusian_scan import run_venusian_scan
-from actidoo_wfe.wf.exceptions import WorkflowDefinitionMissingError
+from actidoo_wfe.wf.exceptions import WorkflowDefinitionMissingError, WorkflowInstanceConflictError
 from actidoo_wfe.wf.fastapi import router as router_wf
 
 print(f"Setting Log-Level to {settings.log_level}")
@@ -90,19 +90,32 @@ async def lifespan(app: FastAPI):
 
         create_registered_data_model_tables(engine)
 
+    from actidoo_wfe.wf import providers as workflow_providers
+
     task_future = None
     if not in_test():
         task_future = asyncio.create_task(run_scheduler(settings=settings))
+        if settings.workflow_provider_rescan_seconds > 0:
+            workflow_providers.registry.start_watching(settings.workflow_provider_rescan_seconds)
 
     yield
 
     if task_future is not None:
         task_future.cancel()
+    workflow_providers.registry.stop_watching()
 
     # after app stop
     from actidoo_wfe.helpers.concurrency import stop_executor
 
     await stop_executor()
+
+    from actidoo_wfe.helpers.oauth_bearer import close_http_client
+
+    await close_http_client()
+
+    from actidoo_wfe.connectors import connector_registry
+
+    connector_registry.close_instances()
     engine.dispose()
 
 
@@ -155,6 +168,21 @@ async def _workflow_definition_missing_handler(_request: Request, exc: WorkflowD
         },
     )
 
+
+@app.exception_handler(WorkflowInstanceConflictError)
+async def _workflow_instance_conflict_handler(_request: Request, exc: WorkflowInstanceConflictError) -> JSONResponse:
+    # 409 Conflict: someone else changed (or is changing) the instance; nothing was stored,
+    # the client can reload and try again.
+    return JSONResponse(
+        status_code=409,
+        content={
+            "detail": str(exc),
+            "workflow_instance_id": str(exc.workflow_instance_id),
+            "code": exc.code,
+        },
+    )
+
+
 # For local develoment, we need to support CORS. CORS settings can be made in the application settings.
 if settings.cors_origins is not None and len(settings.cors_origins) > 0:
     app.add_middleware(
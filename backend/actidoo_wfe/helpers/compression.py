@@ -0,0 +1,152 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+"""Compression codecs of the compressed JSON columns (``database.ZlibJSONBlob``).
+
+Blobs written by a codec other than zlib start with a header naming the codec, so the
+codec can be changed at any time and every stored row stays readable:
+
+    HEADER_MAGIC (3 bytes) | codec id (1 byte) | compressed payload
+
+zlib blobs are written without header, as they were before codecs became pluggable.
+That keeps the default format readable by older versions; the zlib stream is
+recognised by its own header.
+"""
+
+import pathlib
+import threading
+import zlib
+from typing import Protocol
+
+from actidoo_wfe.settings import settings
+
+# A NUL byte never starts a zlib stream or a JSON text
+HEADER_MAGIC = b"\x00WJ"
+HEADER_LENGTH = len(HEADER_MAGIC) + 1
+
+
+class BlobCodec(Protocol):
+    codec_id: int
+    name: str
+
+    def compress(self, data: bytes) -> bytes: ...
+
+    def decompress(self, data: bytes, max_size: int) -> bytes:
+        """Decompress ``data``; raises ValueError if the result would exceed ``max_size`` bytes."""
+        ...
+
+
+class ZlibCodec:
+    codec_id = 1
+    name = "zlib"
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data)
+
+    def decompress(self, data: bytes, max_size: int) -> bytes:
+        decompressor = zlib.decompressobj()
+        result = decompressor.decompress(data, max_size)
+        if decompressor.unconsumed_tail:
+            raise ValueError("Decompressed data exceeds allowed size limit.")
+        return result
+
+
+class ZstdCodec:
+    """zstandard, optionally with a trained dictionary (see the ``train-zstd-dictionary`` cli command).
+
+    Needs the optional ``zstandard`` package. The dictionary id is part of every zstd
+    frame, so blobs written with an older dictionary stay readable as long as its file
+    is kept in ``blob_compression_zstd_dictionary_dir``."""
+
+    codec_id = 2
+    name = "zstd"
+
+    def __init__(self):
+        self._dictionaries: dict[int, object] = {}
+        self._dictionaries_lock = threading.Lock()
+        # zstandard (de)compressor objects must not be shared between threads
+        self._local = threading.local()
+
+    @staticmethod
+    def _zstandard():
+        try:
+            import zstandard
+        except ImportError as error:
+            raise RuntimeError("The zstd blob codec needs the zstandard package (pip install actidoo-wfe[zstd])") from error
+        return zstandard
+
+    def _dictionary(self, dict_id: int):
+        with self._dictionaries_lock:
+            dictionary = self._dictionaries.get(dict_id)
+            if dictionary is None:
+                path = pathlib.Path(settings.blob_compression_zstd_dictionary_dir) / f"{dict_id}.zdict"
+                if not path.is_file():
+                    raise ValueError(f"zstd dictionary {dict_id} not found at {path}")
+                dictionary = self._zstandard().ZstdCompressionDict(path.read_bytes())
+                self._dictionaries[dict_id] = dictionary
+            return dictionary
+
+    def _compressor(self):
+        dict_id = settings.blob_compression_zstd_dictionary_id
+        cached = getattr(self._local, "compressor", None)
+        if cached is None or cached[0] != dict_id:
+            dictionary = self._dictionary(dict_id) if dict_id else None
+            cached = (dict_id, self._zstandard().ZstdCompressor(level=settings.blob_compression_zstd_level, dict_data=dictionary))
+            self._local.compressor = cached
+        return cached[1]
+
+    def _decompressor(self, dict_id: int):
+        decompressors = getattr(self._local, "decompressors", None)
+        if decompressors is None:
+            decompressors = self._local.decompressors = {}
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            dictionary = self._dictionary(dict_id) if dict_id else None
+            decompressor = decompressors[dict_id] = self._zstandard().ZstdDecompressor(dict_data=dictionary)
+        return decompressor
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor().compress(data)
+
+    def decompress(self, data: bytes, max_size: int) -> bytes:
+        zstandard = self._zstandard()
+        try:
+            parameters = zstandard.get_frame_parameters(data)
+            if parameters.content_size > max_size:
+                raise ValueError("Decompressed data exceeds allowed size limit.")
+            return self._decompressor(parameters.dict_id).decompress(data, max_output_size=max_size)
+        except zstandard.ZstdError as error:
+            raise ValueError(f"Error decompressing zstd data: {error}") from error
+
+
+_codecs_by_id: dict[int, BlobCodec] = {}
+_codecs_by_name: dict[str, BlobCodec] = {}
+
+
+def register_blob_codec(codec: BlobCodec) -> None:
+    _codecs_by_id[codec.codec_id] = codec
+    _codecs_by_name[codec.name] = codec
+
+
+register_blob_codec(ZlibCodec())
+register_blob_codec(ZstdCodec())
+
+
+def compress_blob(data: bytes) -> bytes:
+    """Compress ``data`` with the codec configured in ``blob_compression_codec``."""
+    codec = _codecs_by_name[settings.blob_compression_codec]
+    if codec.codec_id == ZlibCodec.codec_id:
+        return codec.compress(data)
+    return HEADER_MAGIC + bytes([codec.codec_id]) + codec.compress(data)
+
+
+def decompress_blob(data: bytes, max_size: int) -> bytes:
+    """Decompress a blob written by ``compress_blob`` (with any codec) or a header-less zlib blob.
+
+    Raises ``zlib.error`` for data that is neither, e.g. uncompressed JSON."""
+    if data[: len(HEADER_MAGIC)] == HEADER_MAGIC and len(data) >= HEADER_LENGTH:
+        codec = _codecs_by_id.get(data[len(HEADER_MAGIC)])
+        if codec is None:
+            raise ValueError(f"Unknown blob codec id {data[len(HEADER_MAGIC)]}")
+        return codec.decompress(bytes(data[HEADER_LENGTH:]), max_size)
+    return _codecs_by_id[ZlibCodec.codec_id].decompress(data, max_size)
@@ -0,0 +1,68 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+"""A minimal JSON patch (RFC 6902) for documents made of nested objects.
+
+``make_patch`` descends into objects only; a changed list is replaced as a whole,
+which keeps patches simple and is cheap for the mostly-dict shaped serialized
+workflows. Only the ``add``, ``remove`` and ``replace`` operations are produced
+and understood.
+"""
+
+from typing import Any
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(old: Any, new: Any) -> list[dict]:
+    """Returns the operations that turn ``old`` into ``new``."""
+    operations: list[dict] = []
+    _diff(old, new, "", operations)
+    return operations
+
+
+def _diff(old: Any, new: Any, path: str, operations: list[dict]) -> None:
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, old_value in old.items():
+            key_path = f"{path}/{_escape(str(key))}"
+            if key not in new:
+                operations.append({"op": "remove", "path": key_path})
+            else:
+                _diff(old_value, new[key], key_path, operations)
+        for key, new_value in new.items():
+            if key not in old:
+                operations.append({"op": "add", "path": f"{path}/{_escape(str(key))}", "value": new_value})
+    # type() comparison: 1 == 1.0 == True, but they serialize differently
+    elif type(old) is not type(new) or old != new:
+        operations.append({"op": "replace", "path": path, "value": new})
+
+
+def apply_patch(document: Any, operations: list[dict]) -> Any:
+    """Applies ``operations`` to ``document`` in place and returns the patched document."""
+    for operation in operations:
+        path = operation["path"]
+        if path == "":
+            if operation["op"] == "remove":
+                raise ValueError("Cannot remove the document root")
+            document = operation["value"]
+            continue
+
+        *parents, last = [_unescape(token) for token in path[1:].split("/")]
+        target = document
+        for token in parents:
+            target = target[token]
+
+        match operation["op"]:
+            case "add" | "replace":
+                target[last] = operation["value"]
+            case "remove":
+                del target[last]
+            case op:
+                raise ValueError(f"Unsupported patch operation {op}")
+    return document
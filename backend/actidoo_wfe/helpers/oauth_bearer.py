@@ -1,13 +1,20 @@
 # SPDX-License-Identifier: Apache-2.0
 # Copyright (c) 2025 ActiDoo GmbH
 
+import asyncio
+import base64
 import dataclasses
+import hashlib
+import json
 import logging
 import re
 import time
+from collections import OrderedDict
 from typing import Annotated, Any, Optional, Sequence
 
 import httpx
+from authlib.jose import JsonWebKey, JsonWebToken, KeySet
+from authlib.jose.errors import JoseError
 from fastapi import Depends, HTTPException, Request, Security
 from fastapi.openapi.models import OAuthFlowClientCredentials, OAuthFlows
 from fastapi.security import OAuth2
@@ -54,21 +61,37 @@ def extract_first_list(payload: dict[str, Any], paths: Sequence[str]) -> list[st
     return []
 
 
+# How long a fetched openid-configuration document is reused
+_DISCOVERY_CACHE_SECONDS = 600
+
+_discovery_cache: dict[str, tuple[float, dict[str, Any]]] = {}
+
+
+def _get_openid_configuration(url: str) -> dict[str, Any]:
+    """Fetch (and cache for a few minutes) an openid-configuration document."""
+    now = time.monotonic()
+    cached = _discovery_cache.get(url)
+    if cached is not None and now - cached[0] < _DISCOVERY_CACHE_SECONDS:
+        return cached[1]
+
+    document = httpx.get(url=url).json()
+    _discovery_cache[url] = (now, document)
+    return document
+
+
 def get_token_endpoint():
     token_endpoint = settings.oauth_bearer_token_endpoint
 
     if token_endpoint.endswith(".well-known/openid-configuration"):
         # an OIDC configuration url is given, lets fetch the introspection endpoint
         try:
-            token_endpoint = httpx.get(url=token_endpoint).json().get("token_endpoint")
+            token_endpoint = _get_openid_configuration(token_endpoint).get("token_endpoint")
         except Exception:
             logger.exception("OAUTH_BEARER_TOKEN_ENDPOINT has been set to an openid-configuration endpoint, but the token_endpoint could not be retrieved from it")
 
         if not token_endpoint:
             logger.exception("OAUTH_BEARER_TOKEN_ENDPOINT has been set to an openid-configuration endpoint, but the token_endpoint could not be retrieved from it")
 
-    # TODO: Cache result for x minutes
-
     return token_endpoint
 
 
@@ -78,18 +101,269 @@ def get_introspection_endpoint():
     if introspection_endpoint.endswith(".well-known/openid-configuration"):
         # an OIDC configuration url is given, lets fetch the introspection endpoint
         try:
-            introspection_endpoint = httpx.get(url=introspection_endpoint).json().get("introspection_endpoint")
+            introspection_endpoint = _get_openid_configuration(introspection_endpoint).get("introspection_endpoint")
         except Exception:
             logger.exception("OAUTH_BEARER_INTROSPECTION_ENDPOINT has been set to an openid-configuration endpoint, but the introspection_endpoint could not be retrieved from it")
 
         if not introspection_endpoint:
             logger.exception("OAUTH_BEARER_INTROSPECTION_ENDPOINT has been set to an openid-configuration endpoint, but the introspection_endpoint could not be retrieved from it")
 
-    # TODO: Cache result for x minutes
-
     return introspection_endpoint
 
 
+### Shared HTTP client
+
+_http_client: httpx.AsyncClient | None = None
+_http_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The process-wide async client for calls to the IdP.
+
+    Keeps connections alive between requests. Pooled connections belong to the event
+    loop they were opened on, so a new client is created if called from another loop.
+    """
+    global _http_client, _http_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.oauth_bearer_http_max_connections,
+                max_keepalive_connections=settings.oauth_bearer_http_max_connections,
+            ),
+            timeout=httpx.Timeout(10.0),
+        )
+        _http_client_loop = loop
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client, _http_client_loop
+
+    if _http_client is not None and _http_client_loop is asyncio.get_running_loop():
+        await _http_client.aclose()
+    _http_client = None
+    _http_client_loop = None
+
+
+### Introspection cache
+
+
+@dataclasses.dataclass
+class _CachedIntrospection:
+    expires_at: float
+    # None marks a token the IdP reported as inactive (negative cache entry)
+    data: dict[str, Any] | None
+
+
+class IntrospectionCache:
+    """Bounded LRU of introspection results keyed by token hash.
+
+    Expiry uses wall-clock time, because the token's ``exp`` claim does as well."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, _CachedIntrospection] = OrderedDict()
+
+    def get(self, key: str, now: float) -> _CachedIntrospection | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, data: dict[str, Any] | None, expires_at: float) -> None:
+        self._entries[key] = _CachedIntrospection(expires_at=expires_at, data=data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+introspection_cache = IntrospectionCache(max_entries=settings.oauth_bearer_introspection_cache_max_entries)
+
+# Introspections currently in flight, so concurrent requests with the same token share one IdP call
+_inflight_introspections: dict[str, asyncio.Task] = {}
+
+
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _cache_expiry(introspection_data: dict[str, Any] | None, now: float) -> float:
+    if introspection_data is None:
+        return now + settings.oauth_bearer_introspection_negative_cache_ttl_seconds
+
+    expires_at = now + settings.oauth_bearer_introspection_cache_max_ttl_seconds
+    token_expiration = introspection_data.get("exp")
+    if isinstance(token_expiration, (int, float)):
+        expires_at = min(expires_at, float(token_expiration))
+    return expires_at
+
+
+async def _fetch_introspection(token: str, key: str) -> dict[str, Any] | None:
+    introspection_response = await get_http_client().post(
+        get_introspection_endpoint(),
+        data={"token": token},
+        auth=(settings.oauth_bearer_client_id, settings.oauth_bearer_client_secret),
+    )
+
+    if introspection_response.status_code >= 400:
+        # The IdP did not judge the token (e.g. misconfigured client credentials or an outage); do not cache that.
+        logger.warning(f"Token introspection failed with HTTP status {introspection_response.status_code}")
+        return None
+
+    introspection_data = introspection_response.json()
+    if not introspection_data.get("active"):
+        introspection_data = None
+
+    if settings.oauth_bearer_introspection_cache_max_ttl_seconds > 0:
+        now = time.time()
+        expires_at = _cache_expiry(introspection_data, now)
+        if expires_at > now:
+            introspection_cache.put(key, introspection_data, expires_at)
+
+    return introspection_data
+
+
+async def introspect_token(token: str) -> dict[str, Any] | None:
+    """The IdP's introspection result for *token*, or ``None`` if the token is not active.
+
+    Served from ``introspection_cache`` while the cached result is valid; concurrent
+    misses for the same token wait for a single introspection call."""
+    key = _token_cache_key(token)
+
+    cached = introspection_cache.get(key, time.time())
+    if cached is not None:
+        return cached.data
+
+    task = _inflight_introspections.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_introspection(token, key))
+        _inflight_introspections[key] = task
+        task.add_done_callback(lambda _: _inflight_introspections.pop(key, None))
+
+    # shield: a cancelled request must not cancel the introspection others are waiting for
+    return await asyncio.shield(task)
+
+
+### Local JWT validation
+
+
+_JWT_ALGORITHMS = ["RS256", "RS384", "RS512", "ES256", "ES384", "ES512", "PS256", "PS384", "PS512"]
+
+# Minimum time between two JWKS fetches triggered by unknown key ids, so forged kids cannot hammer the IdP
+_JWKS_MIN_REFRESH_SECONDS = 30
+
+
+def _get_jwt_validation_metadata() -> tuple[str, str]:
+    """The JWKS url and the expected issuer for local token validation."""
+    jwks_uri = settings.oauth_bearer_jwks_uri
+    issuer = settings.oauth_bearer_issuer
+
+    if not (jwks_uri and issuer):
+        for url in (settings.oauth_bearer_token_endpoint, settings.oauth_bearer_introspection_endpoint):
+            if url.endswith(".well-known/openid-configuration"):
+                document = _get_openid_configuration(url)
+                jwks_uri = jwks_uri or document.get("jwks_uri", "")
+                issuer = issuer or document.get("issuer", "")
+                break
+
+    if not (jwks_uri and issuer):
+        raise RuntimeError("OAUTH_BEARER_LOCAL_JWT_VALIDATION requires OAUTH_BEARER_JWKS_URI and OAUTH_BEARER_ISSUER, or an openid-configuration url as token/introspection endpoint")
+
+    return jwks_uri, issuer
+
+
+class JwksCache:
+    """The IdP's signing keys, fetched once and refreshed when a token names an unknown key id."""
+
+    def __init__(self):
+        self._key_set: KeySet | None = None
+        self._kids: set[str] = set()
+        self._fetched_at: float = 0.0
+        self._inflight: asyncio.Task | None = None
+
+    async def _fetch(self, jwks_uri: str) -> None:
+        response = await get_http_client().get(jwks_uri)
+        response.raise_for_status()
+        jwks = response.json()
+        self._key_set = JsonWebKey.import_key_set(jwks)
+        self._kids = {key.get("kid") for key in jwks.get("keys", []) if key.get("kid")}
+        self._fetched_at = time.monotonic()
+
+    async def get_key_set(self, jwks_uri: str, kid: str | None) -> KeySet:
+        known = self._key_set is not None and (kid is None or kid in self._kids)
+        may_refresh = self._key_set is None or time.monotonic() - self._fetched_at >= _JWKS_MIN_REFRESH_SECONDS
+
+        if not known and may_refresh:
+            if self._inflight is None or self._inflight.done():
+                self._inflight = asyncio.ensure_future(self._fetch(jwks_uri))
+            await asyncio.shield(self._inflight)
+
+        if self._key_set is None:
+            raise RuntimeError("JWKS could not be loaded")
+        return self._key_set
+
+    def clear(self) -> None:
+        self._key_set = None
+        self._kids = set()
+        self._fetched_at = 0.0
+        self._inflight = None
+
+
+jwks_cache = JwksCache()
+
+
+def _jwt_header(token: str) -> dict[str, Any] | None:
+    """The decoded JOSE header if *token* is a JWS compact serialization, otherwise ``None`` (opaque token)."""
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        header = json.loads(base64.urlsafe_b64decode(parts[0] + "=" * (-len(parts[0]) % 4)))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(header, dict) or "alg" not in header:
+        return None
+    return header
+
+
+async def validate_jwt_locally(token: str, header: dict[str, Any]) -> dict[str, Any] | None:
+    """The claims of *token* if its signature, issuer and lifetime are valid, otherwise ``None``.
+
+    The audience is checked by the caller, the same way as for introspection results."""
+    jwks_uri, issuer = _get_jwt_validation_metadata()
+    key_set = await jwks_cache.get_key_set(jwks_uri, header.get("kid"))
+
+    jwt = JsonWebToken(_JWT_ALGORITHMS)
+    try:
+        claims = jwt.decode(
+            token,
+            key_set,
+            claims_options={
+                "iss": {"essential": True, "value": issuer},
+                "exp": {"essential": True},
+                "sub": {"essential": True},
+            },
+        )
+        claims.validate(leeway=settings.oauth_bearer_jwt_leeway_seconds)
+    except (JoseError, ValueError) as error:
+        logger.info(f"Local JWT validation failed: {error}")
+        return None
+
+    return dict(claims)
+
+
 class OAuth2ClientCredentialsBearer(OAuth2):
     def __init__(
         self,
@@ -131,50 +405,45 @@ class TokenInformation:
     raw: dict[str, Any]
 
 
-# Function to validate the token using the introspection endpoint
+# Function to validate the token locally (JWTs, if enabled) or using the introspection endpoint
 async def oauth_bearer_validate_token(token: Annotated[str, Security(OAuth2ClientCredentialsBearer(tokenUrl=get_token_endpoint()))]):
-    async with httpx.AsyncClient() as client:
-        # TODO: Cache this for the given token for x minutes / seconds (but then always check exp)
-        url = get_introspection_endpoint()
-        introspection_response = await client.post(
-            url,
-            data={"token": token},
-            auth=(settings.oauth_bearer_client_id, settings.oauth_bearer_client_secret),  # Replace with your client credentials
-        )
-
-        introspection_data = introspection_response.json()
-
-        if not introspection_data.get("active"):
-            raise HTTPException(status_code=401, detail="Token is not valid")
-
-        # Validate token audience
-        token_audience = introspection_data.get("aud")
-        if not (token_audience == settings.oauth_bearer_client_id or (isinstance(token_audience, list) and settings.oauth_bearer_client_id in token_audience)):
-            raise HTTPException(status_code=401, detail="Token audience is invalid")
-
-        # Validate token expiration time (exp claim)
-        token_expiration = introspection_data.get("exp")
-        current_time = int(time.time())
-        if token_expiration is not None and token_expiration < current_time:
-            raise HTTPException(status_code=401, detail="Token has expired")
-
-        preferred_username = introspection_data.get("preferred_username") or introspection_data.get("username")
-        role_claim_paths = [path.replace("{client_id}", settings.oauth_bearer_client_id) for path in settings.oauth_bearer_role_claim_paths]
-        roles = extract_first_list(introspection_data, role_claim_paths)
-        resource_roles: dict[str, list[str]] = {}
-        for client, meta in (introspection_data.get("resource_access") or {}).items():
-            roles_for_client = coerce_to_list(meta.get("roles"))
-            if roles_for_client:
-                resource_roles[client] = roles_for_client
-
-        return TokenInformation(
-            sub=introspection_data["sub"],
-            preferred_username=preferred_username,
-            aud=introspection_data["aud"],
-            roles=roles,
-            resource_roles=resource_roles,
-            raw=introspection_data,
-        )
+    jwt_header = _jwt_header(token) if settings.oauth_bearer_local_jwt_validation else None
+    if jwt_header is not None:
+        introspection_data = await validate_jwt_locally(token, jwt_header)
+    else:
+        introspection_data = await introspect_token(token)
+
+    if introspection_data is None:
+        raise HTTPException(status_code=401, detail="Token is not valid")
+
+    # Validate token audience
+    token_audience = introspection_data.get("aud")
+    if not (token_audience == settings.oauth_bearer_client_id or (isinstance(token_audience, list) and settings.oauth_bearer_client_id in token_audience)):
+        raise HTTPException(status_code=401, detail="Token audience is invalid")
+
+    # Validate token expiration time (exp claim); checked on every request, as the result may come from the cache
+    token_expiration = introspection_data.get("exp")
+    current_time = int(time.time())
+    if token_expiration is not None and token_expiration < current_time:
+        raise HTTPException(status_code=401, detail="Token has expired")
+
+    preferred_username = introspection_data.get("preferred_username") or introspection_data.get("username")
+    role_claim_paths = [path.replace("{client_id}", settings.oauth_bearer_client_id) for path in settings.oauth_bearer_role_claim_paths]
+    roles = extract_first_list(introspection_data, role_claim_paths)
+    resource_roles: dict[str, list[str]] = {}
+    for client, meta in (introspection_data.get("resource_access") or {}).items():
+        roles_for_client = coerce_to_list(meta.get("roles"))
+        if roles_for_client:
+            resource_roles[client] = roles_for_client
+
+    return TokenInformation(
+        sub=introspection_data["sub"],
+        preferred_username=preferred_username,
+        aud=introspection_data["aud"],
+        roles=roles,
+        resource_roles=resource_roles,
+        raw=introspection_data,
+    )
 
 
 def oauth_bearer_require_client_role(role: str, client_id: str = settings.oauth_bearer_client_id):
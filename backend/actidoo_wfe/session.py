@@ -1,24 +1,30 @@
 # SPDX-License-Identifier: Apache-2.0
 # Copyright (c) 2025 ActiDoo GmbH
 
+import copy
+import dataclasses
 import datetime
-import random
 import secrets
 import string
+import threading
+import time
 import typing
 import uuid
+from collections import OrderedDict
 
 import sqlalchemy.types as ty
 from itsdangerous.exc import BadSignature
-from sqlalchemy import delete, select
+from sqlalchemy import delete, event, select
 from sqlalchemy.dialects.mysql import JSON
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, Session, mapped_column
 from starlette.datastructures import MutableHeaders
 from starlette.requests import HTTPConnection
 from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from actidoo_wfe.async_scheduling import cron_task
 from actidoo_wfe.database import Base, UTCDateTime, get_db_contextmanager
 from actidoo_wfe.helpers.time import dt_ago_aware, dt_ago_naive, dt_now_naive
+from actidoo_wfe.settings import settings
 
 
 class SessionModel(Base):
@@ -39,6 +45,116 @@ class SessionModel(Base):
     data: Mapped[dict[str, str]] = mapped_column(JSON)
 
 
+@dataclasses.dataclass
+class _CachedSession:
+    loaded_at: float
+    id: uuid.UUID
+    created_at: datetime.datetime
+    data: dict
+
+
+class SessionCache:
+    """Process-local LRU of session rows keyed by session token, with a short TTL.
+
+    Saves SessionMiddleware a query per request for polling clients. Every write path
+    (save_session, delete_session, the token refresh) invalidates the entry through
+    invalidate_cached_session(), again once its transaction committed; the token
+    refresh itself always reads the row under a lock, so a stale cached token is never
+    spent. Callers get a copy of the data and may modify it freely."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, _CachedSession] = OrderedDict()
+        self._tokens_by_id: dict[uuid.UUID, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> SessionModel | None:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.loaded_at >= self.ttl_seconds:
+                self._remove(token)
+                return None
+            self._entries.move_to_end(token)
+
+        return SessionModel(id=entry.id, token=token, created_at=entry.created_at, data=copy.deepcopy(entry.data))
+
+    def put(self, session: SessionModel) -> None:
+        if self.ttl_seconds <= 0:
+            return
+
+        entry = _CachedSession(
+            loaded_at=time.monotonic(),
+            id=session.id,
+            created_at=session.created_at,
+            data=copy.deepcopy(session.data),
+        )
+        with self._lock:
+            self._entries[session.token] = entry
+            self._entries.move_to_end(session.token)
+            self._tokens_by_id[session.id] = session.token
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._tokens_by_id.pop(evicted.id, None)
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._remove(token)
+
+    def invalidate_id(self, id: uuid.UUID) -> None:
+        with self._lock:
+            token = self._tokens_by_id.get(id)
+            if token is not None:
+                self._remove(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_id.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is not None:
+            self._tokens_by_id.pop(entry.id, None)
+
+
+session_cache = SessionCache(ttl_seconds=settings.session_cache_ttl_seconds, max_entries=settings.session_cache_max_entries)
+
+_PENDING_INVALIDATIONS_KEY = "session_cache_pending_invalidations"
+
+
+def invalidate_cached_session(db: Session, token: str | None = None, id: uuid.UUID | None = None) -> None:
+    """Drop a session from session_cache now and again after `db` commits.
+
+    Until the commit other requests still read the old row and may cache it again; the
+    second invalidation removes that copy."""
+    _invalidate(token=token, id=id)
+    db.info.setdefault(_PENDING_INVALIDATIONS_KEY, []).append((token, id))
+
+
+def _invalidate(token: str | None, id: uuid.UUID | None) -> None:
+    if token is not None:
+        session_cache.invalidate(token)
+    if id is not None:
+        session_cache.invalidate_id(id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_sessions(session):
+    for token, id in session.info.pop(_PENDING_INVALIDATIONS_KEY, ()):
+        _invalidate(token=token, id=id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending_invalidations(session):
+    session.info.pop(_PENDING_INVALIDATIONS_KEY, None)
+
+
 def generate_session_id():
     return "".join(secrets.choice(string.ascii_letters + string.digits) for x in range(64))
 
@@ -71,6 +187,7 @@ def load_session_for_update(db, token, skip_locked=True):
 # the refresh), so there is no stale writer that could downgrade a rotated single-use
 # token. Keep it that way if you ever store request-scoped state in the session.
 def save_session(db, id, token, data):
+    invalidate_cached_session(db=db, token=token)
     if id is None:
         session = SessionModel()
         session.token = token
@@ -85,15 +202,40 @@ def save_session(db, id, token, data):
 
 
 def delete_session(db, id=id):
+    invalidate_cached_session(db=db, id=id)
     db.execute(delete(SessionModel).where(SessionModel.id == id))
 
 
-def session_cleanup(db, max_age_seconds):
-    db.execute(
-        delete(SessionModel).where(
-            SessionModel.created_at <= dt_ago_naive(seconds=max_age_seconds),
-        ),
-    )
+def session_cleanup(db, max_age_seconds, batch_size=None):
+    """Delete sessions older than max_age_seconds.
+
+    Works in chunks and commits after each one, so a large backlog of expired sessions
+    does not hold locks on the sessions table for the whole sweep."""
+    batch_size = batch_size or settings.session_cleanup_batch_size
+    cutoff = dt_ago_naive(seconds=max_age_seconds)
+
+    while True:
+        ids = (
+            db.execute(
+                select(SessionModel.id).where(SessionModel.created_at <= cutoff).limit(batch_size),
+            )
+            .scalars()
+            .all()
+        )
+        if not ids:
+            break
+
+        db.execute(delete(SessionModel).where(SessionModel.id.in_(ids)))
+        db.commit()
+
+        if len(ids) < batch_size:
+            break
+
+
+@cron_task(task_name="session_cleanup", cron="*/15 * * * *")
+def cron_session_cleanup(db: Session):
+    session_cleanup(db=db, max_age_seconds=settings.session_max_age_seconds)
+    db.commit()
 
 
 class TrackChangesDict(dict):
@@ -117,7 +259,7 @@ class SessionMiddleware:
         self,
         app: ASGIApp,
         session_cookie: str = "sess",
-        server_max_age: typing.Optional[int] = 14 * 24 * 60 * 60,  # 14 days, in seconds
+        server_max_age: int = settings.session_max_age_seconds,
         path: str = "/",
         same_site: typing.Literal["lax", "strict", "none"] = "lax",
         https_only: bool = True,
@@ -141,15 +283,17 @@ class SessionMiddleware:
         if self.session_cookie in connection.cookies:
             data = connection.cookies[self.session_cookie]  # .encode("utf-8")
             try:
-                with get_db_contextmanager() as db:
-                    # cleanup sessions every 100 requests
-                    if random.randint(1, 100) == 50:
-                        session_cleanup(db=db, max_age_seconds=self.server_max_age)
-                    model = load_session(db=db, token=data)
-                    if model is not None and model.created_at < dt_ago_aware(
-                        seconds=self.server_max_age,
-                    ):
-                        model = None
+                # expired sessions are removed by the session_cleanup cron task
+                model = session_cache.get(data)
+                if model is None:
+                    with get_db_contextmanager() as db:
+                        model = load_session(db=db, token=data)
+                    if model is not None:
+                        session_cache.put(model)
+                if model is not None and model.created_at < dt_ago_aware(
+                    seconds=self.server_max_age,
+                ):
+                    model = None
 
                 if model is not None:
                     scope["session_id"] = model.id
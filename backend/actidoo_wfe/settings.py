@@ -67,6 +67,22 @@ class Settings(BaseSettings):
     oauth_bearer_client_secret: str = ""
     oauth_bearer_role_claim_paths: List[str] = ["resource_access.{client_id}.roles", "realm_access.roles", "roles", "groups", "scp", "scope"]
 
+    # Introspection results are cached per token (keyed by its hash) for at most this many seconds and never beyond the token's exp. 0 disables the cache.
+    oauth_bearer_introspection_cache_max_ttl_seconds: int = 60
+    # Tokens reported as inactive are remembered for this many seconds, so a client retrying with a bad token does not hit the IdP every time.
+    oauth_bearer_introspection_negative_cache_ttl_seconds: int = 10
+    oauth_bearer_introspection_cache_max_entries: int = 10000
+    # Connection pool of the shared HTTP client used for calls to the IdP
+    oauth_bearer_http_max_connections: int = 20
+    # Verify JWT access tokens locally (signature via the IdP's JWKS, issuer, audience, expiry) instead of calling the introspection endpoint.
+    # Opaque (non-JWT) tokens are still introspected.
+    oauth_bearer_local_jwt_validation: bool = False
+    # JWKS url and expected issuer for local validation. If empty, they are read from OAUTH_BEARER_TOKEN_ENDPOINT / OAUTH_BEARER_INTROSPECTION_ENDPOINT when one of them is an openid-configuration url.
+    oauth_bearer_jwks_uri: str = ""
+    oauth_bearer_issuer: str = ""
+    # Allowed clock skew in seconds when checking exp/nbf/iat of locally validated tokens
+    oauth_bearer_jwt_leeway_seconds: int = 30
+
     # Output Token Introspection in Auth Fallback View?
     auth_debug_token_introspection: bool = False
 
@@ -87,6 +103,20 @@ class Settings(BaseSettings):
     # Recommended value is lax
     session_same_site: str = "lax"
 
+    # Sessions older than this are rejected and removed by the session_cleanup cron task
+    session_max_age_seconds: int = 14 * 24 * 60 * 60
+
+    # Sessions loaded by the SessionMiddleware are kept in a process-local cache for this long.
+    # Writes through the middleware invalidate the entry; writes from other processes (e.g. a logout) become visible after at most this TTL. 0 disables the cache.
+    session_cache_ttl_seconds: int = 10
+    session_cache_max_entries: int = 10000
+
+    # Expired sessions are deleted in chunks of this size, committing after each chunk
+    session_cleanup_batch_size: int = 1000
+
+    # BFF requests write the WorkflowUser from the login claims only when the claims changed or the last sync is older than this. 0 syncs on every request.
+    user_sync_interval_seconds: int = 900
+
     ### Database Settings. Default settings apply to the mysql devcontainer, except the password, which remains in .env and does not get into the code
     db_driver: str = "mysql+pymysql"
     db_host: str = "mysql"
@@ -98,6 +128,47 @@ class Settings(BaseSettings):
     db_echo: bool = False
     db_ssl_ca: str = ""
 
+    ### Compression of JSON blobs (workflow instance state, task data, ...)
+
+    # Codec for newly written blobs: "zlib" or "zstd" (needs the zstandard package). Rows written with any codec stay readable.
+    blob_compression_codec: Literal["zlib", "zstd"] = "zlib"
+    blob_compression_zstd_level: int = 3
+    # Directory of trained zstd dictionaries (<dictionary id>.zdict, see `cli train-zstd-dictionary`). Keep retired dictionaries there, rows written with them still need them.
+    blob_compression_zstd_dictionary_dir: str = ""
+    # Dictionary for newly written zstd blobs; 0 = no dictionary
+    blob_compression_zstd_dictionary_id: int = 0
+
+    ### Workflow instance storage
+
+    # Store only a JSON patch per change on top of a base snapshot instead of rewriting the whole serialized workflow.
+    # Turning it off folds the deltas of an instance in on its next write; before a downgrade, fold all with `cli compact-workflow-snapshots`.
+    workflow_instance_delta_snapshots: bool = False
+    # The chain is folded into a new base snapshot once it is longer than this ...
+    workflow_instance_delta_max_count: int = 50
+    # ... or bigger than this many (uncompressed) bytes
+    workflow_instance_delta_max_size: int = 1_000_000
+    # How often timers and messages are retried when their workflow instance was changed concurrently
+    workflow_instance_conflict_retries: int = 3
+    # Submits and assignments lock their instance up front. With nowait, a request that finds the lock taken
+    # fails at once (HTTP 409, retryable) instead of waiting for the other request to finish.
+    workflow_instance_lock_nowait: bool = False
+
+    ### Workflow engine
+
+    # Upper bound of engine tasks (scripts, service tasks, gateways, ...) one run may execute. A run hitting it
+    # marks the next task erroneous, so a looping process shows up in the erroneous tasks instead of blocking a worker.
+    workflow_engine_max_steps: int = 10_000
+    # Runs taking longer are logged with their timing breakdown (always logged at debug level)
+    workflow_engine_slow_run_seconds: float = 5.0
+
+    # Time each service task call, with its database statements and outbound I/O (mails, attachment storage, connectors).
+    # The numbers are summed per workflow and service function and shown to admins (bff admin service_task_statistics).
+    service_task_profiling: bool = False
+    # Profiled calls taking longer are logged with their numbers
+    service_task_slow_log_seconds: float = 2.0
+    # If set, every profiled call also runs under cProfile and its stats are written to this directory (<workflow>.<service>.<timestamp>.prof)
+    service_task_cprofile_dir: str = ""
+
     ### Attachment Storage
     storage_mode: Literal["LOCAL", "AZURE_BLOB", "AZURE_BLOB_TENANT"] = "LOCAL"
     storage_local_upload_path: str = str((pathlib.Path(__file__).parent.parent / "upload_dir").absolute())
@@ -117,6 +188,13 @@ class Settings(BaseSettings):
     storage_azure_tenant_id: str | None = None
     storage_azure_client_id: str | None = None
 
+    # Attachments no longer linked to a task, workflow instance or data-model row are removed
+    # by the attachment_gc cron task: batch_size rows per transaction, their stored files
+    # deleted by up to delete_parallelism threads.
+    attachment_gc_cron: str = "*/15 * * * *"
+    attachment_gc_batch_size: int = 500
+    attachment_gc_delete_parallelism: int = 8
+
     ### Email Settings
     email_transport: Literal["GRAPH", "SMTP"] = "GRAPH"
 
@@ -165,10 +243,18 @@ Workflow Engine
     # because if an env variable is missing by accident in a deployment, users could see all workflows.
     # ["__ALL__"] can be taken to configure all at once. The order in this list does not matter.
     workflows: list[str] = [""]
+    # Workflow directories are indexed at startup and rescanned this often for added, removed or changed
+    # workflows (compared by file size and mtime), so deployed workflow files take effect without a restart. 0 disables the rescan.
+    workflow_provider_rescan_seconds: float = 10.0
 
     # Connector instances — populated via env vars with nested delimiter '__'
     # e.g. CONNECTORS__JIRA__ABC__URL=https://...
     connectors: dict[str, dict[str, dict]] = {}
+    # Pooled connector clients are health-checked when handed out, at most this often per instance
+    connector_health_check_interval_seconds: int = 60
+    # Connection limits of the pooled clients created with connectors.http_client() / connectors.sql_engine()
+    connector_http_max_connections: int = 20
+    connector_sql_pool_size: int = 5
 
     # Data Model API pagination defaults
     data_model_api_page_size: int = 50
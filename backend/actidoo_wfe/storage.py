@@ -1,8 +1,10 @@
 # SPDX-License-Identifier: Apache-2.0
 # Copyright (c) 2025 ActiDoo GmbH
 
+import logging
 import os
 import pathlib
+from concurrent.futures import ThreadPoolExecutor
 
 from libcloud.storage.drivers.azure_blobs import AzureBlobsStorageDriver
 from libcloud.storage.drivers.local import LocalStorageDriver
@@ -10,6 +12,8 @@ from sqlalchemy_file.storage import StorageManager
 
 from actidoo_wfe.settings import Settings
 
+log = logging.getLogger(__name__)
+
 
 class UnsupportedStorageException(Exception):
     pass
@@ -85,3 +89,19 @@ def get_file_stream(file_id):
 def get_file_content(file_id):
     iter = get_file_stream(file_id)
     return b"".join(iter)
+
+
+def _delete_file(path: str):
+    try:
+        StorageManager.delete_file(path)
+    except Exception:
+        # The row is already gone; a file that cannot be deleted is only wasted space
+        log.exception(f"Could not delete stored file {path}")
+
+
+def delete_files(paths: list[str], parallelism: int):
+    """Delete the stored files ``paths`` (``storage_name/file_id``) with up to ``parallelism`` threads."""
+    if not paths:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(paths))), thread_name_prefix="delete_files") as executor:
+        list(executor.map(_delete_file, paths))
@@ -0,0 +1,80 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+import json
+import zlib
+
+import pytest
+
+from actidoo_wfe.database import ZlibJSONBlob
+from actidoo_wfe.helpers import compression
+from actidoo_wfe.settings import settings
+
+VALUE = {"tasks": [{"name": f"Task_{i}", "data": {"firstname": "Erika", "lastname": "Mustermann"}} for i in range(50)]}
+
+
+def test_zlib_blobs_are_written_without_header(monkeypatch):
+    monkeypatch.setattr(settings, "blob_compression_codec", "zlib")
+    stored = ZlibJSONBlob().process_bind_param(VALUE, None)
+
+    assert json.loads(zlib.decompress(stored)) == VALUE
+    assert ZlibJSONBlob().process_result_value(stored, None) == VALUE
+
+
+def test_unknown_codec_id_is_rejected():
+    with pytest.raises(ValueError):
+        compression.decompress_blob(compression.HEADER_MAGIC + bytes([255]) + b"payload", 1024)
+
+
+def test_size_limit_is_enforced():
+    data = zlib.compress(b"0" * 10_000)
+
+    assert compression.decompress_blob(data, 10_000) == b"0" * 10_000
+    with pytest.raises(ValueError):
+        compression.decompress_blob(data, 9_999)
+
+
+def test_uncompressed_data_is_not_taken_for_a_blob():
+    with pytest.raises(zlib.error):
+        compression.decompress_blob(json.dumps(VALUE).encode("utf-8"), 10_000)
+
+
+@pytest.fixture
+def zstd(monkeypatch, tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    monkeypatch.setattr(settings, "blob_compression_codec", "zstd")
+    monkeypatch.setattr(settings, "blob_compression_zstd_dictionary_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "blob_compression_zstd_dictionary_id", 0)
+    monkeypatch.setattr(compression, "_codecs_by_id", dict(compression._codecs_by_id))
+    monkeypatch.setattr(compression, "_codecs_by_name", dict(compression._codecs_by_name))
+    compression.register_blob_codec(compression.ZstdCodec())
+    return zstandard
+
+
+def test_zstd_round_trip_and_mixed_rows(zstd, monkeypatch):
+    column = ZlibJSONBlob()
+    zstd_stored = column.process_bind_param(VALUE, None)
+
+    monkeypatch.setattr(settings, "blob_compression_codec", "zlib")
+    zlib_stored = column.process_bind_param(VALUE, None)
+
+    assert zstd_stored.startswith(compression.HEADER_MAGIC + bytes([compression.ZstdCodec.codec_id]))
+    assert column.process_result_value(zstd_stored, None) == VALUE
+    assert column.process_result_value(zlib_stored, None) == VALUE
+
+
+def test_zstd_with_trained_dictionary(zstd, monkeypatch, tmp_path):
+    samples = [json.dumps({"id": i, "tasks": [{"name": f"Task_{j}", "state": j % 7} for j in range(i % 20)]}).encode("utf-8") for i in range(500)]
+    dictionary = zstd.train_dictionary(4096, samples)
+    (tmp_path / f"{dictionary.dict_id()}.zdict").write_bytes(dictionary.as_bytes())
+
+    monkeypatch.setattr(settings, "blob_compression_zstd_dictionary_id", dictionary.dict_id())
+    stored = compression.compress_blob(samples[1])
+
+    # Reading with a fresh codec loads the dictionary from the frame's dictionary id
+    compression.register_blob_codec(compression.ZstdCodec())
+    monkeypatch.setattr(settings, "blob_compression_zstd_dictionary_id", 0)
+    assert compression.decompress_blob(stored, 10_000) == samples[1]
+
+    with pytest.raises(ValueError):
+        compression.decompress_blob(stored, len(samples[1]) - 1)
@@ -4,6 +4,7 @@
 """Tests for the Connector Registry (T1 from migration test plan)."""
 
 import contextlib
+from typing import ClassVar
 from unittest.mock import MagicMock
 
 import pytest
@@ -164,6 +165,108 @@ class TestGetConnector:
             get_connector("dummy", "inst1")
 
 
+class CountingConfig(DummyConfig):
+    validations: ClassVar[int] = 0
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        type(self).validations += 1
+
+
+class TestConnectorInstances:
+    @pytest.fixture
+    def fake_settings(self, monkeypatch):
+        fake_settings = MagicMock()
+        fake_settings.connectors = {"dummy": {"inst1": {"url": "https://example.com"}}}
+        fake_settings.connector_health_check_interval_seconds = 0
+        monkeypatch.setattr("actidoo_wfe.settings.settings", fake_settings)
+        CountingConfig.validations = 0
+        return fake_settings
+
+    def test_config_is_validated_once_until_it_changes(self, fake_settings):
+        connector_registry.register(ConnectorType(name="dummy", config_schema=CountingConfig, factory=dummy_factory))
+
+        for _ in range(3):
+            with get_connector("dummy", "inst1") as obj:
+                assert obj["url"] == "https://example.com"
+        assert CountingConfig.validations == 1
+
+        fake_settings.connectors = {"dummy": {"inst1": {"url": "https://changed.example.com"}}}
+        with get_connector("dummy", "inst1") as obj:
+            assert obj["url"] == "https://changed.example.com"
+        assert CountingConfig.validations == 2
+
+    def test_pooled_client_is_shared_and_replaced_when_unhealthy(self, fake_settings):
+        closed = []
+        healthy = {"value": True}
+
+        @contextlib.contextmanager
+        def pooled_factory(config: DummyConfig, client):
+            yield client
+
+        connector_registry.register(
+            ConnectorType(
+                name="dummy",
+                config_schema=DummyConfig,
+                factory=pooled_factory,
+                client_factory=lambda config: object(),
+                health_check=lambda client: healthy["value"],
+                close_client=closed.append,
+            )
+        )
+
+        with get_connector("dummy", "inst1") as first, get_connector("dummy", "inst1") as second:
+            assert first is second
+
+        healthy["value"] = False
+        with get_connector("dummy", "inst1") as replaced:
+            assert replaced is not first
+        assert closed == [first]
+
+        connector_registry.clear()
+        assert closed == [first, replaced]
+
+    def _register_pooled(self, closed, health_check=None):
+        @contextlib.contextmanager
+        def pooled_factory(config: DummyConfig, client):
+            yield client
+
+        connector_registry.register(
+            ConnectorType(
+                name="dummy",
+                config_schema=DummyConfig,
+                factory=pooled_factory,
+                client_factory=lambda config: object(),
+                health_check=health_check,
+                close_client=closed.append,
+            )
+        )
+
+    def test_replaced_client_is_closed_when_its_last_handle_is_released(self, fake_settings):
+        closed = []
+        self._register_pooled(closed)
+
+        with get_connector("dummy", "inst1") as old_client:
+            fake_settings.connectors = {"dummy": {"inst1": {"url": "https://changed.example.com"}}}
+            with get_connector("dummy", "inst1") as new_client:
+                assert new_client is not old_client
+            assert closed == []
+        assert closed == [old_client]
+
+    def test_health_check_runs_without_the_registry_lock(self, fake_settings):
+        lock_held = []
+
+        def health_check(client):
+            lock_held.append(connector_registry._instances_lock.locked())
+            return True
+
+        self._register_pooled([], health_check=health_check)
+        for _ in range(2):
+            with get_connector("dummy", "inst1"):
+                pass
+        assert lock_held == [False]
+
+
 # ---------------------------------------------------------------------------
 # Unit tests — validate_configured_connectors
 # ---------------------------------------------------------------------------
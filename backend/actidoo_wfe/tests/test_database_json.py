@@ -0,0 +1,127 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+import datetime
+import decimal
+import json
+import math
+import os
+import time
+import uuid
+import zlib
+
+import pytest
+
+from actidoo_wfe.database import JSONBlob, ZlibJSONBlob, dump_json, load_json
+
+SAMPLES = [
+    {},
+    [],
+    {"a": 1, "b": [1.5, -2, True, False, None], "nested": {"deep": {"deeper": ["x", {"y": "z"}]}}},
+    {"umlauts": "Grüße aus Köln", "emoji": "\U0001f600", "escapes": 'quote " backslash \\ newline \n tab \t'},
+    {"float": 0.1 + 0.2, "small": 1e-300, "large": 1.7976931348623157e308, "int64": 2**63 - 1, "negative": -(2**63)},
+    {"datauri": "data:image/png;name=a.png;base64," + "A" * 5000},
+]
+
+
+def _workflow_instance_like(tasks: int) -> dict:
+    """Roughly the shape and size of a serialized workflow instance with ``tasks`` tasks."""
+    return {
+        "serializer_version": "1.4",
+        "spec": {"name": "Example", "task_specs": {f"Task_{i}": {"name": f"Task_{i}", "inputs": [f"Task_{i - 1}"], "outputs": [f"Task_{i + 1}"], "manual": False, "lane": "Lane_1"} for i in range(tasks)}},
+        "tasks": {
+            str(uuid.UUID(int=i)): {
+                "id": str(uuid.UUID(int=i)),
+                "parent": str(uuid.UUID(int=i - 1)) if i else None,
+                "children": [str(uuid.UUID(int=i + 1))],
+                "state": 64,
+                "task_spec": f"Task_{i}",
+                "last_state_change": 1760000000.123 + i,
+                "data": {"firstname": "Erika", "lastname": "Mustermann", "amount": 1234.5, "positions": [{"text": f"position {j}", "price": j * 1.25} for j in range(10)]},
+                "internal_data": {},
+            }
+            for i in range(tasks)
+        },
+        "data": {"approved": True, "comment": "Looks good to me"},
+    }
+
+
+@pytest.mark.parametrize("value", SAMPLES + [_workflow_instance_like(20)])
+def test_round_trip(value):
+    json_blob = JSONBlob()
+    zlib_blob = ZlibJSONBlob()
+
+    assert json_blob.process_result_value(json_blob.process_bind_param(value, None), None) == value
+    assert zlib_blob.process_result_value(zlib_blob.process_bind_param(value, None), None) == value
+
+
+@pytest.mark.parametrize("value", SAMPLES + [_workflow_instance_like(20)])
+def test_reads_data_written_by_stdlib_json(value):
+    """Rows stored before the switch to orjson (plain, compressed and uncompressed) load unchanged."""
+    stored = json.dumps(value)
+
+    assert JSONBlob().process_result_value(stored, None) == value
+    assert ZlibJSONBlob().process_result_value(zlib.compress(stored.encode("utf-8")), None) == value
+    assert ZlibJSONBlob().process_result_value(stored.encode("utf-8"), None) == value
+    assert ZlibJSONBlob().process_result_value(stored, None) == value
+
+
+@pytest.mark.parametrize("value", SAMPLES + [_workflow_instance_like(20)])
+def test_written_data_is_readable_by_stdlib_json(value):
+    assert json.loads(dump_json(value)) == value
+
+
+def test_stored_byte_format():
+    """Compact and not ASCII-escaped - not byte-identical to the stdlib encoder, which writes spaces after separators and escapes non-ASCII."""
+    value = {"a": 1, "b": [1.5, None, True], "umlaut": "Grüße"}
+
+    assert dump_json(value) == '{"a":1,"b":[1.5,null,true],"umlaut":"Grüße"}'.encode("utf-8")
+    assert ZlibJSONBlob().process_result_value(ZlibJSONBlob().process_bind_param(value, None), None) == value
+    assert JSONBlob().process_bind_param(value, None) == '{"a":1,"b":[1.5,null,true],"umlaut":"Grüße"}'
+
+
+def test_non_finite_floats_are_written_like_the_stdlib_encoder():
+    value = {"nan": float("nan"), "inf": float("inf"), "nested": [{"-inf": float("-inf")}], "none": None}
+
+    assert dump_json(value) == json.dumps(value).encode("utf-8")
+    loaded = load_json(dump_json(value))
+    assert math.isnan(loaded["nan"])
+    assert (loaded["inf"], loaded["nested"], loaded["none"]) == (float("inf"), [{"-inf": float("-inf")}], None)
+    assert math.isnan(ZlibJSONBlob().process_result_value(ZlibJSONBlob().process_bind_param(value, None), None)["nan"])
+
+
+def test_types_the_stdlib_encoder_handles_differently():
+    assert load_json(dump_json({1: "int key", None: "none key"})) == {"1": "int key", "null": "none key"}
+    assert load_json(dump_json({"big": 2**70})) == {"big": 2**70}
+    assert load_json(dump_json({"surrogate": "\ud800"})) == {"surrogate": "\ud800"}
+    assert load_json(dump_json({"price": decimal.Decimal("12.50"), "count": decimal.Decimal("3")})) == {"price": 12.5, "count": 3}
+    assert load_json(dump_json({"at": datetime.datetime(2026, 1, 2, 3, 4, 5), "on": datetime.date(2026, 1, 2)})) == {"at": "2026-01-02T03:04:05", "on": "2026-01-02"}
+    assert math.isnan(load_json(json.dumps({"nan": float("nan")}))["nan"])
+
+    with pytest.raises(TypeError):
+        dump_json({"unsupported": object()})
+
+
+@pytest.mark.skipif(not os.environ.get("WFE_BENCHMARK"), reason="micro-benchmark, run with WFE_BENCHMARK=1 pytest -s")
+@pytest.mark.parametrize("tasks", [10, 100, 1000])
+def test_benchmark_json_codecs(tasks):
+    value = _workflow_instance_like(tasks)
+    stored = zlib.compress(json.dumps(value).encode("utf-8"))
+    rounds = max(1, 2000 // tasks)
+
+    def measure(dumps, loads) -> float:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            loads(dumps(value))
+        return (time.perf_counter() - start) / rounds
+
+    stdlib = measure(lambda v: json.dumps(v).encode("utf-8"), json.loads)
+    orjson_codec = measure(dump_json, load_json)
+    column = ZlibJSONBlob()
+    zlib_column = measure(lambda v: column.process_bind_param(v, None), lambda v: column.process_result_value(v, None))
+
+    print(
+        f"\n{tasks} tasks, {len(stored)} bytes compressed: "
+        f"stdlib {stdlib * 1000:.2f} ms, orjson {orjson_codec * 1000:.2f} ms ({stdlib / orjson_codec:.1f}x), "
+        f"ZlibJSONBlob round trip {zlib_column * 1000:.2f} ms"
+    )
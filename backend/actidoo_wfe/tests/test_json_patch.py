@@ -0,0 +1,51 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+import copy
+
+import pytest
+
+from actidoo_wfe.helpers.json_patch import apply_patch, make_patch
+
+OLD = {
+    "tasks": {
+        "a": {"state": 16, "data": {"x": 1, "list": [1, 2]}, "children": ["b"]},
+        "b": {"state": 4, "data": {}},
+    },
+    "path/with~special": {"key": "value"},
+    "flag": True,
+}
+
+
+@pytest.mark.parametrize(
+    "new",
+    [
+        OLD,
+        {**OLD, "flag": False},
+        {**OLD, "tasks": {"a": {**OLD["tasks"]["a"], "data": {"x": 2, "list": [1, 2, 3]}}, "c": {"state": 1}}},
+        {**OLD, "path/with~special": {"key": "changed", "new": None}},
+        {"completely": "different"},
+    ],
+)
+def test_patch_round_trip(new):
+    patch = make_patch(OLD, new)
+
+    assert apply_patch(copy.deepcopy(OLD), patch) == new
+
+
+def test_patch_only_contains_the_changes():
+    new = copy.deepcopy(OLD)
+    new["tasks"]["a"]["data"]["x"] = 2
+    del new["tasks"]["b"]
+
+    assert make_patch(OLD, OLD) == []
+    # Equal, but serialized differently
+    assert make_patch({"flag": True}, {"flag": 1}) == [{"op": "replace", "path": "/flag", "value": 1}]
+    assert make_patch(OLD, new) == [
+        {"op": "replace", "path": "/tasks/a/data/x", "value": 2},
+        {"op": "remove", "path": "/tasks/b"},
+    ]
+
+
+def test_replacing_the_root():
+    assert apply_patch({"a": 1}, make_patch({"a": 1}, [1, 2])) == [1, 2]
@@ -0,0 +1,245 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from authlib.jose import JsonWebKey, JsonWebToken
+from fastapi import HTTPException
+
+from actidoo_wfe.helpers import oauth_bearer
+from actidoo_wfe.settings import settings
+
+CLIENT_ID = "wfe-api"
+
+
+def _build_introspection_stub(tokens: dict[str, dict]):
+    """A local introspection endpoint: known tokens are active, everything else is not."""
+    calls: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        token = dict(httpx.QueryParams(request.content.decode("utf-8")))["token"]
+        calls.append(token)
+        await asyncio.sleep(0.01)
+        claims = tokens.get(token)
+        if claims is None:
+            return httpx.Response(200, json={"active": False})
+        return httpx.Response(200, json={"active": True, **claims})
+
+    return httpx.MockTransport(handler), calls
+
+
+@pytest.fixture
+def introspection_stub(monkeypatch):
+    now = int(time.time())
+    tokens = {
+        "valid-token": {"sub": "svc-1", "aud": CLIENT_ID, "exp": now + 3600, "realm_access": {"roles": ["wf-api"]}},
+        "short-lived-token": {"sub": "svc-2", "aud": CLIENT_ID, "exp": now + 1},
+    }
+    transport, calls = _build_introspection_stub(tokens)
+
+    monkeypatch.setattr(settings, "oauth_bearer_introspection_endpoint", "http://idp.test/introspect")
+    monkeypatch.setattr(settings, "oauth_bearer_client_id", CLIENT_ID)
+    monkeypatch.setattr(settings, "oauth_bearer_introspection_cache_max_ttl_seconds", 60)
+    monkeypatch.setattr(settings, "oauth_bearer_introspection_negative_cache_ttl_seconds", 10)
+
+    clients: list[httpx.AsyncClient] = []
+
+    def _get_http_client():
+        if not clients:
+            clients.append(httpx.AsyncClient(transport=transport))
+        return clients[0]
+
+    monkeypatch.setattr(oauth_bearer, "get_http_client", _get_http_client)
+    oauth_bearer.introspection_cache.clear()
+
+    yield calls
+
+    oauth_bearer.introspection_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_warm_token_does_not_call_idp(introspection_stub):
+    first = await oauth_bearer.oauth_bearer_validate_token(token="valid-token")
+    second = await oauth_bearer.oauth_bearer_validate_token(token="valid-token")
+
+    assert first.sub == second.sub == "svc-1"
+    assert first.roles == ["wf-api"]
+    assert introspection_stub == ["valid-token"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_introspection(introspection_stub):
+    results = await asyncio.gather(*[oauth_bearer.oauth_bearer_validate_token(token="valid-token") for _ in range(20)])
+
+    assert {r.sub for r in results} == {"svc-1"}
+    assert introspection_stub == ["valid-token"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_negatively_cached(introspection_stub):
+    for _ in range(3):
+        with pytest.raises(HTTPException) as error:
+            await oauth_bearer.oauth_bearer_validate_token(token="unknown-token")
+        assert error.value.status_code == 401
+
+    assert introspection_stub == ["unknown-token"]
+
+
+@pytest.mark.asyncio
+async def test_cache_entry_does_not_outlive_token_exp(introspection_stub):
+    await oauth_bearer.oauth_bearer_validate_token(token="short-lived-token")
+    entry = oauth_bearer.introspection_cache.get(oauth_bearer._token_cache_key("short-lived-token"), time.time())
+
+    assert entry is not None
+    assert entry.expires_at <= entry.data["exp"]
+
+
+@pytest.mark.asyncio
+async def test_cache_can_be_disabled(introspection_stub, monkeypatch):
+    monkeypatch.setattr(settings, "oauth_bearer_introspection_cache_max_ttl_seconds", 0)
+
+    await oauth_bearer.oauth_bearer_validate_token(token="valid-token")
+    await oauth_bearer.oauth_bearer_validate_token(token="valid-token")
+
+    assert introspection_stub == ["valid-token", "valid-token"]
+
+
+def test_introspection_cache_is_bounded():
+    cache = oauth_bearer.IntrospectionCache(max_entries=2)
+    now = time.time()
+    cache.put("a", {"sub": "a"}, now + 60)
+    cache.put("b", {"sub": "b"}, now + 60)
+    cache.get("a", now)
+    cache.put("c", {"sub": "c"}, now + 60)
+
+    assert len(cache) == 2
+    assert cache.get("b", now) is None
+    assert cache.get("a", now) is not None
+    assert cache.get("a", now + 61) is None
+
+
+ISSUER = "http://idp.test/realms/wfe"
+
+
+def _rsa_key(kid: str):
+    return JsonWebKey.generate_key("RSA", 2048, is_private=True, options={"kid": kid})
+
+
+def _sign(key, claims: dict) -> str:
+    header = {"alg": "RS256", "kid": key.as_dict()["kid"]}
+    return JsonWebToken(["RS256"]).encode(header, claims, key).decode("utf-8")
+
+
+@pytest.fixture
+def jwks_stub(monkeypatch):
+    """An IdP publishing ``published`` keys at its JWKS url and answering introspection for ``opaque-token``."""
+    now = int(time.time())
+    published = [_rsa_key("key-1")]
+    calls: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path == "/certs":
+            return httpx.Response(200, json={"keys": [key.as_dict(is_private=False) for key in published]})
+        return httpx.Response(200, json={"active": True, "sub": "svc-opaque", "aud": CLIENT_ID, "exp": now + 3600})
+
+    monkeypatch.setattr(settings, "oauth_bearer_local_jwt_validation", True)
+    monkeypatch.setattr(settings, "oauth_bearer_jwks_uri", "http://idp.test/certs")
+    monkeypatch.setattr(settings, "oauth_bearer_issuer", ISSUER)
+    monkeypatch.setattr(settings, "oauth_bearer_introspection_endpoint", "http://idp.test/introspect")
+    monkeypatch.setattr(settings, "oauth_bearer_client_id", CLIENT_ID)
+
+    clients: list[httpx.AsyncClient] = []
+
+    def _get_http_client():
+        if not clients:
+            clients.append(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        return clients[0]
+
+    monkeypatch.setattr(oauth_bearer, "get_http_client", _get_http_client)
+    oauth_bearer.jwks_cache.clear()
+    oauth_bearer.introspection_cache.clear()
+
+    yield published, calls
+
+    oauth_bearer.jwks_cache.clear()
+    oauth_bearer.introspection_cache.clear()
+
+
+def _claims(**overrides):
+    now = int(time.time())
+    claims = {"iss": ISSUER, "sub": "svc-1", "aud": CLIENT_ID, "exp": now + 3600, "iat": now, "realm_access": {"roles": ["wf-api"]}}
+    claims.update(overrides)
+    return claims
+
+
+@pytest.mark.asyncio
+async def test_jwt_is_validated_locally(jwks_stub):
+    published, calls = jwks_stub
+    token = _sign(published[0], _claims())
+
+    first = await oauth_bearer.oauth_bearer_validate_token(token=token)
+    second = await oauth_bearer.oauth_bearer_validate_token(token=_sign(published[0], _claims(sub="svc-2")))
+
+    assert first.sub == "svc-1"
+    assert first.roles == ["wf-api"]
+    assert second.sub == "svc-2"
+    assert calls == ["/certs"]
+
+
+@pytest.mark.asyncio
+async def test_unknown_kid_refreshes_jwks(jwks_stub, monkeypatch):
+    published, calls = jwks_stub
+    await oauth_bearer.oauth_bearer_validate_token(token=_sign(published[0], _claims()))
+
+    rotated = _rsa_key("key-2")
+    published.append(rotated)
+    monkeypatch.setattr(oauth_bearer, "_JWKS_MIN_REFRESH_SECONDS", 0)
+
+    token_information = await oauth_bearer.oauth_bearer_validate_token(token=_sign(rotated, _claims()))
+
+    assert token_information.sub == "svc-1"
+    assert calls == ["/certs", "/certs"]
+
+
+@pytest.mark.asyncio
+async def test_unknown_kid_refresh_is_rate_limited(jwks_stub):
+    published, calls = jwks_stub
+    await oauth_bearer.oauth_bearer_validate_token(token=_sign(published[0], _claims()))
+
+    for _ in range(3):
+        with pytest.raises(HTTPException) as error:
+            await oauth_bearer.oauth_bearer_validate_token(token=_sign(_rsa_key("forged"), _claims()))
+        assert error.value.status_code == 401
+
+    assert calls == ["/certs"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"iss": "http://evil.test"},
+        {"aud": "other-client"},
+        {"exp": int(time.time()) - 3600},
+    ],
+)
+async def test_invalid_jwt_is_rejected(jwks_stub, overrides):
+    published, _ = jwks_stub
+
+    with pytest.raises(HTTPException) as error:
+        await oauth_bearer.oauth_bearer_validate_token(token=_sign(published[0], _claims(**overrides)))
+    assert error.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_opaque_token_falls_back_to_introspection(jwks_stub):
+    _, calls = jwks_stub
+
+    token_information = await oauth_bearer.oauth_bearer_validate_token(token="opaque-token")
+
+    assert token_information.sub == "svc-opaque"
+    assert calls == ["/introspect"]
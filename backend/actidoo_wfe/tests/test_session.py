@@ -0,0 +1,99 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+import uuid
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from actidoo_wfe import session as session_module
+from actidoo_wfe.database import SessionLocal
+from actidoo_wfe.helpers.time import dt_ago_naive, dt_now_aware
+from actidoo_wfe.session import SessionCache, SessionModel, invalidate_cached_session, session_cleanup
+
+
+def _session(token: str, data: dict | None = None) -> SessionModel:
+    return SessionModel(id=uuid.uuid4(), token=token, created_at=dt_now_aware(), data=data or {"user": token})
+
+
+def test_session_cache_returns_copies():
+    cache = SessionCache(ttl_seconds=60, max_entries=10)
+    cache.put(_session("a", {"token": {"access_token": "x"}}))
+
+    first = cache.get("a")
+    first.data["token"]["access_token"] = "changed"
+
+    assert cache.get("a").data == {"token": {"access_token": "x"}}
+
+
+def test_session_cache_invalidation():
+    cache = SessionCache(ttl_seconds=60, max_entries=10)
+    a = _session("a")
+    cache.put(a)
+    cache.put(_session("b"))
+
+    cache.invalidate("b")
+    assert cache.get("b") is None
+
+    cache.invalidate_id(a.id)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_session_cache_is_bounded_and_can_be_disabled():
+    cache = SessionCache(ttl_seconds=60, max_entries=2)
+    cache.put(_session("a"))
+    cache.put(_session("b"))
+    cache.get("a")
+    cache.put(_session("c"))
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    disabled = SessionCache(ttl_seconds=0, max_entries=2)
+    disabled.put(_session("a"))
+    assert disabled.get("a") is None
+
+
+def test_invalidate_cached_session_invalidates_again_after_commit(monkeypatch):
+    cache = SessionCache(ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(session_module, "session_cache", cache)
+    a = _session("a")
+    b = _session("b")
+    cache.put(a)
+    cache.put(b)
+
+    db = Session()
+    invalidate_cached_session(db=db, token="a")
+    invalidate_cached_session(db=db, id=b.id)
+    assert len(cache) == 0
+
+    # a concurrent request still reads the old rows before the commit and caches them again
+    cache.put(a)
+    cache.put(b)
+    db.commit()
+    assert len(cache) == 0
+
+    db.begin()
+    invalidate_cached_session(db=db, token="a")
+    cache.put(a)
+    db.rollback()
+    assert cache.get("a") is not None
+    db.commit()
+    assert cache.get("a") is not None
+
+
+def test_session_cleanup_deletes_in_chunks(db_engine_ctx):
+    with db_engine_ctx():
+        db = SessionLocal()
+        expired = dt_ago_naive(days=30)
+        for i in range(5):
+            db.add(SessionModel(token=f"expired-{i}", created_at=expired, data={}))
+        db.add(SessionModel(token="fresh", data={}))
+        db.commit()
+
+        session_cleanup(db=db, max_age_seconds=24 * 60 * 60, batch_size=2)
+
+        assert db.execute(select(func.count()).select_from(SessionModel)).scalar() == 1
+        assert db.execute(select(SessionModel.token)).scalar() == "fresh"
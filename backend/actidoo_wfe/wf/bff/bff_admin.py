@@ -13,6 +13,7 @@ import actidoo_wfe.wf.service_application as service_application
 from actidoo_wfe.database import get_db
 from actidoo_wfe.helpers.http import streaming_response_with_filecontent
 from actidoo_wfe.helpers.schema import PaginatedDataSchema
+from actidoo_wfe.settings import settings
 from actidoo_wfe.wf import views
 from actidoo_wfe.wf.bff.bff_admin_schema import (
     AssignUserRequest,
@@ -23,7 +24,9 @@ from actidoo_wfe.wf.bff.bff_admin_schema import (
     GetAllTasksResponse,
     GetAllWorkflowInstancesResponse,
     GetAllUsersResponse,
+    GetServiceTaskStatisticsResponse,
     GetSingleTaskResponse,
+    GetStatisticsInformationRequest,
     GetSystemInformationResponse,
     GetUserDetailRequest,
     GetUserDetailResponse,
@@ -31,6 +34,7 @@ from actidoo_wfe.wf.bff.bff_admin_schema import (
     SearchUsersRequest,
     SearchUsersResponse,
     SearchUsersResponseItem,
+    ServiceTaskStatisticsResponseItem,
     SetUserDelegationsRequest,
     UnassignUserRequest,
 )
@@ -131,12 +135,25 @@ def get_all_tasks(
 @router.post("/statistics_information", name="bff_admin_get_statistics_information")
 def get_statistic_information(
     db: Annotated[Session, Depends(get_db)],
+    req_data: Annotated[GetStatisticsInformationRequest | None, Body()] = None,
 ) -> ReducedWorkflowInstanceResponse:
     """
     Used by the Frontend Graph and similar to "all_workflow_instances",
     but without the function get_paginated_data() in `views.py`,
     because this caused high loading times, which were unacceptable for the Graph.
+
+    When a ``bucket`` (day/week/month) is given, the completed instances are counted
+    per workflow and bucket in the database and only the aggregates are returned, so
+    the response size is bounded by the number of buckets instead of instances.
     """
+    if req_data is not None and req_data.bucket is not None:
+        return service_application.admin_get_statistics_graph_buckets(
+            db=db,
+            bucket=req_data.bucket,
+            date_from=req_data.date_from,
+            date_to=req_data.date_to,
+        )
+
     result = service_application.admin_get_statistics_graph_timestamps(db=db)
     return result
 
@@ -453,6 +470,21 @@ def get_system_information() -> GetSystemInformationResponse:
     return resp
 
 
+@router.get("/service_task_statistics", name="bff_admin_get_service_task_statistics")
+def get_service_task_statistics(
+    db: Annotated[Session, Depends(get_db)],
+    user: Annotated[WorkflowUser, Depends(get_user)],
+) -> GetServiceTaskStatisticsResponse:
+    """Time, database statements and outbound I/O of the service task calls since this process started.
+
+    Only collected with SERVICE_TASK_PROFILING enabled; other processes (workers) have their own numbers."""
+    statistics = service_application.admin_get_service_task_statistics(db=db, admin_user_id=user.id)
+    return GetServiceTaskStatisticsResponse(
+        profiling_enabled=settings.service_task_profiling,
+        items=[ServiceTaskStatisticsResponseItem.model_validate(entry) for entry in statistics],
+    )
+
+
 @router.get("/get_task_states_per_workflow", name="bff_admin_get_task_states_per_workflow")
 def get_task_states_per_workflow(
     db: Annotated[Session, Depends(get_db)],
@@ -8,6 +8,7 @@ from typing import Optional
 from pydantic import BaseModel, ConfigDict, Field
 
 from actidoo_wfe.helpers.schema import PaginatedDataSchema
+from actidoo_wfe.wf.types import StatisticsBucketSize
 
 
 class InlineUserResponse(BaseModel):
@@ -154,6 +155,16 @@ class UnassignUserRequest(BaseModel):
 #    model_config = ConfigDict(from_attributes=True)
 
 
+class GetStatisticsInformationRequest(BaseModel):
+    """Without a ``bucket`` the endpoint returns the raw list of completed instances (ITEMS);
+    with one, it returns per-workflow completion counts aggregated per bucket (BUCKETS)."""
+
+    model_config = ConfigDict(from_attributes=True)
+    bucket: StatisticsBucketSize | None = Field(default=None)
+    date_from: datetime.datetime | None = Field(default=None)
+    date_to: datetime.datetime | None = Field(default=None)
+
+
 class CancelWorkflowInstanceRequest(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     workflow_instance_id: uuid.UUID
@@ -168,6 +179,28 @@ class GetSystemInformationResponse(BaseModel):
     build_number: str = Field(default_factory=lambda: "dev")
 
 
+class ServiceTaskStatisticsResponseItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    workflow_name: str
+    service_name: str
+    calls: int
+    seconds: float
+    max_seconds: float
+    db_statements: int
+    db_seconds: float
+    io_calls: int
+    # Time inside mail/storage calls and open connector handles, without their database statements
+    io_seconds: float
+
+
+class GetServiceTaskStatisticsResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    profiling_enabled: bool
+    items: list[ServiceTaskStatisticsResponseItem] = Field(default_factory=list)
+
+
 class GetAllUsersResponseItem(InlineUserAdminResponse):
     pass
 
@@ -1,19 +1,39 @@
 # SPDX-License-Identifier: Apache-2.0
 # Copyright (c) 2025 ActiDoo GmbH
 
+import hashlib
+import json
+import time
+import uuid
+
 from fastapi import Request
 
-import actidoo_wfe.wf.service_user as service_user
 from actidoo_wfe.database import get_db_contextmanager
 from actidoo_wfe.helpers.http import HTTPException
 from actidoo_wfe.i18n import extract_primary_locale
 from actidoo_wfe.settings import settings
+from actidoo_wfe.wf import service_user
 from actidoo_wfe.wf.cross_context.imports import get_login_state
 from actidoo_wfe.wf.exceptions import DataModelNotFoundError
 from actidoo_wfe.wf.registry_data_model import DataModelDescriptor, data_model_registry
 
+# Session key under which get_user remembers which claims were last written to the WorkflowUser
+SESSION_USER_SYNC_KEY = "wf_user_sync"
 
-def get_user(request: Request):
+
+def _identity_fingerprint(login_state) -> str:
+    identity = [
+        login_state.idp_user_id,
+        login_state.email,
+        login_state.first_name or "",
+        login_state.last_name or "",
+        sorted(login_state.roles or []),
+    ]
+    return hashlib.sha256(json.dumps(identity).encode("utf-8")).hexdigest()
+
+
+def sync_user(request: Request):
+    """Upsert the WorkflowUser from the login claims of the request and remember the claims in the session."""
     login_state = get_login_state(request=request)
     idp_user_id = login_state.idp_user_id
     email = login_state.email
@@ -41,6 +61,37 @@ def get_user(request: Request):
             is_service_user=False,
             initial_locale=primary,
         )
+        user_id = user.id
+
+    if "session" in request.scope:
+        request.session[SESSION_USER_SYNC_KEY] = {
+            "user_id": str(user_id),
+            "fingerprint": _identity_fingerprint(login_state),
+            "synced_at": int(time.time()),
+        }
+
+    return user
+
+
+def get_user(request: Request):
+    """The WorkflowUser of the logged in user.
+
+    Only writes the user (see sync_user) when the identity claims differ from the last
+    sync of this session or user_sync_interval_seconds have passed; otherwise the user
+    is just read by id."""
+    last_sync = request.scope.get("session", {}).get(SESSION_USER_SYNC_KEY)
+    if not isinstance(last_sync, dict) or int(time.time()) - last_sync.get("synced_at", 0) >= settings.user_sync_interval_seconds:
+        return sync_user(request=request)
+
+    login_state = get_login_state(request=request)
+    if last_sync.get("fingerprint") != _identity_fingerprint(login_state):
+        return sync_user(request=request)
+
+    with get_db_contextmanager() as db:
+        user = service_user.get_user(db=db, user_id=uuid.UUID(last_sync["user_id"]))
+
+    if user is None:
+        return sync_user(request=request)
 
     return user
 
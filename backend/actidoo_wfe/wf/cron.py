@@ -9,7 +9,7 @@ from sqlalchemy.orm import Session
 from actidoo_wfe.async_scheduling import CronRetryPolicy, cron_task
 from actidoo_wfe.settings import settings
 from actidoo_wfe.wf.mail import send_erroneous_tasks_reminder_mail, send_personal_status_mail
-from actidoo_wfe.wf.service_application import handle_messages, handle_timeevents
+from actidoo_wfe.wf.service_application import collect_dangling_attachments, handle_messages, handle_timeevents
 
 log = logging.getLogger(__name__)
 
@@ -53,3 +53,18 @@ def cron_handle_messages(db: Session):
 def cron_handle_timeevents(db: Session):
     handle_timeevents(db=db)
     db.commit()
+
+
+@cron_task(
+    task_name="attachment_gc",
+    cron=settings.attachment_gc_cron,
+)
+def cron_attachment_gc(db: Session):
+    deleted = collect_dangling_attachments(
+        db=db,
+        batch_size=settings.attachment_gc_batch_size,
+        delete_parallelism=settings.attachment_gc_delete_parallelism,
+    )
+    if deleted:
+        log.info(f"Deleted {deleted} unreferenced attachments")
+    db.commit()
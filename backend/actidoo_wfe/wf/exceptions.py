@@ -94,6 +94,29 @@ class WorkflowDefinitionMissingError(Exception):
         super().__init__(f"Workflow definition '{workflow_name}' is not available from any provider")
 
 
+class WorkflowInstanceConflictError(Exception):
+    """Raised when a workflow instance is stored, but was changed by someone else since it was loaded.
+
+    The change is lost; the caller has to load the instance again and redo it. Surfaced as HTTP 409."""
+
+    code = "workflow_instance_conflict"
+
+    def __init__(self, workflow_instance_id, message: str | None = None):
+        self.workflow_instance_id = workflow_instance_id
+        super().__init__(message or f"Workflow instance {workflow_instance_id} was changed concurrently")
+
+
+class WorkflowInstanceLockedError(WorkflowInstanceConflictError):
+    """Raised by a locking load when another transaction holds the instance row (``workflow_instance_lock_nowait``) or the lock wait timed out.
+
+    Nothing was computed yet; the request can simply be repeated."""
+
+    code = "workflow_instance_locked"
+
+    def __init__(self, workflow_instance_id):
+        super().__init__(workflow_instance_id, f"Workflow instance {workflow_instance_id} is being changed by another request")
+
+
 class TaskNotAccessibleException(Exception):
     """Raised when a user tries to access a task (and its templates) they may not see."""
 
@@ -3,7 +3,7 @@
 
 import logging
 import string
-from functools import cache
+from functools import lru_cache
 from pathlib import Path
 
 import orjson
@@ -19,6 +19,9 @@ from actidoo_wfe.wf.types import ReactJsonSchemaFormData
 
 log = logging.getLogger(__name__)
 
+# Bound of the cache of transformed form files
+FORM_CACHE_SIZE = 1024
+
 
 def empty_form():
     jsonschema = {"definitions": dict(), "type": "object", "properties": dict()}
@@ -26,12 +29,18 @@ def empty_form():
     return ReactJsonSchemaFormData(jsonschema=jsonschema, uischema=uischema)
 
 
-@cache
 def transform_camunda_form_from_file(form_file_path: Path):
-    log.debug("> transform_camunda_form_from_file: path=%s", form_file_path)
-    if not form_file_path.exists():
+    """Transforms the form file; cached until the file is rewritten (by size and modification time)."""
+    try:
+        stat = form_file_path.stat()
+    except FileNotFoundError:
         return empty_form()
+    return _transform_camunda_form_file(form_file_path, stat.st_size, stat.st_mtime_ns)
 
+
+@lru_cache(maxsize=FORM_CACHE_SIZE)
+def _transform_camunda_form_file(form_file_path: Path, size: int, mtime_ns: int):
+    log.debug("> transform_camunda_form_from_file: path=%s", form_file_path)
     with open(form_file_path, "r") as fp:
         form_camunda_json = orjson.loads(fp.read())
         form = transform_camunda_form(form_camunda_json)
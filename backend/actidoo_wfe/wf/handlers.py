@@ -30,7 +30,7 @@ log = logging.getLogger(__name__)
 def wf_on_login(request: Request, db: Session, login_state: LoginStateSchema):
     """This is called on every successful login. We UPSERT the WFEUser according to the user login information."""
     if login_state.can_access_wf and login_state.roles is not None:
-        user = deps.get_user(request=request)
+        user = deps.sync_user(request=request)
         resolve_user_attributes_on_login(
             db=db,
             user=user,
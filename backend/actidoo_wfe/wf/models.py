@@ -243,6 +243,23 @@ class WorkflowUserFormTemplate(Base):
     )
 
 
+class FormSchema(Base):
+    """A jsonschema or uischema of a user task form, stored once per distinct content.
+
+    Every instance of a workflow renders the same forms, so task rows reference these by hash instead of storing a copy each."""
+
+    __tablename__ = "form_schemas"
+
+    # sha256 of the schema's JSON serialization
+    hash: Mapped[str] = mapped_column(ty.String(64), primary_key=True)
+    data: Mapped[dict] = mapped_column(ZlibJSONBlob(), nullable=False)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        UTCDateTime(),
+        default=dt_now_naive,
+        nullable=False,
+    )
+
+
 class WorkflowInstanceTask(Base):
     __tablename__ = "workflow_instance_tasks"
 
@@ -364,8 +381,18 @@ class WorkflowInstanceTask(Base):
         foreign_keys="WorkflowInstanceTask.triggered_by_id",
     )
     data: Mapped[dict] = mapped_column(ZlibJSONBlob(), nullable=True)
-    jsonschema: Mapped[dict] = mapped_column(ZlibJSONBlob(), nullable=True)
-    uischema: Mapped[dict] = mapped_column(ZlibJSONBlob(), nullable=True)
+    # The form schemas are stored once per distinct content in form_schemas; tasks only reference them.
+    jsonschema_hash: Mapped[str | None] = mapped_column(ForeignKey("form_schemas.hash"), nullable=True, index=True)
+    jsonschema_form_schema: Mapped["FormSchema | None"] = relationship(
+        foreign_keys="WorkflowInstanceTask.jsonschema_hash",
+    )
+    uischema_hash: Mapped[str | None] = mapped_column(ForeignKey("form_schemas.hash"), nullable=True, index=True)
+    uischema_form_schema: Mapped["FormSchema | None"] = relationship(
+        foreign_keys="WorkflowInstanceTask.uischema_hash",
+    )
+    # Inline schemas of tasks created before form_schemas existed; moved there by the migrate-form-schemas cli command.
+    legacy_jsonschema: Mapped[dict | None] = mapped_column("jsonschema", ZlibJSONBlob(), nullable=True)
+    legacy_uischema: Mapped[dict | None] = mapped_column("uischema", ZlibJSONBlob(), nullable=True)
     error_stacktrace: Mapped[str | None] = mapped_column(myty.LONGTEXT, nullable=True)
     completed_by_user_id: Mapped[uuid.UUID | None] = mapped_column(
         ForeignKey("workflow_users.id"),
@@ -385,6 +412,30 @@ class WorkflowInstanceTask(Base):
     )
     delegate_submit_comment: Mapped[str | None] = mapped_column(ty.Text(), nullable=True)
 
+    # Assigning a schema directly stores it inline, like before form_schemas existed;
+    # repository.store_workflow_instance deduplicates them in form_schemas instead.
+    @property
+    def jsonschema(self) -> dict | None:
+        if self.jsonschema_hash is not None:
+            return self.jsonschema_form_schema.data
+        return self.legacy_jsonschema
+
+    @jsonschema.setter
+    def jsonschema(self, value: dict | None) -> None:
+        self.jsonschema_hash = None
+        self.legacy_jsonschema = value
+
+    @property
+    def uischema(self) -> dict | None:
+        if self.uischema_hash is not None:
+            return self.uischema_form_schema.data
+        return self.legacy_uischema
+
+    @uischema.setter
+    def uischema(self, value: dict | None) -> None:
+        self.uischema_hash = None
+        self.legacy_uischema = value
+
 
 class WorkflowSpec(Base):
     __tablename__ = "workflow_specs"
@@ -462,7 +513,13 @@ class WorkflowInstance(Base):
         server_default="",
     )
     subtitle: Mapped[str | None] = mapped_column(ty.String(255), nullable=True, index=True)
+    # The serialized workflow; with workflow_instance_delta_snapshots only the base the deltas apply to
     data: Mapped[str] = mapped_column(ZlibJSONBlob())
+    # Length and total (uncompressed) size of the delta chain on top of data
+    delta_count: Mapped[int] = mapped_column(ty.Integer, nullable=False, default=0, server_default="0")
+    delta_size: Mapped[int] = mapped_column(ty.Integer, nullable=False, default=0, server_default="0")
+    # Optimistic concurrency: every update checks and increments it, see repository.store_workflow_instance
+    version: Mapped[int] = mapped_column(ty.Integer, nullable=False, server_default="1")
 
     is_completed: Mapped[bool] = mapped_column(
         ty.Boolean,
@@ -494,6 +551,33 @@ class WorkflowInstance(Base):
         .exists(),
     )
 
+    __table_args__ = (
+        # Statistics: completed instances per workflow, bucketed by completion time.
+        Index("ix_workflow_instances_name_completed_at", "name", "completed_at"),
+    )
+
+    __mapper_args__ = {"version_id_col": version}
+
+
+class WorkflowInstanceDelta(Base):
+    """A JSON patch (see ``helpers.json_patch``) on top of ``WorkflowInstance.data``.
+
+    The current state of an instance is its data with all deltas applied in sequence order."""
+
+    __tablename__ = "workflow_instance_deltas"
+
+    workflow_instance_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("workflow_instances.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    sequence: Mapped[int] = mapped_column(ty.Integer, primary_key=True)
+    patch: Mapped[list] = mapped_column(ZlibJSONBlob(), nullable=False)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        UTCDateTime(),
+        default=dt_now_naive,
+        nullable=False,
+    )
+
 
 class WorkflowInstanceTaskRole(Base):
     __tablename__ = "workflow_instance_task_roles"
@@ -513,6 +597,40 @@ class WorkflowInstanceTaskRole(Base):
     __table_args__ = (UniqueConstraint("workflow_instance_task_id", "name"),)
 
 
+class UserInboxEntry(Base):
+    """Why a user sees a manual task in their task list (``views.bff_get_workflows_with_usertasks``).
+
+    A precomputed copy of the task list visibility: ``repository.sync_user_inbox`` writes the
+    rows of an instance's tasks whenever the instance is stored and
+    ``repository.sync_user_inbox_roles`` the ``role`` rows of a user whose roles change.
+    Tasks a user sees as delegate of a principal are the principal's ``assigned`` rows,
+    since delegations expire by time.
+    """
+
+    __tablename__ = "user_inbox"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey(WorkflowUser.id, ondelete="CASCADE"), primary_key=True)
+    workflow_instance_task_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("workflow_instance_tasks.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # ready tasks: assigned | delegate | role, completed tasks: completed
+    reason: Mapped[str] = mapped_column(ty.String(20), primary_key=True)
+    state: Mapped[Literal["ready", "completed"]] = mapped_column(ty.String(20), nullable=False)
+    workflow_instance_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("workflow_instances.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    # The task list is paginated by instance creation time
+    instance_created_at: Mapped[datetime.datetime] = mapped_column(UTCDateTime(), nullable=False)
+
+    __table_args__ = (
+        # Covering index of the task list: InnoDB appends the primary key (task id, reason) to it.
+        Index("ix_user_inbox_listing", "user_id", "state", "instance_created_at", "workflow_instance_id"),
+    )
+
+
 class WorkflowAttachment(Base):
     __tablename__ = "workflow_attachments"
 
@@ -582,8 +700,8 @@ class DataModelFile(Base):
     """A file referenced by a data-model row version through a ``file`` field.
 
     The sole storage of data-model file references (there is no JSON column) and
-    the single source ``repository.delete_dangling_attachment`` counts as the
-    third reference table. Mirrors ``WorkflowInstanceTaskAttachment``: a link row
+    the third reference table the attachment garbage collection
+    (``repository._attachment_is_unreferenced``) checks. Mirrors ``WorkflowInstanceTaskAttachment``: a link row
     to a hash-deduped ``WorkflowAttachment`` carrying the per-reference display
     filename, so a download names the file in *this* row's context. The row side
     is a logical key ``(model_name, row_id, row_version)`` — data-model rows live
@@ -5,6 +5,8 @@ from __future__ import annotations
 
 import functools
 import logging
+import stat
+import threading
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple
@@ -62,11 +64,54 @@ class FileSystemWorkflowProvider:
         return f"{self.module_base}.{workflow_name}"
 
 
+FileStat = Tuple[str, int, int]
+
+
+@dataclass(frozen=True)
+class WorkflowIndexEntry:
+    """A workflow as seen by the last scan of the providers."""
+
+    name: str
+    directory: Path
+    provider: WorkflowProvider
+    # (name, size, mtime_ns) of the files directly in the directory, sorted by name
+    files: Tuple[FileStat, ...]
+    # Registry generation in which the workflow appeared or its files last changed
+    revision: int
+
+
+def _stat_files(directory: Path) -> Tuple[FileStat, ...]:
+    files = []
+    try:
+        for path in sorted(directory.iterdir()):
+            try:
+                file_stat = path.stat()
+            except OSError:
+                continue  # removed while scanning
+            if stat.S_ISREG(file_stat.st_mode):
+                files.append((path.name, file_stat.st_size, file_stat.st_mtime_ns))
+    except OSError:
+        pass
+    return tuple(files)
+
+
 @dataclass
 class WorkflowProviderRegistry:
-    """Collects installed workflow providers (built-in + venusian-registered) and resolves workflows."""
+    """Collects installed workflow providers (built-in + venusian-registered) and resolves workflows.
+
+    The workflows of the providers are read into an index on first use and served from
+    it afterwards. rescan() (periodically called by the watcher, see start_watching())
+    compares the providers with the index and bumps ``generation`` if a workflow was
+    added, removed or one of its files changed, as does every change of the provider
+    set. Caches derived from workflow definitions key on the generation, or on the
+    ``revision`` of a workflow's index entry.
+    """
 
     providers: List[WorkflowProvider] = field(default_factory=list)
+    generation: int = field(default=0, init=False)
+    _index: Optional[dict[str, WorkflowIndexEntry]] = field(default=None, init=False, repr=False)
+    _index_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+    _watcher: Optional[Tuple[threading.Thread, threading.Event]] = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         from actidoo_wfe.settings import settings
@@ -78,8 +123,8 @@ class WorkflowProviderRegistry:
     def reload(self) -> None:
         """Reset provider set (re-evaluates settings)."""
         self.providers = []
-        _invalidate_availability_cache()
         self.__post_init__()
+        self._providers_changed()
 
     def register(self, provider: WorkflowProvider, *, prepend: bool = False) -> None:
         if provider in self.providers:
@@ -89,26 +134,98 @@ class WorkflowProviderRegistry:
         else:
             self.providers.append(provider)
         self.providers = self._sort_providers(self.providers)
-        _invalidate_availability_cache()
+        self._providers_changed()
 
     def clear(self) -> None:
         self.providers = []
-        _invalidate_availability_cache()
+        self._providers_changed()
 
-    def iter_providers(self) -> Iterator[WorkflowProvider]:
-        yield from self.providers
+    def _providers_changed(self) -> None:
+        with self._index_lock:
+            self._index = None
+            self.generation += 1
+        _invalidate_availability_cache()
 
-    def iter_workflow_entries(self) -> Iterator[Tuple[str, Path]]:
-        seen: set[str] = set()
+    def _scan(self, previous: dict[str, WorkflowIndexEntry], generation: int) -> dict[str, WorkflowIndexEntry]:
+        index: dict[str, WorkflowIndexEntry] = {}
         for provider in self.providers:
             for name in provider.iter_workflow_names():
-                if name in seen:
+                if name in index:
                     continue
                 directory = provider.get_workflow_directory(name)
                 if directory is None:
                     continue
-                seen.add(name)
-                yield name, directory
+                files = _stat_files(directory)
+                known = previous.get(name)
+                unchanged = known is not None and known.provider is provider and known.directory == directory and known.files == files
+                index[name] = WorkflowIndexEntry(
+                    name=name,
+                    directory=directory,
+                    provider=provider,
+                    files=files,
+                    revision=known.revision if unchanged and known is not None else generation,
+                )
+        return index
+
+    def _get_index(self) -> dict[str, WorkflowIndexEntry]:
+        index = self._index
+        if index is None:
+            with self._index_lock:
+                if self._index is None:
+                    self._index = self._scan({}, self.generation)
+                index = self._index
+        return index
+
+    def rescan(self) -> bool:
+        """Compares the providers with the index; returns True if something changed and the generation was bumped."""
+        with self._index_lock:
+            if self._index is None:
+                self._index = self._scan({}, self.generation)
+                return False
+            index = self._scan(self._index, self.generation + 1)
+            if index == self._index:
+                return False
+            self._index = index
+            self.generation += 1
+            generation = self.generation
+        _invalidate_availability_cache()
+        log.info("Workflow definitions changed on disk, now at generation %s", generation)
+        return True
+
+    def start_watching(self, interval_seconds: float) -> None:
+        """Starts a daemon thread calling rescan() every ``interval_seconds``."""
+        if self._watcher is not None:
+            return
+        stopped = threading.Event()
+
+        def watch() -> None:
+            while not stopped.wait(interval_seconds):
+                try:
+                    self.rescan()
+                except Exception:
+                    log.exception("Rescanning the workflow providers failed")
+
+        thread = threading.Thread(target=watch, name="workflow-provider-watcher", daemon=True)
+        self._watcher = (thread, stopped)
+        thread.start()
+
+    def stop_watching(self) -> None:
+        if self._watcher is None:
+            return
+        thread, stopped = self._watcher
+        self._watcher = None
+        stopped.set()
+        thread.join()
+
+    def get_index_entry(self, workflow_name: str) -> Optional[WorkflowIndexEntry]:
+        return self._get_index().get(workflow_name)
+
+    def iter_providers(self) -> Iterator[WorkflowProvider]:
+        yield from self.providers
+
+    def iter_workflow_entries(self) -> Iterator[Tuple[str, Path]]:
+        for name, entry in self._get_index().items():
+            yield name, entry.directory
 
     def iter_workflow_names(self) -> Iterator[str]:
         for name, _ in self.iter_workflow_entries():
@@ -119,6 +236,10 @@ class WorkflowProviderRegistry:
             yield directory
 
     def get_workflow_directory(self, workflow_name: str) -> Path:
+        entry = self.get_index_entry(workflow_name)
+        if entry is not None:
+            return entry.directory
+        # Providers may resolve workflows they do not list
         for provider in self.providers:
             directory = provider.get_workflow_directory(workflow_name)
             if directory is not None:
@@ -126,6 +247,9 @@ class WorkflowProviderRegistry:
         raise FileNotFoundError(f"No workflow named '{workflow_name}' found in registered providers.")
 
     def get_provider_for(self, workflow_name: str) -> WorkflowProvider:
+        entry = self.get_index_entry(workflow_name)
+        if entry is not None:
+            return entry.provider
         for provider in self.providers:
             directory = provider.get_workflow_directory(workflow_name)
             if directory is not None:
@@ -198,9 +322,10 @@ def workflow_definition_available(workflow_name: str) -> bool:
     in the database). Callers use this to skip reminder/notification work
     and to mark BFF responses as read-only.
 
-    The result is cached and invalidated whenever the provider registry
-    mutates (register/clear/reload), so callers may invoke this in tight
-    loops without paying for repeated filesystem lookups.
+    The result is cached and invalidated whenever the generation of the
+    provider registry changes (register/clear/reload or a rescan finding
+    changes), so callers may invoke this in tight loops without paying for
+    repeated filesystem lookups.
     """
     try:
         registry.get_workflow_directory(workflow_name)
@@ -218,6 +343,10 @@ def get_workflow_module_path(workflow_name: str) -> Optional[str]:
     return provider.get_module_path(workflow_name)
 
 
+def get_workflow_index_entry(workflow_name: str) -> Optional[WorkflowIndexEntry]:
+    return registry.get_index_entry(workflow_name)
+
+
 def iter_workflow_entries() -> Iterator[Tuple[str, Path]]:
     return registry.iter_workflow_entries()
 
@@ -236,10 +365,12 @@ def get_provider(workflow_name: str) -> WorkflowProvider:
 
 __all__ = [
     "FileSystemWorkflowProvider",
+    "WorkflowIndexEntry",
     "WorkflowProvider",
     "WorkflowProviderRegistry",
     "get_provider",
     "get_workflow_directory",
+    "get_workflow_index_entry",
     "get_workflow_module_path",
     "iter_workflow_directories",
     "iter_workflow_entries",
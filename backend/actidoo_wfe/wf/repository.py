@@ -3,6 +3,7 @@
 
 import datetime
 import hashlib
+import json
 import pathlib
 import re
 import uuid
@@ -13,24 +14,33 @@ from SpiffWorkflow.bpmn.specs.event_definitions.timer import TimerEventDefinitio
 from SpiffWorkflow.bpmn.specs.mixins.events.event_types import CatchingEvent
 from SpiffWorkflow.bpmn.workflow import BpmnWorkflow
 from SpiffWorkflow.task import Task, TaskState
-from sqlalchemy import and_, delete, func, null, select, tuple_
+from sqlalchemy import and_, delete, event, exists, insert, null, select, true, tuple_, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy_file import File
 
+from actidoo_wfe.database import dump_json, exists_by_expr, load_json
+from actidoo_wfe.helpers.json_patch import apply_patch, make_patch
 from actidoo_wfe.helpers.time import dt_now_naive
 from actidoo_wfe.wf import events, providers as workflow_providers
-from actidoo_wfe.wf.exceptions import InvalidWorkflowSpecException
+from actidoo_wfe.wf.exceptions import InvalidWorkflowSpecException, WorkflowInstanceConflictError, WorkflowInstanceLockedError
 from actidoo_wfe.wf.models import (
     DataModelFile,
+    FormSchema,
+    UserInboxEntry,
     WorkflowAttachment,
     WorkflowInstance,
     WorkflowInstanceAttachment,
+    WorkflowInstanceDelta,
     WorkflowInstanceTask,
     WorkflowInstanceTaskAttachment,
     WorkflowInstanceTaskRole,
     WorkflowMessage,
     WorkflowMessageSubscription,
     WorkflowMessageWorkflowInstance,
+    WorkflowRole,
     WorkflowSpec,
     WorkflowSpecFile,
     WorkflowTimeEvent,
@@ -59,11 +69,39 @@ from actidoo_wfe.wf.service_workflow import (
 from actidoo_wfe.wf.spiff_customized import MyIntermediateCatchEvent
 from actidoo_wfe.wf.types import TimeEvent, UserRepresentation
 from actidoo_wfe.helpers.datauri import sanitize_metadata_value
+from actidoo_wfe.settings import settings
+
+
+# MySQL's ER_LOCK_WAIT_TIMEOUT and ER_LOCK_NOWAIT
+_LOCK_NOT_AVAILABLE_ERRORS = {1205, 3572}
+
+# Restored workflows of the current transaction by instance id, see load_workflow_instance
+_RESTORED_WORKFLOWS_KEY = "wf_restored_workflows"
+
+
+def _restored_workflows(db: Session) -> dict[uuid.UUID, tuple[bool, BpmnWorkflow]]:
+    """(loaded or stored under the row lock?, workflow) by instance id"""
+    return db.info.setdefault(_RESTORED_WORKFLOWS_KEY, {})
+
+
+def forget_workflow_instance(db: Session, workflow_instance_id: uuid.UUID):
+    """Drops the restored workflow from the transaction's cache, e.g. after it was changed but must not be stored."""
+    db.info.get(_RESTORED_WORKFLOWS_KEY, {}).pop(workflow_instance_id, None)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _clear_restored_workflows(session: Session) -> None:
+    """A new transaction may see other versions of the instances."""
+    session.info.pop(_RESTORED_WORKFLOWS_KEY, None)
 
 
 # Repository
 def store_workflow_instance(db: Session, workflow: BpmnWorkflow, triggered_by: uuid.UUID | None = None):
-    """Stores the workflow and all tasks"""
+    """Stores the workflow and all tasks.
+
+    Raises ``WorkflowInstanceConflictError`` if the instance row was changed by another
+    transaction since it was loaded in this one (checked via ``WorkflowInstance.version``)."""
     id = workflow.task_tree.id  # the id is the id of the top task
     name = workflow.spec.name
     title = workflow.spec.description
@@ -75,6 +113,7 @@ def store_workflow_instance(db: Session, workflow: BpmnWorkflow, triggered_by: u
     created_by_id = get_created_by_id(workflow=workflow)
     subtitle = get_subtitle(workflow=workflow)
     instance_was_completed = db_workflow.is_completed if db_workflow is not None else False
+    is_new_instance = db_workflow is None
 
     if db_workflow is None:
         db_workflow = WorkflowInstance()
@@ -85,7 +124,7 @@ def store_workflow_instance(db: Session, workflow: BpmnWorkflow, triggered_by: u
         db_workflow.title = title
 
     db_workflow.subtitle = subtitle
-    db_workflow.data = dump(workflow=workflow)
+    _store_workflow_state(db=db, db_workflow=db_workflow, state=dump(workflow=workflow), is_new_instance=is_new_instance)
     db_workflow.is_completed = workflow.is_completed()
     if db_workflow.is_completed and not instance_was_completed:
         # instance has just been set completed
@@ -93,10 +132,17 @@ def store_workflow_instance(db: Session, workflow: BpmnWorkflow, triggered_by: u
 
     db.add(db_workflow)
 
+    try:
+        # UPDATE ... WHERE id = ? AND version = ?: a concurrent change surfaces here, before the tasks are synced
+        db.flush()
+    except StaleDataError as error:
+        raise WorkflowInstanceConflictError(workflow_instance_id=id) from error
+
     # TASKS
 
     all_tasks: list[Task] = workflow.get_tasks()
     lane_mapping = db_workflow.lane_mapping
+    inbox_tasks: list[tuple[WorkflowInstanceTask, set[str]]] = []
 
     engine_index = 0
     for task in all_tasks:
@@ -149,8 +195,8 @@ def store_workflow_instance(db: Session, workflow: BpmnWorkflow, triggered_by: u
 
             formdata = get_react_json_schema_form_data(task)
             if formdata is not None:
-                db_task.jsonschema = formdata.jsonschema
-                db_task.uischema = formdata.uischema
+                db_task.jsonschema_hash = store_form_schema(db=db, schema=formdata.jsonschema)
+                db_task.uischema_hash = store_form_schema(db=db, schema=formdata.uischema)
 
             db.flush()
         else:
@@ -235,6 +281,8 @@ def store_workflow_instance(db: Session, workflow: BpmnWorkflow, triggered_by: u
             workflow=workflow,
             task_id=task.id,
         )
+        if db_task.manual:
+            inbox_tasks.append((db_task, role_set))
 
         ### Conditionally fire TaskReadyForUserNotificationEvent / TaskReadyForRoleNotificationEvent
         # Define conditions for readability
@@ -282,28 +330,244 @@ def store_workflow_instance(db: Session, workflow: BpmnWorkflow, triggered_by: u
     )
 
     db.flush()
+    sync_user_inbox(db=db, workflow_instance_id=id, instance_created_at=db_workflow.created_at, tasks=inbox_tasks)
     db.expire(db_workflow)
 
+    restored = _restored_workflows(db)
+    locked, _ = restored.get(id, (False, None))
+    restored[id] = (locked, workflow)
+
     queue_waiting_receive_messages(db=db, workflow=workflow)
     sync_timer_events(db=db, workflow=workflow)
 
 
-def load_workflow_instance(db: Session, workflow_id: uuid.UUID, for_update: bool = False) -> BpmnWorkflow:
+def sync_user_inbox(
+    db: Session,
+    workflow_instance_id: uuid.UUID,
+    instance_created_at: datetime.datetime,
+    tasks: list[tuple[WorkflowInstanceTask, set[str]]],
+):
+    """Brings the ``UserInboxEntry`` rows of an instance in line with its manual ``tasks``
+    (each with its lane roles). Rows of tasks that no longer exist are removed by the
+    foreign key cascade."""
+    planned: set[tuple[uuid.UUID, uuid.UUID, str, str]] = set()
+    tasks_by_role: dict[str, list[uuid.UUID]] = {}
+    for task, roles in tasks:
+        if task.state_ready:
+            if task.assigned_user_id is not None:
+                planned.add((task.assigned_user_id, task.id, "assigned", "ready"))
+            else:
+                for role in roles:
+                    tasks_by_role.setdefault(role, []).append(task.id)
+            if task.assigned_delegate_user_id is not None:
+                planned.add((task.assigned_delegate_user_id, task.id, "delegate", "ready"))
+        if task.state_completed:
+            for user_id in (task.assigned_user_id, task.completed_by_user_id, task.completed_by_delegate_user_id):
+                if user_id is not None:
+                    planned.add((user_id, task.id, "completed", "completed"))
+
+    if tasks_by_role:
+        for user_id, role in db.execute(
+            select(WorkflowUserRole.user_id, WorkflowRole.name)
+            .join(WorkflowRole, WorkflowUserRole.role_id == WorkflowRole.id)
+            .where(WorkflowRole.name.in_(tasks_by_role)),
+        ):
+            for task_id in tasks_by_role[role]:
+                planned.add((user_id, task_id, "role", "ready"))
+
+    # Usually nothing changed since the last store: only write the difference
+    existing: set[tuple[uuid.UUID, uuid.UUID, str, str]] = set(
+        db.execute(
+            select(UserInboxEntry.user_id, UserInboxEntry.workflow_instance_task_id, UserInboxEntry.reason, UserInboxEntry.state).where(
+                UserInboxEntry.workflow_instance_id == workflow_instance_id,
+            ),
+        ).tuples(),
+    )
+
+    to_delete = existing - planned
+    if to_delete:
+        db.execute(
+            delete(UserInboxEntry).where(
+                tuple_(UserInboxEntry.user_id, UserInboxEntry.workflow_instance_task_id, UserInboxEntry.reason).in_(
+                    [(user_id, task_id, reason) for user_id, task_id, reason, _ in to_delete],
+                ),
+            ),
+        )
+
+    to_insert = planned - existing
+    if to_insert:
+        db.execute(
+            insert(UserInboxEntry),
+            [
+                dict(
+                    user_id=user_id,
+                    workflow_instance_task_id=task_id,
+                    reason=reason,
+                    state=state,
+                    workflow_instance_id=workflow_instance_id,
+                    instance_created_at=instance_created_at,
+                )
+                for user_id, task_id, reason, state in to_insert
+            ],
+        )
+
+
+def sync_user_inbox_roles(db: Session, user_id: uuid.UUID):
+    """Brings the ``role`` rows of a user's inbox in line with the user's current roles."""
+    planned: dict[uuid.UUID, tuple[uuid.UUID, datetime.datetime]] = {
+        task_id: (workflow_instance_id, instance_created_at)
+        for task_id, workflow_instance_id, instance_created_at in db.execute(
+            select(WorkflowInstanceTask.id, WorkflowInstanceTask.workflow_instance_id, WorkflowInstance.created_at)
+            .join(WorkflowInstance, WorkflowInstanceTask.workflow_instance_id == WorkflowInstance.id)
+            .join(WorkflowInstanceTaskRole, WorkflowInstanceTaskRole.workflow_instance_task_id == WorkflowInstanceTask.id)
+            .join(WorkflowRole, WorkflowRole.name == WorkflowInstanceTaskRole.name)
+            .join(WorkflowUserRole, WorkflowUserRole.role_id == WorkflowRole.id)
+            .where(
+                WorkflowUserRole.user_id == user_id,
+                WorkflowInstanceTask.manual == true(),
+                WorkflowInstanceTask.state_ready == true(),
+                WorkflowInstanceTask.assigned_user_id == null(),
+            ),
+        )
+    }
+    existing = set(
+        db.execute(
+            select(UserInboxEntry.workflow_instance_task_id).where(UserInboxEntry.user_id == user_id, UserInboxEntry.reason == "role"),
+        ).scalars(),
+    )
+
+    to_delete = existing - planned.keys()
+    if to_delete:
+        db.execute(
+            delete(UserInboxEntry).where(
+                UserInboxEntry.user_id == user_id,
+                UserInboxEntry.reason == "role",
+                UserInboxEntry.workflow_instance_task_id.in_(to_delete),
+            ),
+        )
+
+    to_insert = planned.keys() - existing
+    if to_insert:
+        db.execute(
+            insert(UserInboxEntry),
+            [
+                dict(
+                    user_id=user_id,
+                    workflow_instance_task_id=task_id,
+                    reason="role",
+                    state="ready",
+                    workflow_instance_id=planned[task_id][0],
+                    instance_created_at=planned[task_id][1],
+                )
+                for task_id in to_insert
+            ],
+        )
+
+
+def _load_workflow_state(db: Session, db_workflow: WorkflowInstance) -> dict:
+    """The serialized workflow of an instance: its base snapshot with the delta chain applied."""
+    if not db_workflow.delta_count and not settings.workflow_instance_delta_snapshots:
+        return db_workflow.data
+
+    # Hand out a copy: restoring migrates the state in place, but the loaded base has to stay what is stored
+    state = load_json(dump_json(db_workflow.data))
+    for patch in db.execute(
+        select(WorkflowInstanceDelta.patch).where(WorkflowInstanceDelta.workflow_instance_id == db_workflow.id).order_by(WorkflowInstanceDelta.sequence),
+    ).scalars():
+        state = apply_patch(state, patch)
+    return state
+
+
+def _store_workflow_state(db: Session, db_workflow: WorkflowInstance, state: dict, is_new_instance: bool):
+    """Writes the serialized workflow of an instance.
+
+    With ``workflow_instance_delta_snapshots`` only the difference to the stored state is
+    written, as long as the delta chain stays within its bounds; otherwise the state
+    becomes the new base snapshot."""
+    if settings.workflow_instance_delta_snapshots and not is_new_instance:
+        # Diff in the stored representation, so that e.g. tuples and lists compare equal
+        state = load_json(dump_json(state))
+        patch = make_patch(_load_workflow_state(db=db, db_workflow=db_workflow), state)
+        if not patch:
+            return
+
+        patch_size = len(dump_json(patch))
+        if db_workflow.delta_count < settings.workflow_instance_delta_max_count and db_workflow.delta_size + patch_size <= settings.workflow_instance_delta_max_size:
+            # (instance, sequence) is the primary key: a concurrent writer that appended in the meantime makes this fail instead of forking the chain
+            db.add(WorkflowInstanceDelta(workflow_instance_id=db_workflow.id, sequence=db_workflow.delta_count + 1, patch=patch))
+            db_workflow.delta_count += 1
+            db_workflow.delta_size += patch_size
+            return
+
+    if not is_new_instance and db_workflow.delta_count:
+        db.execute(delete(WorkflowInstanceDelta).where(WorkflowInstanceDelta.workflow_instance_id == db_workflow.id))
+    db_workflow.data = state
+    db_workflow.delta_count = 0
+    db_workflow.delta_size = 0
+
+
+def compact_workflow_instance(db: Session, workflow_instance_id: uuid.UUID):
+    """Folds the delta chain of an instance into a new base snapshot."""
+    db_workflow: WorkflowInstance = db.execute(
+        select(WorkflowInstance).where(WorkflowInstance.id == workflow_instance_id).with_for_update(),
+    ).scalar_one()
+    if not db_workflow.delta_count:
+        return
+
+    state = _load_workflow_state(db=db, db_workflow=db_workflow)
+    db.execute(delete(WorkflowInstanceDelta).where(WorkflowInstanceDelta.workflow_instance_id == db_workflow.id))
+    db_workflow.data = state
+    db_workflow.delta_count = 0
+    db_workflow.delta_size = 0
+    db.flush()
+
+
+def store_form_schema(db: Session, schema: dict) -> str:
+    """Store a form schema in form_schemas unless an identical one is there already; returns its hash."""
+    # Key order is part of the content: it decides the order in which the form renders
+    schema_hash = hashlib.sha256(json.dumps(schema, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+    if not exists_by_expr(db, FormSchema.hash == schema_hash):
+        # IGNORE: a concurrent transaction may store the same schema in the meantime
+        db.execute(mysql_insert(FormSchema).prefix_with("IGNORE").values(hash=schema_hash, data=schema, created_at=dt_now_naive()))
+
+    return schema_hash
+
+
+def load_workflow_instance(db: Session, workflow_id: uuid.UUID, for_update: bool = False, nowait: bool = False) -> BpmnWorkflow:
     """Restores a workflow.
 
     ``for_update`` locks the instance row for the rest of the transaction. The
     whole instance is stored as one blob, so anything that reads, changes and
     writes it back has to hold that lock - otherwise it overwrites whatever was
-    committed in between."""
+    committed in between. With ``nowait``, a lock held by another transaction
+    raises ``WorkflowInstanceLockedError`` at once instead of waiting for it.
+
+    Within a transaction every instance is restored once: like the ORM identity
+    map, later loads return the same object, including changes that are not
+    stored yet (see ``forget_workflow_instance``). A ``for_update`` load only
+    reuses an object restored under the lock."""
+
+    restored = _restored_workflows(db)
+    locked, workflow = restored.get(workflow_id, (False, None))
+    if workflow is not None and (locked or not for_update):
+        return workflow
 
     statement = select(WorkflowInstance).where(WorkflowInstance.id == workflow_id)
     if for_update:
-        statement = statement.with_for_update()
+        statement = statement.with_for_update(nowait=nowait)
 
-    db_wf: WorkflowInstance = db.execute(statement).scalar_one()
-    db.refresh(db_wf)
+    try:
+        db_wf: WorkflowInstance = db.execute(statement).scalar_one()
+    except OperationalError as error:
+        if for_update and error.orig is not None and error.orig.args and error.orig.args[0] in _LOCK_NOT_AVAILABLE_ERRORS:
+            raise WorkflowInstanceLockedError(workflow_instance_id=workflow_id) from error
+        raise
+    # Under REPEATABLE READ a plain refresh reads the transaction's snapshot; the version a locking load continues from must be the latest
+    db.refresh(db_wf, with_for_update=for_update or None)
 
-    workflow = restore(serialized_data=db_wf.data)
+    workflow = restore(serialized_data=_load_workflow_state(db=db, db_workflow=db_wf))
+    restored[workflow_id] = (for_update, workflow)
 
     return workflow
 
@@ -350,35 +614,90 @@ def get_workflow_instance_names_by_task_ids(db: Session, task_ids: set[uuid.UUID
     return {row[0]: row[1] for row in rows}
 
 
-def load_workflow_instance_by_task_id(db: Session, task_id: uuid.UUID) -> BpmnWorkflow:
-    """Restores a workflow by task_id"""
+def load_task_completion_times(db: Session, workflow_instance_id: uuid.UUID) -> dict[uuid.UUID, datetime.datetime | None]:
+    """completed_at of every stored task of the workflow instance, by task id."""
+    rows = db.execute(
+        select(WorkflowInstanceTask.id, WorkflowInstanceTask.completed_at).where(WorkflowInstanceTask.workflow_instance_id == workflow_instance_id),
+    ).all()
+    return {row[0]: row[1] for row in rows}
+
+
+def load_workflow_instance_by_task_id(db: Session, task_id: uuid.UUID, for_update: bool = False, nowait: bool = False) -> BpmnWorkflow:
+    """Restores a workflow by task_id, see ``load_workflow_instance``"""
 
-    db_task: WorkflowInstanceTask = db.execute(
-        select(WorkflowInstanceTask).where(WorkflowInstanceTask.id == task_id),
+    workflow_instance_id = db.execute(
+        select(WorkflowInstanceTask.workflow_instance_id).where(WorkflowInstanceTask.id == task_id),
     ).scalar_one()
 
-    return restore(serialized_data=db_task.workflow_instance.data)
+    return load_workflow_instance(db=db, workflow_id=workflow_instance_id, for_update=for_update, nowait=nowait)
+
+
+def lock_workflow_instance_by_task_id(db: Session, task_id: uuid.UUID) -> BpmnWorkflow:
+    """Restores a workflow by task_id under the instance row lock, for requests that change it.
+
+    Taking the lock up front serializes concurrent changes of one instance before
+    any work is done, instead of letting all but one fail when storing. See
+    ``workflow_instance_lock_nowait`` for failing fast on contention."""
+    return load_workflow_instance_by_task_id(db=db, task_id=task_id, for_update=True, nowait=settings.workflow_instance_lock_nowait)
+
+
+def _hash_file(path: pathlib.Path) -> str:
+    BUF_SIZE = 65536
+    with open(path, "rb") as fd:
+        hasher = hashlib.sha256()
+        while True:
+            data = fd.read(BUF_SIZE)
+            if not data:
+                break
+            hasher.update(data)
+        return hasher.hexdigest()
+
+
+def _files_fingerprint(files: list[pathlib.Path]) -> tuple:
+    """Changes whenever a file is added, removed or rewritten - without reading them"""
+    fingerprint = []
+    for f in files:
+        stat = f.stat()
+        fingerprint.append((f.name, stat.st_size, stat.st_mtime_ns))
+    return tuple(fingerprint)
+
+
+# (files fingerprint, WorkflowSpec id) by workflow name, of specs persisted by committed transactions of this process
+_persisted_specs: dict[str, tuple[tuple, uuid.UUID]] = {}
+# The same, persisted in the current transaction and not committed yet
+_PENDING_SPECS_KEY = "wf_pending_specs"
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_persisted_specs(session: Session) -> None:
+    _persisted_specs.update(session.info.pop(_PENDING_SPECS_KEY, {}))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending_specs(session: Session) -> None:
+    session.info.pop(_PENDING_SPECS_KEY, None)
 
 
-def persist_workflow_spec(db: Session, name: str):
+def persist_workflow_spec(db: Session, name: str) -> uuid.UUID:
+    """Makes sure workflow_specs holds the current files of the workflow; returns the WorkflowSpec id.
+
+    The files are only hashed and compared with the database when their sizes or
+    modification times changed since the last committed call in this process, or the
+    spec row of that call is gone (e.g. the database was restored)."""
     try:
         folder = workflow_providers.get_workflow_directory(name)
     except FileNotFoundError as error:
         raise InvalidWorkflowSpecException(str(error)) from error
-    all_files = [x for x in folder.glob("*") if x.is_file()]
+    all_files = sorted(x for x in folder.glob("*") if x.is_file())
 
-    BUF_SIZE = 65536
-    fs_hashes: dict[pathlib.Path, str] = dict()
-    for f in all_files:
-        with open(f, "rb") as fd:
-            hasher = hashlib.sha256()
-            while True:
-                data = fd.read(BUF_SIZE)
-                if not data:
-                    break
-                hasher.update(data)
-            hash = hasher.hexdigest()
-        fs_hashes[f] = hash
+    fingerprint = _files_fingerprint(all_files)
+    persisted = _persisted_specs.get(name)
+    if persisted is not None and persisted[0] == fingerprint:
+        if db.execute(select(WorkflowSpec.id).where(WorkflowSpec.id == persisted[1])).first() is not None:
+            return persisted[1]
+        _persisted_specs.pop(name, None)
+
+    fs_hashes: dict[pathlib.Path, str] = {f: _hash_file(f) for f in all_files}
 
     workflow: WorkflowSpec | None = db.execute(
         select(WorkflowSpec).where(WorkflowSpec.name == name).limit(1),
@@ -442,6 +761,9 @@ def persist_workflow_spec(db: Session, name: str):
 
             db.add(db_file)
 
+    db.info.setdefault(_PENDING_SPECS_KEY, {})[workflow.name] = (fingerprint, workflow.id)
+    return workflow.id
+
 
 def load_workflow_user(db: Session, user_id: uuid.UUID) -> WorkflowUser:
     """Load the ORM user. Most callers want ``load_user`` (the representation);
@@ -903,28 +1225,47 @@ def copy_data_model_files_forward(
         )
 
 
+def _attachment_is_unreferenced():
+    """The anti-join condition shared by the attachment garbage collection: no task,
+    workflow instance or data-model file links the attachment."""
+    return and_(
+        ~exists().where(WorkflowInstanceTaskAttachment.workflow_attachment_id == WorkflowAttachment.id),
+        ~exists().where(WorkflowInstanceAttachment.workflow_attachment_id == WorkflowAttachment.id),
+        ~exists().where(DataModelFile.workflow_attachment_id == WorkflowAttachment.id),
+    )
+
+
 def delete_dangling_attachment(db: Session, attachment_id: uuid.UUID):
-    attachment = find_attachment_by_id(db=db, attachment_id=attachment_id)
-    if attachment is None:
-        # Already gone (e.g. deleted earlier in this same cleanup pass).
-        return
+    attachment = db.execute(
+        select(WorkflowAttachment).where(WorkflowAttachment.id == attachment_id, _attachment_is_unreferenced()),
+    ).scalar_one_or_none()
+    if attachment is not None:
+        db.delete(attachment)
 
-    n_tasks = db.execute(
-        select(func.count()).select_from(WorkflowInstanceTaskAttachment).where(WorkflowInstanceTaskAttachment.workflow_attachment_id == attachment_id),
-    ).scalar_one()
+    db.flush()
 
-    n_workflow_instances = db.execute(
-        select(func.count()).select_from(WorkflowInstanceAttachment).where(WorkflowInstanceAttachment.workflow_attachment_id == attachment_id),
-    ).scalar_one()
 
-    n_data_model_files = db.execute(
-        select(func.count()).select_from(DataModelFile).where(DataModelFile.workflow_attachment_id == attachment_id),
-    ).scalar_one()
+def lock_dangling_attachments(db: Session, limit: int) -> list[tuple[uuid.UUID, File | None]]:
+    """Return ``(id, file)`` of up to ``limit`` attachments nothing refers to anymore, locked.
 
-    if n_tasks == 0 and n_workflow_instances == 0 and n_data_model_files == 0:
-        db.delete(attachment)
+    Rows locked by another transaction (a concurrent collection or a request linking the
+    attachment right now) are skipped; they are looked at again in the next run."""
+    return [
+        (row.id, row.file)
+        for row in db.execute(
+            select(WorkflowAttachment.id, WorkflowAttachment.file)
+            .where(_attachment_is_unreferenced())
+            .limit(limit)
+            .with_for_update(skip_locked=True),
+        )
+    ]
 
-    db.flush()
+
+def delete_attachment_rows(db: Session, attachment_ids: list[uuid.UUID]):
+    """Delete the attachment rows only; unlike ``db.delete`` this leaves their stored files
+    alone, the caller removes those once the deletion is committed."""
+    if attachment_ids:
+        db.execute(delete(WorkflowAttachment).where(WorkflowAttachment.id.in_(attachment_ids)).execution_options(synchronize_session=False))
 
 
 def store_message(
@@ -984,32 +1325,43 @@ def queue_waiting_receive_messages(
     iter = [t for t in workflow.get_tasks_iterator(state=TaskState.WAITING, spec_class=CatchingEvent)]
     waiting_event_tasks: list[Task] = [t for t in iter if t.task_spec.event_definition.details(t).event_type == "MessageEventDefinition"]
 
-    existing_subscriptions = db.execute(
-        select(WorkflowMessageSubscription)
-        .join(WorkflowInstanceTask, WorkflowMessageSubscription.workflow_instance_task_id == WorkflowInstanceTask.id)
-        .where(
-            WorkflowInstanceTask.workflow_instance_id == workflow.task_tree.id,
-        ),
-    ).scalars()
-
-    for sub in existing_subscriptions:
-        db.delete(sub)
-
+    planned: set[tuple[uuid.UUID, str, str]] = set()
     for task in waiting_event_tasks:
         if isinstance(task.task_spec, MyIntermediateCatchEvent):
             event_details = task.task_spec.event_definition.details(task)
-
             evaluated_correlation_key = task.task_spec.evaluate_correlation_key(task=task)
+            planned.add((task.id, event_details.name, evaluated_correlation_key))
+
+    # Usually nothing changed since the last store: only write the difference
+    to_delete: list[uuid.UUID] = []
+    existing: set[tuple[uuid.UUID, str, str]] = set()
+    for subscription_id, task_id, name, correlation_key in db.execute(
+        select(
+            WorkflowMessageSubscription.id,
+            WorkflowMessageSubscription.workflow_instance_task_id,
+            WorkflowMessageSubscription.name,
+            WorkflowMessageSubscription.correlation_key,
+        )
+        .join(WorkflowInstanceTask, WorkflowMessageSubscription.workflow_instance_task_id == WorkflowInstanceTask.id)
+        .where(
+            WorkflowInstanceTask.workflow_instance_id == workflow.task_tree.id,
+        ),
+    ):
+        key = (task_id, name, correlation_key)
+        if key in planned and key not in existing:
+            existing.add(key)
+        else:
+            to_delete.append(subscription_id)
 
-            # Create a new Message Instance
-            subscription = WorkflowMessageSubscription()
-            subscription.workflow_instance_task_id = task.id
-            subscription.name = event_details.name
-            subscription.correlation_key = evaluated_correlation_key
-
-            db.add(subscription)
+    if to_delete:
+        db.execute(delete(WorkflowMessageSubscription).where(WorkflowMessageSubscription.id.in_(to_delete)))
 
-    db.flush()
+    to_insert = planned - existing
+    if to_insert:
+        db.execute(
+            insert(WorkflowMessageSubscription),
+            [dict(workflow_instance_task_id=task_id, name=name, correlation_key=correlation_key) for task_id, name, correlation_key in to_insert],
+        )
 
 
 def get_subscriptions_by_message_name_and_correlation_key(db: Session, message_name: str, correlation_key: str):
@@ -1029,31 +1381,21 @@ def delete_workflow_instance(db: Session, workflow: BpmnWorkflow):
     """Deletes a workflow instance comletely.
 
     Deleting the instance cascades its task/instance attachment link rows, but not
-    the ``WorkflowAttachment`` rows themselves. We therefore collect the linked
-    attachment ids first and, after the delete, garbage-collect each one — which
-    now also counts data-model file references, so an attachment still referenced
-    by a data-model row survives while a truly orphaned one (and its stored file)
-    is removed.
+    the ``WorkflowAttachment`` rows themselves. Attachments left without any link
+    (including data-model file references) are removed, together with their stored
+    files, by the ``attachment_gc`` cron task.
     """
     id = workflow.task_tree.id  # the id is the id of the top task
 
-    linked_attachment_ids: set[uuid.UUID] = set()
-    for link in find_task_attachments_by_worfklow_instance_id(db=db, workflow_instance_id=id):
-        linked_attachment_ids.add(link.workflow_attachment_id)
-    for link in find_workflow_instance_attachments_by_worfklow_instance_id(db=db, workflow_instance_id=id):
-        linked_attachment_ids.add(link.workflow_attachment_id)
-
     db.execute(
         delete(WorkflowInstance).where(
             WorkflowInstance.id == id,
         ),
     )
+    forget_workflow_instance(db=db, workflow_instance_id=id)
 
     db.flush()
 
-    for attachment_id in linked_attachment_ids:
-        delete_dangling_attachment(db=db, attachment_id=attachment_id)
-
 
 def list_due_time_events(db: Session, *, now: datetime.datetime, limit: int = 200) -> list[TimeEvent]:
     """Return scheduled time events due at or before 'now' as domain objects."""
@@ -1202,6 +1544,15 @@ def _prepare_timer_events(workflow: BpmnWorkflow) -> list[TimeEvent]:
     return plans
 
 
+def _time_event_changed(row, plan: TimeEvent) -> bool:
+    return (
+        (row.timer_kind, row.expression, row.interrupting, row.remaining_cycles, row.status)
+        != (plan.timer_kind, plan.expression, plan.interrupting, plan.remaining_cycles, "scheduled")
+        # due_at is stored with seconds precision
+        or abs(row.due_at - plan.due_at) >= datetime.timedelta(seconds=1)
+    )
+
+
 def sync_timer_events(
     db: Session,
     *,
@@ -1210,34 +1561,48 @@ def sync_timer_events(
     workflow_instance_id = workflow.task_tree.id
     plans = _prepare_timer_events(workflow)
 
-    existing: list[WorkflowTimeEvent] = list(
-        db.execute(select(WorkflowTimeEvent).where(WorkflowTimeEvent.workflow_instance_id == workflow_instance_id)).scalars().all(),
-    )
+    existing = db.execute(
+        select(
+            WorkflowTimeEvent.id,
+            WorkflowTimeEvent.timer_task_id,
+            WorkflowTimeEvent.timer_kind,
+            WorkflowTimeEvent.expression,
+            WorkflowTimeEvent.interrupting,
+            WorkflowTimeEvent.due_at,
+            WorkflowTimeEvent.remaining_cycles,
+            WorkflowTimeEvent.status,
+        ).where(WorkflowTimeEvent.workflow_instance_id == workflow_instance_id),
+    ).all()
     existing_by_task = {e.timer_task_id: e for e in existing}
-    planned_task_ids = {str(p.timer_task_id) for p in plans}
+    planned_task_ids = {p.timer_task_id for p in plans}
 
     now = dt_now_naive()
 
     # Cancel those no longer planned
-    for e in existing:
-        if str(e.timer_task_id) not in planned_task_ids and e.status not in ("completed", "cancelled"):
-            e.status = "cancelled"
+    to_cancel = [e.id for e in existing if e.timer_task_id not in planned_task_ids and e.status not in ("completed", "cancelled")]
+    if to_cancel:
+        db.execute(update(WorkflowTimeEvent).where(WorkflowTimeEvent.id.in_(to_cancel)).values(status="cancelled"))
 
-    # Upsert plans
+    # Upsert plans; usually they are unchanged since the last store
+    to_insert: list[dict] = []
+    to_update: list[dict] = []
     for p in plans:
+        values = dict(
+            timer_kind=p.timer_kind,
+            expression=p.expression,
+            interrupting=p.interrupting,
+            due_at=p.due_at,
+            remaining_cycles=p.remaining_cycles,
+            status="scheduled",
+            created_at=now,
+        )
         e = existing_by_task.get(p.timer_task_id)
         if e is None:
-            e = WorkflowTimeEvent()
-            db.add(e)
-            e.workflow_instance_id = workflow_instance_id
-            e.timer_task_id = p.timer_task_id
-
-        e.timer_kind = p.timer_kind
-        e.expression = p.expression
-        e.interrupting = p.interrupting
-        e.due_at = p.due_at
-        e.remaining_cycles = p.remaining_cycles
-        e.status = "scheduled"
-        e.created_at = now
-
-    db.flush()
+            to_insert.append(dict(values, workflow_instance_id=workflow_instance_id, timer_task_id=p.timer_task_id))
+        elif _time_event_changed(e, p):
+            to_update.append(dict(values, id=e.id))
+
+    if to_insert:
+        db.execute(insert(WorkflowTimeEvent), to_insert)
+    if to_update:
+        db.execute(update(WorkflowTimeEvent), to_update)
@@ -6,11 +6,12 @@ This module implements the application services (services which must be used by
 """
 
 import datetime
+import functools
 import hashlib
 import logging
 import uuid
 from copy import deepcopy
-from typing import Any, Literal
+from typing import Any, Callable, Literal, TypeVar
 
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
@@ -20,7 +21,8 @@ from actidoo_wfe.helpers.datauri import DataURI
 from actidoo_wfe.helpers.modules import env_from_module
 from actidoo_wfe.helpers.schema import CursorPaginatedDataSchema, PaginatedDataSchema
 from actidoo_wfe.helpers.time import dt_now_naive
-from actidoo_wfe.storage import get_file_content
+from actidoo_wfe.settings import settings
+from actidoo_wfe.storage import delete_files, get_file_content
 from actidoo_wfe.wf import providers as workflow_providers
 from actidoo_wfe.wf import repository, service_form, service_i18n, service_user, service_workflow, views
 from actidoo_wfe.wf.exceptions import (
@@ -35,6 +37,7 @@ from actidoo_wfe.wf.exceptions import (
     UserMayNotStartWorkflowException,
     ValidationResultContainsErrors,
     WorkflowDefinitionMissingError,
+    WorkflowInstanceConflictError,
     WorkflowSpecNotFoundException,
 )
 from actidoo_wfe.wf.models import (
@@ -51,10 +54,13 @@ from actidoo_wfe.wf.service_form import (
     iterate_and_replace_datauri,
     make_uischema_read_only,
 )
+from actidoo_wfe.wf.service_task_profiling import ServiceTaskStatistics, get_service_task_statistics
 from actidoo_wfe.wf.types import (
     Attachment,
     ReactJsonSchemaFormData,
     ReducedWorkflowInstanceResponse,
+    StatisticsBucketSize,
+    TimeEvent,
     UploadedAttachmentRepresentation,
     UserRepresentation,
     UserTaskRepresentation,
@@ -71,6 +77,8 @@ from actidoo_wfe.wf.types import (
 
 log = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 def start_workflow(
     db: Session,
@@ -377,20 +385,56 @@ def handle_messages(db: Session):
             sub_instance_name = sub_names_by_task_id.get(sub.workflow_instance_task_id)
             if sub_instance_name and not workflow_providers.workflow_definition_available(sub_instance_name):
                 continue
-            workflow = repository.load_workflow_instance_by_task_id(db=db, task_id=sub.workflow_instance_task_id)
-            service_workflow.send_event(
-                workflow=workflow,
-                name=message.name,
-                payload=message.data,
+            wf_instance_ids.append(
+                _retry_on_conflict(db=db, work=functools.partial(_deliver_message, db=db, message=message, task_id=sub.workflow_instance_task_id)),
             )
-            service_workflow.run_workflow(workflow=workflow)
-            repository.store_workflow_instance(db=db, workflow=workflow, triggered_by=message.sent_by_user_id)
-
-            wf_instance_ids.append(workflow.task_tree.id)
 
         repository.store_message_processed(db=db, message_id=message.id, processed_by_workflow_instance_ids=wf_instance_ids)
 
 
+def _deliver_message(db: Session, message: WorkflowMessage, task_id: uuid.UUID, for_update: bool) -> uuid.UUID:
+    workflow = repository.load_workflow_instance_by_task_id(db=db, task_id=task_id, for_update=for_update)
+    service_workflow.send_event(
+        workflow=workflow,
+        name=message.name,
+        payload=message.data,
+    )
+    service_workflow.run_workflow(workflow=workflow)
+    repository.store_workflow_instance(db=db, workflow=workflow, triggered_by=message.sent_by_user_id)
+    return workflow.task_tree.id
+
+
+def _fire_time_event(db: Session, wte: TimeEvent, for_update: bool) -> service_workflow.TimeEventResult:
+    # Load aggregate
+    wf = repository.load_workflow_instance(db=db, workflow_id=wte.workflow_instance_id, for_update=for_update)
+
+    # Domain call
+    result: service_workflow.TimeEventResult = service_workflow.process_single_time_event(workflow=wf, wte_record=wte)
+
+    # Persist domain state
+    repository.store_workflow_instance(db=db, workflow=wf)
+    return result
+
+
+def _retry_on_conflict(db: Session, work: Callable[..., T]) -> T:
+    """Runs ``work`` in a savepoint and runs it again when a concurrent change of its
+    workflow instance made storing it fail - for idempotent background work only.
+
+    The retries get ``for_update=True``: they load the instance under the row lock,
+    which reads its latest version and keeps it until the transaction ends."""
+    attempt = 0
+    while True:
+        try:
+            with db.begin_nested():
+                return work(for_update=attempt > 0)
+        except WorkflowInstanceConflictError as error:
+            repository.forget_workflow_instance(db=db, workflow_instance_id=error.workflow_instance_id)
+            if attempt >= settings.workflow_instance_conflict_retries:
+                raise
+            attempt += 1
+            log.info(f"{error}, retrying ({attempt}/{settings.workflow_instance_conflict_retries})")
+
+
 def handle_timeevents(db: Session, *, batch_size: int = 200):
     now = dt_now_naive()
 
@@ -424,14 +468,7 @@ def handle_timeevents(db: Session, *, batch_size: int = 200):
                     seen_orphan_keys.add((wte.workflow_instance_id, wte.timer_task_id))
                     continue
 
-                # Load aggregate
-                wf = repository.load_workflow_instance(db=db, workflow_id=wte.workflow_instance_id)
-
-                # Domain call
-                result: service_workflow.TimeEventResult = service_workflow.process_single_time_event(workflow=wf, wte_record=wte)
-
-                # Persist domain state
-                repository.store_workflow_instance(db=db, workflow=wf)
+                result = _retry_on_conflict(db=db, work=functools.partial(_fire_time_event, db=db, wte=wte))
 
                 # Persist timer record according to outcome
                 if result.outcome == "completed":
@@ -453,9 +490,34 @@ def handle_timeevents(db: Session, *, batch_size: int = 200):
                     repository.mark_timer_completed(db, wte)
 
             except Exception as ex:
+                # The instance may be half-processed; the next event of it has to start from the stored state
+                repository.forget_workflow_instance(db=db, workflow_instance_id=wte.workflow_instance_id)
                 repository.fail_and_release(db, wte, err=str(ex))
 
 
+def collect_dangling_attachments(db: Session, *, batch_size: int, delete_parallelism: int) -> int:
+    """Delete attachments no task, workflow instance or data-model row refers to anymore.
+
+    Works in batches of ``batch_size`` rows, each committed before the stored files of the
+    batch are deleted, so a rolled back batch never loses a file. Returns the number of
+    deleted attachments."""
+    deleted = 0
+    while True:
+        dangling = repository.lock_dangling_attachments(db=db, limit=batch_size)
+        if not dangling:
+            break
+
+        repository.delete_attachment_rows(db=db, attachment_ids=[attachment_id for attachment_id, _ in dangling])
+        db.commit()
+
+        delete_files([path for _, file in dangling if file is not None for path in file["files"]], parallelism=delete_parallelism)
+        deleted += len(dangling)
+
+        if len(dangling) < batch_size:
+            break
+    return deleted
+
+
 def _require_definition_for_write(workflow_name: str) -> None:
     """Guard for write operations on a workflow instance.
 
@@ -746,7 +808,7 @@ def submit_task_data(
     task_data: dict,
     delegate_comment: str | None = None,
 ):
-    workflow = repository.load_workflow_instance_by_task_id(db=db, task_id=task_id)
+    workflow = repository.lock_workflow_instance_by_task_id(db=db, task_id=task_id)
     _require_definition_for_write(workflow.spec.name)
     user = repository.load_user(db=db, user_id=user_id)
     delegation_targets = _get_delegate_targets_for_user(db=db, user_id=user_id)
@@ -835,7 +897,7 @@ def get_allowed_workflows_to_start(db: Session, user_id: uuid.UUID):
 
 
 def assign_task_to_me(db: Session, user_id: uuid.UUID, task_id: uuid.UUID):
-    workflow = repository.load_workflow_instance_by_task_id(db=db, task_id=task_id)
+    workflow = repository.lock_workflow_instance_by_task_id(db=db, task_id=task_id)
     _require_definition_for_write(workflow.spec.name)
     user = repository.load_user(db=db, user_id=user_id)
     assigned_user_id = service_workflow.get_assigned_user(
@@ -866,7 +928,7 @@ def assign_task_to_me(db: Session, user_id: uuid.UUID, task_id: uuid.UUID):
 
 
 def unassign_task_from_me(db: Session, user_id: uuid.UUID, task_id: uuid.UUID):
-    workflow = repository.load_workflow_instance_by_task_id(db=db, task_id=task_id)
+    workflow = repository.lock_workflow_instance_by_task_id(db=db, task_id=task_id)
     _require_definition_for_write(workflow.spec.name)
     task = workflow.get_task_from_id(task_id=task_id)
 
@@ -1058,8 +1120,6 @@ def _delete_unused_attachments(
     task_id: uuid.UUID,
     attachments: list[UploadedAttachmentRepresentation],
 ):
-    delete_ids = []
-
     current_task_attachments_by_task = repository.find_task_attachments_by_task_id(
         db=db,
         task_id=task_id,
@@ -1067,7 +1127,6 @@ def _delete_unused_attachments(
 
     for ca in current_task_attachments_by_task:
         if not any([ga.hash == ca.attachment.hash for ga in attachments]):
-            delete_ids.append(ca.attachment.id)
             db.delete(ca)
 
     current_task_attachments_by_workflow = repository.find_task_attachments_by_worfklow_instance_id(
@@ -1085,15 +1144,9 @@ def _delete_unused_attachments(
             if not any(
                 [ga.attachment.hash == ca.attachment.hash for ga in current_task_attachments_by_workflow],
             ):
-                delete_ids.append(ca.attachment.id)
                 db.delete(ca)
 
-    db.flush()
-
-    delete_ids = list(set(delete_ids))  # remove duplicate entries
-    for deleteid in delete_ids:
-        repository.delete_dangling_attachment(db=db, attachment_id=deleteid)
-
+    # The attachments themselves are removed by the attachment_gc cron task once unreferenced
     db.flush()
 
 
@@ -1459,7 +1512,7 @@ def admin_assign_task_to_user_without_checks(
 
     require_workflow_admin_by_task_id(db=db, user_id=admin_user_id, task_id=task_id)
 
-    workflow = repository.load_workflow_instance_by_task_id(db=db, task_id=task_id)
+    workflow = repository.lock_workflow_instance_by_task_id(db=db, task_id=task_id)
     _require_definition_for_write(workflow.spec.name)
     user = repository.load_user(db=db, user_id=assign_to_user_id)
     if remove_roles:
@@ -1479,7 +1532,7 @@ def admin_assign_task_to_user_without_checks(
 def admin_unassign_task_without_checks(db: Session, admin_user_id: uuid.UUID, task_id: uuid.UUID):
     require_workflow_admin_by_task_id(db=db, user_id=admin_user_id, task_id=task_id)
 
-    workflow = repository.load_workflow_instance_by_task_id(db=db, task_id=task_id)
+    workflow = repository.lock_workflow_instance_by_task_id(db=db, task_id=task_id)
     _require_definition_for_write(workflow.spec.name)
     service_workflow.unassign_task_without_checks(workflow=workflow, task_id=task_id)
     repository.store_workflow_instance(db=db, workflow=workflow)
@@ -1496,5 +1549,20 @@ def admin_get_task_states_per_workflow(db: Session, wf_name: str, admin_user_id:
     return response
 
 
+def admin_get_service_task_statistics(db: Session, admin_user_id: uuid.UUID) -> list[ServiceTaskStatistics]:
+    """The service task numbers of this process (see service_task_profiling) for the workflows the user administrates."""
+    allowed_workflow_names = get_workflow_names_the_user_is_admin_for(db=db, user_id=admin_user_id)
+    return [entry for entry in get_service_task_statistics() if entry.workflow_name in allowed_workflow_names]
+
+
 def admin_get_statistics_graph_timestamps(db: Session) -> ReducedWorkflowInstanceResponse:
     return views.bff_admin_get_graph_workflow_instances(db=db)
+
+
+def admin_get_statistics_graph_buckets(
+    db: Session,
+    bucket: StatisticsBucketSize,
+    date_from: datetime.datetime | None = None,
+    date_to: datetime.datetime | None = None,
+) -> ReducedWorkflowInstanceResponse:
+    return views.bff_admin_get_graph_workflow_instance_buckets(db=db, bucket=bucket, date_from=date_from, date_to=date_to)
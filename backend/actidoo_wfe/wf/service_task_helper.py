@@ -12,6 +12,7 @@ import io
 import json
 import logging
 import re
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from io import BytesIO
 from typing import Callable
@@ -34,13 +35,20 @@ from actidoo_wfe.wf.constants import (
     DATA_KEY_WORKFLOW_INSTANCE_SUBTITLE,
 )
 from actidoo_wfe.wf.exceptions import AttachmentNotFoundException, TaskNotFoundException
-from actidoo_wfe.wf.models import WorkflowInstanceTask, WorkflowInstanceTaskAttachment
+from actidoo_wfe.wf.models import WorkflowInstanceTaskAttachment
+from actidoo_wfe.wf.service_task_profiling import record_io
 from actidoo_wfe.wf.types import Attachment, TaskToUserMapping, UploadedAttachmentRepresentation, UserRepresentation
-from actidoo_wfe.wf.views import get_single_task
 
 log = logging.getLogger(__name__)
 
 
+@contextmanager
+def _io_recording(context_manager):
+    """Records the whole time the handle is open as I/O, as only the caller knows which of its calls do I/O"""
+    with record_io(), context_manager as value:
+        yield value
+
+
 class ServiceTaskHelper:
     # NOTE: We must not use application services here, which load and save the workflow. The workflow is already in a modification state during task execution.
     # Only use service_workflow when modifying the workflow/task state!!!!
@@ -65,6 +73,11 @@ class ServiceTaskHelper:
         self.task_uuid = task_uuid
         self._allowed_data_models: set[str] = allowed_data_models or set()
 
+        # Loaded on first use and kept for this service call, see _tasks_by_bpmn_id(), _task_completed_at() and _task_attachments_by_hash()
+        self._tasks_by_bpmn_id_index: dict[str, Task] | None = None
+        self._completed_at_by_task_id: dict[UUID, datetime | None] | None = None
+        self._attachments_by_hash: dict[str, WorkflowInstanceTaskAttachment] | None = None
+
     def pretty_log(self, json_data: dict, boxed=True):
         """
         Logs the provided JSON data in a formatted/boxed manner.
@@ -79,27 +92,34 @@ class ServiceTaskHelper:
         else:
             log.debug(json_formatted_str)
 
+    def _tasks_by_bpmn_id(self) -> dict[str, Task]:
+        if self._tasks_by_bpmn_id_index is None:
+            index: dict[str, Task] = {}
+            for task in self.workflow.get_tasks():
+                task_spec: BpmnTaskSpec = task.task_spec
+                # the first task in tree order wins, as with the former linear search
+                index.setdefault(task_spec.bpmn_id, task)
+            self._tasks_by_bpmn_id_index = index
+        return self._tasks_by_bpmn_id_index
+
     def get_task(self, bpmn_task_id) -> Task | None:
-        for task in self.workflow.get_tasks():
-            task_spec: BpmnTaskSpec = task.task_spec
-            if task_spec.bpmn_id == bpmn_task_id:
-                return task
-        return None
+        return self._tasks_by_bpmn_id().get(bpmn_task_id)
 
-    def _get_db_task(self, bpmn_task_id) -> WorkflowInstanceTask:
+    def _task_completed_at(self, bpmn_task_id) -> datetime | None:
         spiff_task = self.get_task(bpmn_task_id=bpmn_task_id)
         if not spiff_task:
             raise TaskNotFoundException(f"{bpmn_task_id} not found")
 
-        task_uuid = spiff_task.id
+        if self._completed_at_by_task_id is None:
+            self._completed_at_by_task_id = repository.load_task_completion_times(db=self.db, workflow_instance_id=self.workflow_instance_id)
 
-        db_task = get_single_task(self.db, task_uuid)
-
-        return db_task
+        if spiff_task.id not in self._completed_at_by_task_id:
+            raise TaskNotFoundException(f"{bpmn_task_id} not stored yet")
+        return self._completed_at_by_task_id[spiff_task.id]
 
     def get_task_completion_day(self, bpmn_task_id) -> str:
         try:
-            datetime_obj = self._get_db_task(bpmn_task_id).completed_at
+            datetime_obj = self._task_completed_at(bpmn_task_id)
             # timing problem: "completed_at" may not be written into the database, yet.
             # Use now() in such a case.:
             if not datetime_obj:
@@ -118,7 +138,7 @@ class ServiceTaskHelper:
 
     def get_task_completion_datetime(self, bpmn_task_id) -> str:
         try:
-            datetime_obj = self._get_db_task(bpmn_task_id).completed_at.replace(tzinfo=timezone.utc)  # timedate.replace will make the object timezone-aware
+            datetime_obj = self._task_completed_at(bpmn_task_id).replace(tzinfo=timezone.utc)  # timedate.replace will make the object timezone-aware
             datetime_obj = datetime_obj.astimezone(ZoneInfo("Europe/Berlin"))
 
             # Format the date
@@ -135,12 +155,13 @@ class ServiceTaskHelper:
         recipient_or_recipients_list: list[str] | str,
         attachments: dict[str, io.BytesIO],
     ):
-        return mail_helpers.send_text_mail(
-            subject=subject,
-            content=content,
-            recipient_or_recipients_list=recipient_or_recipients_list,
-            attachments=attachments,
-        )
+        with record_io():
+            return mail_helpers.send_text_mail(
+                subject=subject,
+                content=content,
+                recipient_or_recipients_list=recipient_or_recipients_list,
+                attachments=attachments,
+            )
 
     def get_user_by_id(self, user_id):
         if user_id is None:
@@ -220,26 +241,31 @@ class ServiceTaskHelper:
 
         return user_rep
 
-    def get_attachment_by_hash(self, hash):
+    def _task_attachments_by_hash(self) -> dict[str, WorkflowInstanceTaskAttachment]:
+        if self._attachments_by_hash is None:
+            attachments = repository.find_task_attachments_by_worfklow_instance_id(
+                db=self.db,
+                workflow_instance_id=self.workflow_instance_id,
+            )
+            self._attachments_by_hash = {}
+            for attachment in attachments:
+                self._attachments_by_hash.setdefault(attachment.attachment.hash, attachment)
+        return self._attachments_by_hash
 
-        attachments = repository.find_task_attachments_by_worfklow_instance_id(
-            db=self.db,
-            workflow_instance_id=self.workflow_instance_id,
-        )
-        att: WorkflowInstanceTaskAttachment | None = next(
-            (a for a in attachments if a.attachment.hash == hash),
-            None,
-        )
+    def get_attachment_by_hash(self, hash):
+        att: WorkflowInstanceTaskAttachment | None = self._task_attachments_by_hash().get(hash)
         if att is None:
             raise AttachmentNotFoundException()
         if not att.attachment.file:
             raise RuntimeError(f"Attachment content missing for hash={hash}")
+        with record_io():
+            data = get_file_content(att.attachment.file.file_id)
         return Attachment(
             id=att.id,
             hash=att.attachment.hash,
             filename=att.filename,
             mimetype=att.attachment.mimetype,
-            data=get_file_content(att.attachment.file.file_id),
+            data=data,
         )
 
     def attach_files(self, row, field_name: str, files) -> None:
@@ -357,12 +383,7 @@ class ServiceTaskHelper:
             service_workflow,
         )
 
-        found_task = None
-        for task in self.workflow.get_tasks():
-            task_spec: BpmnTaskSpec = task.task_spec
-            if task_spec.bpmn_id == bpmn_task_id:
-                found_task = task
-                break
+        found_task = self.get_task(bpmn_task_id)
         assert found_task is not None
         return service_workflow.get_options_detailed_for_property(workflow=self.workflow, task_id=found_task.id, property_path=property_path, form_data=None)
 
@@ -464,7 +485,7 @@ class ServiceTaskHelper:
         """
         from actidoo_wfe.connectors import get_connector
 
-        return get_connector(type_name=type_name, instance_name=instance_name)
+        return _io_recording(get_connector(type_name=type_name, instance_name=instance_name))
 
     def get_model(self, model_name: str) -> type:
         """Return the SQLAlchemy model class for a declared data model.
@@ -499,13 +520,14 @@ class ServiceTaskHelper:
         hasher.update(data)
         hash = hasher.hexdigest()
 
-        attachment = repository.store_attachment(
-            db=db,
-            filename=filename,
-            mimetype=mimetype,
-            data=data,
-            hash=hash,
-        )
+        with record_io():
+            attachment = repository.store_attachment(
+                db=db,
+                filename=filename,
+                mimetype=mimetype,
+                data=data,
+                hash=hash,
+            )
         repository.store_attachment_for_workflow_instance(
             db=db,
             workflow_instance_id=workflow.task_tree.id,
@@ -518,6 +540,7 @@ class ServiceTaskHelper:
             attachment_id=attachment.id,
             filename=filename,
         )
+        self._attachments_by_hash = None
 
         return UploadedAttachmentRepresentation(
             hash=hash,
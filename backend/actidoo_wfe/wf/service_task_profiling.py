@@ -0,0 +1,163 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+"""Optional instrumentation of the service task calls (``settings.service_task_profiling``).
+
+A call of a service function is timed together with the database statements it issued and
+the outbound I/O the ServiceTaskHelper recorded for it (mails, attachment storage,
+connectors). I/O time is the time spent inside the recorded blocks minus their database
+statements; for connectors that is the whole time a handle was open, including the code
+the service function ran with it. The numbers are summed up per workflow and service function in this process,
+see get_service_task_statistics(). Calls slower than ``service_task_slow_log_seconds`` are
+logged with their numbers; with ``service_task_cprofile_dir`` set, every call also runs
+under cProfile and its stats are dumped there.
+"""
+
+import cProfile
+import datetime
+import logging
+import pathlib
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from actidoo_wfe.settings import settings
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class ServiceTaskStatistics:
+    workflow_name: str
+    service_name: str
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    db_statements: int = 0
+    db_seconds: float = 0.0
+    io_calls: int = 0
+    # Time inside record_io() blocks without their database statements, see the module docstring
+    io_seconds: float = 0.0
+
+
+@dataclass
+class _RunningCall:
+    db_statements: int = 0
+    db_seconds: float = 0.0
+    io_calls: int = 0
+    io_seconds: float = 0.0
+
+
+# The call running in the current thread, if it is profiled
+_local = threading.local()
+
+_statistics: dict[tuple[str, str], ServiceTaskStatistics] = {}
+_statistics_lock = threading.Lock()
+
+_db_hooks_installed = False
+_db_hooks_lock = threading.Lock()
+
+
+def _running_call() -> _RunningCall | None:
+    return getattr(_local, "call", None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _running_call() is not None:
+        conn.info.setdefault("service_task_statement_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("service_task_statement_started")
+    call = _running_call()
+    if call is None or not started:
+        return
+    call.db_statements += 1
+    call.db_seconds += time.perf_counter() - started.pop()
+
+
+def _install_db_hooks():
+    global _db_hooks_installed
+    with _db_hooks_lock:
+        if not _db_hooks_installed:
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            _db_hooks_installed = True
+
+
+@contextmanager
+def record_io():
+    """Counts the wrapped block as outbound I/O of the running service call.
+
+    Database statements issued in the block count as database time only."""
+    call = _running_call()
+    if call is None:
+        yield
+        return
+    started = time.perf_counter()
+    db_seconds_before = call.db_seconds
+    try:
+        yield
+    finally:
+        call.io_calls += 1
+        call.io_seconds += max(0.0, time.perf_counter() - started - (call.db_seconds - db_seconds_before))
+
+
+@contextmanager
+def profile_service_call(workflow_name: str, service_name: str):
+    """Wraps the call of the service function ``service_name`` of ``workflow_name``."""
+    if not settings.service_task_profiling:
+        yield
+        return
+
+    _install_db_hooks()
+    outer_call = _running_call()
+    call = _local.call = _RunningCall()
+    profiler = cProfile.Profile() if settings.service_task_cprofile_dir else None
+    started = time.perf_counter()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        seconds = time.perf_counter() - started
+        _local.call = outer_call
+
+        with _statistics_lock:
+            statistics = _statistics.get((workflow_name, service_name))
+            if statistics is None:
+                statistics = _statistics[(workflow_name, service_name)] = ServiceTaskStatistics(workflow_name=workflow_name, service_name=service_name)
+            statistics.calls += 1
+            statistics.seconds += seconds
+            statistics.max_seconds = max(statistics.max_seconds, seconds)
+            statistics.db_statements += call.db_statements
+            statistics.db_seconds += call.db_seconds
+            statistics.io_calls += call.io_calls
+            statistics.io_seconds += call.io_seconds
+
+        if seconds >= settings.service_task_slow_log_seconds:
+            log.warning(
+                f"Slow service task: workflow={workflow_name} service={service_name} seconds={seconds:.3f} "
+                f"db_statements={call.db_statements} db_seconds={call.db_seconds:.3f} io_calls={call.io_calls} io_seconds={call.io_seconds:.3f}"
+            )
+
+        if profiler is not None:
+            timestamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+            path = pathlib.Path(settings.service_task_cprofile_dir) / f"{workflow_name}.{service_name}.{timestamp}.prof"
+            try:
+                profiler.dump_stats(path)
+            except OSError:
+                log.exception(f"Could not write the profile of service task {service_name} to {path}")
+
+
+def get_service_task_statistics() -> list[ServiceTaskStatistics]:
+    """The numbers summed up since the start of this process, slowest service functions first."""
+    with _statistics_lock:
+        statistics = [replace(entry) for entry in _statistics.values()]
+    return sorted(statistics, key=lambda entry: entry.seconds, reverse=True)
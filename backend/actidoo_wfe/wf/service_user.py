@@ -136,6 +136,8 @@ def assign_roles(db: Session, user_id: uuid.UUID, role_names: List[str]):
         )
 
     db.flush()
+    if to_add or to_delete:
+        repository.sync_user_inbox_roles(db=db, user_id=user.id)
     db.expire(user)
 
 
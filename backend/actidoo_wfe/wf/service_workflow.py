@@ -12,11 +12,13 @@ import collections
 from dataclasses import dataclass
 import datetime
 import logging
+import time
 import traceback
 import uuid
 from copy import deepcopy
-from functools import cache
-from typing import Any, Generator, List, Literal
+import weakref
+from functools import lru_cache, wraps
+from typing import Any, Callable, Generator, List, Literal, TypeVar
 
 from pydantic import BaseModel, Field
 from SpiffWorkflow.bpmn import BpmnEvent, BpmnWorkflow
@@ -64,6 +66,7 @@ from actidoo_wfe.wf.service_form import (
     validate_task_data,
 )
 from actidoo_wfe.wf.spiff_customized import (
+    MyScriptEngine,
     get_parser,
     get_script_engine,
     get_serializer,
@@ -140,6 +143,85 @@ def dump(workflow: BpmnWorkflow):
     # return json.dumps(dct, indent=2, separators=(", ", ": "))
 
 
+class TaskIndex:
+    """The tasks of a workflow (including those of its subprocesses), indexed by id,
+    state and lane in one pass over the task tree.
+
+    ``workflow.get_task_from_id`` asks every subprocess in turn and ``workflow.get_tasks``
+    walks the whole tree, so helpers asking per task made rendering a task list quadratic
+    in the number of tasks. Get the index with ``get_task_index``; functions changing
+    the task tree are wrapped in ``_changes_tasks``, which drops it.
+    """
+
+    def __init__(self, workflow: BpmnWorkflow):
+        self.tasks: list[Task] = workflow.get_tasks()
+        self.lane_mapping: dict[str, dict] = get_lane_mapping(workflow=workflow)
+        self._by_id: dict[uuid.UUID, Task] = {}
+        self._position: dict[uuid.UUID, int] = {}
+        self._by_state: dict[int, list[Task]] = collections.defaultdict(list)
+        self._by_lane: dict[str | None, list[Task]] = collections.defaultdict(list)
+        for position, task in enumerate(self.tasks):
+            self._by_id[task.id] = task
+            self._position[task.id] = position
+            self._by_state[task.state].append(task)
+            self._by_lane[task.task_spec.lane].append(task)
+
+    def get(self, task_id: uuid.UUID) -> Task | None:
+        return self._by_id.get(task_id)
+
+    def with_state(self, state: int) -> list[Task]:
+        """The tasks in one of the states of the ``state`` mask, in task tree order."""
+        tasks = [task for task_state, tasks in self._by_state.items() if task_state & state for task in tasks]
+        tasks.sort(key=lambda task: self._position[task.id])
+        return tasks
+
+    def in_lane(self, lane: str | None) -> list[Task]:
+        return self._by_lane.get(lane, [])
+
+
+_task_indexes: "weakref.WeakKeyDictionary[BpmnWorkflow, TaskIndex]" = weakref.WeakKeyDictionary()
+
+
+def get_task_index(workflow: BpmnWorkflow) -> TaskIndex:
+    index = _task_indexes.get(workflow)
+    if index is None:
+        index = _task_indexes[workflow] = TaskIndex(workflow)
+    return index
+
+
+def _forget_task_index(workflow: BpmnWorkflow):
+    _task_indexes.pop(workflow, None)
+    if isinstance(workflow.script_engine, MyScriptEngine):
+        workflow.script_engine.forget_task_to_user_mappings()
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _changes_tasks(func: F) -> F:
+    """Marks a function that runs tasks or otherwise changes the task tree of its ``workflow``:
+    the task index and the task-to-user mapping of the service calls are rebuilt on their next use."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        workflow = kwargs["workflow"] if "workflow" in kwargs else args[0]
+        _forget_task_index(workflow)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _forget_task_index(workflow)
+
+    return wrapper  # type: ignore
+
+
+def _get_task(workflow: BpmnWorkflow, task_id: uuid.UUID) -> Task:
+    task = get_task_index(workflow).get(task_id)
+    if task is None:
+        # Unknown to the index: let SpiffWorkflow look it up, or raise TaskNotFoundException
+        task = workflow.get_task_from_id(task_id)
+    return task
+
+
 def get_unfinished_tasks(workflow: BpmnWorkflow):
     return workflow.get_tasks(task_filter=TaskFilter(state=TaskState.NOT_FINISHED_MASK))
 
@@ -148,46 +230,135 @@ def get_faulty_tasks(workflow: BpmnWorkflow):
     # See comment in get_completed_usertasks(): for BPMN workflows, querying FINISHED-like states
     # via Spiff's task iterator can miss tasks inside subprocesses. We therefore scan all tasks
     # and filter explicitly.
-    return [t for t in workflow.get_tasks() if t.has_state(TaskState.ERROR)]
+    return get_task_index(workflow).with_state(TaskState.ERROR)
+
+
+def _ready_engine_tasks(workflow: BpmnWorkflow) -> list[Task]:
+    return workflow.get_tasks(task_filter=TaskFilter(state=TaskState.READY, manual=False))
 
 
+def _newly_ready_engine_tasks(task: Task) -> Generator[Task, None, None]:
+    """Yields the engine tasks that became ready by running ``task``.
+
+    Children that completed right away (e.g. gateways passed through) are descended into.
+    Tasks made ready elsewhere in the tree (joins, subprocesses, events) are not found here,
+    run_workflow picks them up with a full scan once its queue is empty."""
+    stack = list(reversed(task.children))
+    while stack:
+        child = stack.pop()
+        if child.state == TaskState.READY:
+            if not child.task_spec.manual:
+                yield child
+        elif child.state == TaskState.COMPLETED:
+            stack.extend(reversed(child.children))
+
+
+def _run_task(task: Task):
+    """``task.run()``, evaluating the FEEL data references of the task only once"""
+    script_engine = task.workflow.script_engine
+    if isinstance(script_engine, MyScriptEngine):
+        with script_engine.task_execution():
+            return task.run()
+    return task.run()
+
+
+def _run_engine_task(workflow: BpmnWorkflow, task: Task) -> bool:
+    set_stacktrace(
+        workflow=workflow,
+        task_id=task.id,
+        stacktrace=None,
+    )  # reset stacktrace
+    try:
+        success = _run_task(task)
+        if not success:
+            task.error()
+            log.exception("task failed")  # TODO no error code is returned
+        return bool(success)
+    except Exception as error:  # WorkflowTaskException("Error evaluating expression '=optional_approver1 != null'")
+        log.exception(
+            f"{type(error).__name__}: {error.args}"
+        )  # TODO the exception/args is often very descriptive, but the information is not re-raised, only a bool gets return and the Exception info is lost....
+        task.error()
+        s_traceback = traceback.format_exc()
+        set_stacktrace(
+            workflow=workflow,
+            task_id=task.id,
+            stacktrace=s_traceback,
+        )
+        log.exception("task failed")  # TODO no error code is returned
+        return False
+
+
+@_changes_tasks
 def run_workflow(workflow: BpmnWorkflow):
-    """Runs all possible tasks and finally auto-assigns if possible"""
+    """Runs all possible tasks and finally auto-assigns if possible
+
+    The tasks made ready by a task are queued right after it ran, the whole tree is only scanned
+    again (after refreshing the waiting tasks) when the queue ran empty. At most
+    ``settings.workflow_engine_max_steps`` tasks are run; the next one is then marked erroneous."""
 
     # TODO: This logic could be moved to application service, as we might want to persist after each step?!?
 
+    result = True
     if not workflow.is_completed():
-        engine_tasks = [t for t in workflow.get_tasks(task_filter=TaskFilter(state=TaskState.READY, manual=False))]
-        result = True
-        while len(engine_tasks) > 0:
-            for task in engine_tasks:
-                set_stacktrace(
-                    workflow=workflow,
-                    task_id=task.id,
-                    stacktrace=None,
-                )  # reset stacktrace
-                try:
-                    success = task.run()
-                    if not success:
-                        result = False
-                        task.error()
-                        log.exception("task failed")  # TODO no error code is returned
-                except Exception as error:  # WorkflowTaskException("Error evaluating expression '=optional_approver1 != null'")
-                    log.exception(
-                        f"{type(error).__name__}: {error.args}"
-                    )  # TODO the exception/args is often very descriptive, but the information is not re-raised, only a bool gets return and the Exception info is lost....
+        run_started = time.perf_counter()
+        scan_seconds = 0.0
+        # task spec name -> [runs, seconds]
+        task_timings: dict[str, list] = collections.defaultdict(lambda: [0, 0.0])
+        steps = 0
+
+        queue: collections.deque[Task] = collections.deque(_ready_engine_tasks(workflow))
+        queued_ids = {task.id for task in queue}
+        while queue:
+            task = queue.popleft()
+            queued_ids.discard(task.id)
+            if task.state != TaskState.READY:
+                # already run, cancelled or errored by one of the tasks before
+                pass
+            elif steps >= settings.workflow_engine_max_steps:
+                message = f"Stopped after {steps} engine tasks in one run (workflow_engine_max_steps), the process probably loops."
+                log.warning(f"{message} Marking task {task.task_spec.name} ({task.id}) erroneous.")
+                task.error()
+                set_stacktrace(workflow=workflow, task_id=task.id, stacktrace=message)
+                result = False
+                break
+            else:
+                steps += 1
+                task_started = time.perf_counter()
+                if not _run_engine_task(workflow, task):
                     result = False
-                    task.error()
-                    s_traceback = traceback.format_exc()
-                    set_stacktrace(
-                        workflow=workflow,
-                        task_id=task.id,
-                        stacktrace=s_traceback,
-                    )
-                    log.exception("task failed")  # TODO no error code is returned
-
-            workflow.refresh_waiting_tasks()
-            engine_tasks = [t for t in workflow.get_tasks(task_filter=TaskFilter(state=TaskState.READY, manual=False))]
+                # The task tree changed: an index built while the task ran (e.g. by assigning a task) is stale for the
+                # next one. The task-to-user mapping is kept for the whole run, assignments are applied to it as they happen.
+                _task_indexes.pop(workflow, None)
+                timing = task_timings[task.task_spec.name]
+                timing[0] += 1
+                timing[1] += time.perf_counter() - task_started
+
+                for ready_task in _newly_ready_engine_tasks(task):
+                    if ready_task.id not in queued_ids:
+                        queued_ids.add(ready_task.id)
+                        queue.append(ready_task)
+
+            if not queue:
+                scan_started = time.perf_counter()
+                workflow.refresh_waiting_tasks()
+                queue.extend(_ready_engine_tasks(workflow))
+                queued_ids = {ready_task.id for ready_task in queue}
+                scan_seconds += time.perf_counter() - scan_started
+
+        run_seconds = time.perf_counter() - run_started
+        log.log(
+            logging.INFO if run_seconds >= settings.workflow_engine_slow_run_seconds else logging.DEBUG,
+            "Workflow %s ran %d engine tasks in %.3fs (%.3fs scanning for ready tasks): %s",
+            workflow.spec.name,
+            steps,
+            run_seconds,
+            scan_seconds,
+            ", ".join(
+                f"{name} {runs}x {seconds:.3f}s"
+                for name, (runs, seconds) in sorted(task_timings.items(), key=lambda item: item[1][1], reverse=True)
+            ),
+        )
 
     auto_assign_all_tasks_in_initiator_lane(workflow=workflow)
     cleanup_hidden_fields_for_ready_tasks(workflow=workflow)
@@ -281,6 +452,7 @@ def update(dest, upd):
         raise error
 
 
+@_changes_tasks
 def execute_user_task(
     workflow: BpmnWorkflow,
     user: UserRepresentation,
@@ -290,7 +462,7 @@ def execute_user_task(
     delegate_comment: str | None = None,
 ):
     """Runs a user task, afterwards proceeds with run_workflow"""
-    task: Task = workflow.get_task_from_id(task_id)
+    task: Task = _get_task(workflow, task_id)
 
     # Ensure the acting user is either the assignee or the delegate.
     assert is_assigned_to_task(workflow=workflow, task_id=task.id, user_id=user.id) or is_delegate_assigned_to_task(workflow=workflow, task_id=task.id, user_id=user.id)
@@ -320,7 +492,7 @@ def execute_user_task(
         stacktrace=None,
     )  # reset stacktrace
 
-    result = task.run()
+    result = _run_task(task)
     logging.debug(result)
 
     effective_principal_id = acting_user_id or user.id
@@ -343,14 +515,12 @@ def get_completed_usertasks(workflow: BpmnWorkflow) -> list[Task]:
     # descend into completed subprocesses when filtering for FINISHED states (COMPLETED/ERROR/CANCELLED).
     # Completed user tasks inside Multi-Instance and CallActivity subprocesses would be skipped.
     # We therefore iterate all tasks (incl. subprocesses) and filter manually.
-    tasks = workflow.get_tasks()
-    return [t for t in tasks if t.task_spec.manual and t.has_state(TaskState.COMPLETED)]
+    return [t for t in get_task_index(workflow).with_state(TaskState.COMPLETED) if t.task_spec.manual]
 
 
 def get_ready_and_waiting_usertasks(workflow: BpmnWorkflow) -> list[Task]:
     """Returns the usertasks which are ready or waiting (and manual)"""
-    tasks = workflow.get_tasks(task_filter=TaskFilter(state=TaskState.READY | TaskState.WAITING))
-    return [t for t in tasks if t.task_spec.manual]
+    return [t for t in get_task_index(workflow).with_state(TaskState.READY | TaskState.WAITING) if t.task_spec.manual]
 
 
 def get_usertasks_for_user(
@@ -366,6 +536,7 @@ def get_usertasks_for_user(
     if "completed" in state:
         tasks.extend(get_completed_usertasks(workflow=workflow))
 
+    created_by_id = get_created_by_id(workflow=workflow)
     available_tasks: list[UserTaskWithoutNestedAssignedUserRepresentation] = []
     for task in tasks:
         assigned_user_id = get_assigned_user(workflow=workflow, task_id=task.id)
@@ -392,7 +563,6 @@ def get_usertasks_for_user(
             workflow=workflow,
             lane_name=task.task_spec.lane,
         )
-        created_by_id = get_created_by_id(workflow=workflow)
 
         delegate_target_access = delegation_targets is not None and assigned_user_id is not None and assigned_user_id in delegation_targets
         delegate_assignment_possible = delegate_target_access and task.has_state(TaskState.READY) and assigned_delegate_user_id is None
@@ -403,8 +573,6 @@ def get_usertasks_for_user(
             assigned or len(task_roles & user.roles) > 0 or (lane_is_initiator and user.id == created_by_id) or assigned_as_delegate or delegate_target_access or completed_for_user
         )
 
-        assigned_user_id = get_assigned_user(workflow=workflow, task_id=task.id)
-
         if task_is_available_for_this_user:
             formspec = get_react_json_schema_form_data(task=task)
             if formspec is None:
@@ -460,6 +628,7 @@ def get_waiting_events(workflow: BpmnWorkflow) -> List[MessageEventDefinitionRep
     ]
 
 
+@_changes_tasks
 def send_event(workflow: BpmnWorkflow, name: str, payload: dict):
     # We need to construct the MessageEventDefinition class from the "camunda" package.
     # The "catches" check compares the classes (this event definition == event definition in bpmn file)
@@ -481,7 +650,7 @@ def send_event(workflow: BpmnWorkflow, name: str, payload: dict):
         raise WorkflowException(f"This process is not waiting for {bpmn_event.event_definition.name}")
     for task in tasks:
         task.task_spec.catch(task, bpmn_event)
-        task.run()
+        _run_task(task)
 
     workflow.refresh_waiting_tasks()
 
@@ -508,8 +677,7 @@ def _get_workflow_functions_env(workflow_name: str) -> dict[str, Any]:
 
 def get_allowed_workflow_names_to_start(user: UserRepresentation) -> Generator[str, Any, None]:
     """Returns a list of all possible workflow names, the user may start"""
-    for folder in workflow_providers.iter_workflow_directories():
-        name = folder.name
+    for name in workflow_providers.iter_workflow_names():
         if name in settings.workflows or in_test() or "__ALL__" in settings.workflows:
             if user_may_start_workflow(name=name, user=user):
                 yield name
@@ -517,23 +685,71 @@ def get_allowed_workflow_names_to_start(user: UserRepresentation) -> Generator[s
 
 def get_all_activated_workflow_names() -> Generator[str, Any, None]:
     """Returns a list of all activated workflow names"""
-    for folder in workflow_providers.iter_workflow_directories():
-        name = folder.name
+    for name in workflow_providers.iter_workflow_names():
         if name in settings.workflows or in_test() or "__ALL__" in settings.workflows:
             yield name
 
 
-@cache
-def get_workflow_title_cached(name: str, locale: str | None = None):
+# Bound of the workflow metadata cache, in workflow definitions
+WORKFLOW_METADATA_CACHE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class WorkflowMetadata:
+    """What the functions below read from the definition of a workflow, taken from a single parse."""
+
+    loadable: bool
+    title: str | None = None
+    saved_minutes_per_instance: int = 10
+    owner: str | None = None
+    # "initiator" property of the first lane having one; False if the lanes could not be read
+    initiator: list[str] | bool | None = False
+
+
+def _workflow_revision(name: str) -> int:
+    entry = workflow_providers.get_workflow_index_entry(name)
+    return entry.revision if entry is not None else workflow_providers.registry.generation
+
+
+def get_workflow_metadata(name: str) -> WorkflowMetadata:
+    """The metadata of the current definition of the workflow. It is parsed again only after its files changed."""
     assert name is not None and name != ""
+    return _load_workflow_metadata(name, _workflow_revision(name))
 
+
+@lru_cache(maxsize=WORKFLOW_METADATA_CACHE_SIZE)
+def _load_workflow_metadata(name: str, revision: int) -> WorkflowMetadata:
     try:
         process = load_process_from_file(name=name)
-        raw_title = process.spec.description
-    except Exception:
-        log.exception(f"Cannot get workflow title (description) for workflow {name}")
+        title = process.spec.description
+        custom_props = process.spec.custom_props
+    except Exception as error:
+        log.error(f"load_process_from_file({name}): {type(error).__name__}: {error.args}. Raised in load_process_from_file({name})")
+        return WorkflowMetadata(loadable=False)
+
+    try:
+        lane_mapping = get_lane_mapping(workflow=process)
+        initiator = next((v.get("initiator") for v in lane_mapping.values() if v.get("initiator", None) is not None), None)
+    except Exception as error:
+        log.error(f"Cannot read the lanes of workflow {name}: {type(error).__name__}: {error.args}")
+        initiator = False
+
+    return WorkflowMetadata(
+        loadable=True,
+        title=title,
+        saved_minutes_per_instance=custom_props.get("statistics_saved_minutes", 10),
+        owner=custom_props.get("wf-owner", None),
+        initiator=initiator,
+    )
+
+
+@lru_cache(maxsize=WORKFLOW_METADATA_CACHE_SIZE * 4)
+def _get_workflow_title(name: str, revision: int, locale: str | None) -> str | None:
+    metadata = _load_workflow_metadata(name, revision)
+    if not metadata.loadable:
         return name
 
+    raw_title = metadata.title
     if not locale or not raw_title:
         return raw_title
 
@@ -548,19 +764,20 @@ def get_workflow_title_cached(name: str, locale: str | None = None):
         return raw_title
 
 
-@cache
-def get_workflow_saved_minutes_per_instance_cached(name: str) -> int:
+def clear_workflow_metadata_cache() -> None:
+    _load_workflow_metadata.cache_clear()
+    _get_workflow_title.cache_clear()
+
+
+def get_workflow_title_cached(name: str, locale: str | None = None):
     assert name is not None and name != ""
+    return _get_workflow_title(name, _workflow_revision(name), locale)
 
-    try:
-        process = load_process_from_file(name=name)
-        return process.spec.custom_props.get("statistics_saved_minutes", 10)
-    except Exception:
-        log.exception(f"Cannot get workflow custom property statistics_saved_minutes (statistics_saved_minutes) for workflow {name}")
-        return 10
+
+def get_workflow_saved_minutes_per_instance_cached(name: str) -> int:
+    return get_workflow_metadata(name).saved_minutes_per_instance
 
 
-@cache
 def get_workflow_owner(name: str):
     """Fetches the value of the custom property 'wf-owner'.
 
@@ -569,18 +786,8 @@ def get_workflow_owner(name: str):
 
     Returns:
         str | None: The owner role of the workflow if defined, otherwise None.
-
-    Raises:
-        Exception: Logs an error if there is an issue loading the workflow.
     """
-    assert name is not None and name != ""
-
-    try:
-        process = load_process_from_file(name=name)
-        return process.spec.custom_props.get("wf-owner", None)
-    except Exception:
-        log.error(f"Cannot get workflow custom property wf-owner for workflow {name}")
-        return None
+    return get_workflow_metadata(name).owner
 
 
 def get_wf_owner_role_to_workflow_mapping():
@@ -602,29 +809,12 @@ def get_wf_owner_role_to_workflow_mapping():
     return role_to_workflow_map
 
 
-@cache
 def can_load_workflow(name):
-    try:
-        load_process_from_file(name=name)
-    except Exception as error:
-        log.error(f"load_process_from_file({name}): {type(error).__name__}: {error.args}. Raised in load_process_from_file({name})")
-        return False
-    else:
-        return True
+    return get_workflow_metadata(name).loadable
 
 
-@cache
 def get_initiator_property_cached(name: str) -> list[str] | bool | None:
-
-    assert name is not None and name != ""
-
-    try:
-        workflow = load_process_from_file(name=name)
-        lane_mapping = get_lane_mapping(workflow=workflow)
-        return next((v.get("initiator") for k, v in lane_mapping.items() if v.get("initiator", None) is not None), None)
-    except Exception as error:
-        log.error(f"get_initiator_property_cached({name}): {type(error).__name__}: {error.args}")
-        return False
+    return get_workflow_metadata(name).initiator
 
 
 def get_created_by_id(workflow: BpmnWorkflow) -> uuid.UUID | None:
@@ -642,7 +832,7 @@ def get_assigned_user(
     workflow: BpmnWorkflow,
     task_id: uuid.UUID,
 ) -> uuid.UUID | None:
-    task: Task = workflow.get_task_from_id(task_id)
+    task: Task = _get_task(workflow, task_id)
     assigned_user_id: str | None = task._get_internal_data(
         name=INTERNAL_DATA_KEY_ASSIGNED_USER,
         default=None,
@@ -655,7 +845,7 @@ def get_assigned_delegate_user(
     workflow: BpmnWorkflow,
     task_id: uuid.UUID,
 ) -> uuid.UUID | None:
-    task: Task = workflow.get_task_from_id(task_id)
+    task: Task = _get_task(workflow, task_id)
     delegate_user_id: str | None = task._get_internal_data(
         name=INTERNAL_DATA_KEY_ASSIGNED_DELEGATE_USER,
         default=None,
@@ -675,7 +865,7 @@ def is_assigned_to_task(workflow: BpmnWorkflow, task_id: uuid.UUID, user_id: uui
 
 def is_task_completed(workflow: BpmnWorkflow, task_id: uuid.UUID) -> bool:
     """Returns whether the task is completed (domain helper for external callers)."""
-    task = workflow.get_task_from_id(task_id=task_id)
+    task = _get_task(workflow, task_id)
     return task.has_state(TaskState.COMPLETED)
 
 
@@ -692,7 +882,7 @@ def get_completed_by_user(
     workflow: BpmnWorkflow,
     task_id: uuid.UUID,
 ) -> uuid.UUID | None:
-    task: Task = workflow.get_task_from_id(task_id)
+    task: Task = _get_task(workflow, task_id)
     completed_by_id: str | None = task._get_internal_data(
         name=INTERNAL_DATA_KEY_COMPLETED_BY_USER,
         default=None,
@@ -704,7 +894,7 @@ def get_completed_by_delegate_user(
     workflow: BpmnWorkflow,
     task_id: uuid.UUID,
 ) -> uuid.UUID | None:
-    task: Task = workflow.get_task_from_id(task_id)
+    task: Task = _get_task(workflow, task_id)
     delegate_id: str | None = task._get_internal_data(
         name=INTERNAL_DATA_KEY_COMPLETED_BY_DELEGATE_USER,
         default=None,
@@ -713,10 +903,16 @@ def get_completed_by_delegate_user(
 
 
 def get_delegate_submit_comment(workflow: BpmnWorkflow, task_id: uuid.UUID) -> str | None:
-    task: Task = workflow.get_task_from_id(task_id)
+    task: Task = _get_task(workflow, task_id)
     return task._get_internal_data(name=INTERNAL_DATA_KEY_DELEGATE_COMMENT, default=None)
 
 
+def _assigned_user_changed(task: Task):
+    script_engine = task.workflow.script_engine
+    if isinstance(script_engine, MyScriptEngine):
+        script_engine.update_task_to_user_mapping(task)
+
+
 def assign_task(
     workflow: BpmnWorkflow,
     task_id: uuid.UUID,
@@ -751,12 +947,14 @@ def assign_task(
     if assigned_user_id is not None and assigned_user_id != user.id:
         raise TaskAlreadyAssignedToDifferentUserException()
 
-    workflow.get_task_from_id(task_id=task.id)._set_internal_data(
+    assigned_task = _get_task(workflow, task.id)
+    assigned_task._set_internal_data(
         **{
             INTERNAL_DATA_KEY_ASSIGNED_USER: str(user.id),
             INTERNAL_DATA_KEY_ASSIGNED_DELEGATE_USER: (str(delegate_user.id) if delegate_user else None),
         },
     )
+    _assigned_user_changed(assigned_task)
 
 
 def assign_task_without_checks(
@@ -766,34 +964,36 @@ def assign_task_without_checks(
 ):
     """We want to assign a (future) task from a script and do not want to perform additional checks"""
 
-    task: Task | None = next((t for t in workflow.get_tasks() if t.id == task_id), None)
+    # A task created by the running script is not indexed yet
+    task: Task | None = get_task_index(workflow).get(task_id) or next((t for t in workflow.get_tasks() if t.id == task_id), None)
 
     if task is None:
         raise TaskNotFoundException(
             message="A task with the given id has not been found",
         )
 
-    workflow.get_task_from_id(task_id=task.id)._set_internal_data(
+    task._set_internal_data(
         **{
             INTERNAL_DATA_KEY_ASSIGNED_USER: str(user_id),
             INTERNAL_DATA_KEY_ASSIGNED_DELEGATE_USER: None,
         },
     )
+    _assigned_user_changed(task)
 
 
 def unassign_delegate_from_task(workflow: BpmnWorkflow, task_id: uuid.UUID):
-    task: Task = workflow.get_task_from_id(task_id)
+    task: Task = _get_task(workflow, task_id)
     task._set_internal_data(**{INTERNAL_DATA_KEY_ASSIGNED_DELEGATE_USER: None})
 
 
 def set_allow_unassign(workflow: BpmnWorkflow, task_id: uuid.UUID):
-    workflow.get_task_from_id(task_id=task_id)._set_internal_data(
+    _get_task(workflow, task_id)._set_internal_data(
         **{INTERNAL_DATA_KEY_ALLOW_UNASSIGN: True},
     )
 
 
 def can_be_unassigned(workflow: BpmnWorkflow, task_id: uuid.UUID):
-    task = workflow.get_task_from_id(task_id=task_id)
+    task = _get_task(workflow, task_id)
     if task.has_state(TaskState.COMPLETED):
         return False
 
@@ -806,7 +1006,7 @@ def _get_custom_props(task):
 
 
 def can_user_cancel_workflow(workflow: BpmnWorkflow, task_id: uuid.UUID, user_id: uuid.UUID):
-    task = workflow.get_task_from_id(task_id=task_id)
+    task = _get_task(workflow, task_id)
     return (
         task is not None
         and task.has_state(TaskState.READY)
@@ -816,7 +1016,7 @@ def can_user_cancel_workflow(workflow: BpmnWorkflow, task_id: uuid.UUID, user_id
 
 
 def can_user_delete_workflow(workflow: BpmnWorkflow, task_id: uuid.UUID, user_id: uuid.UUID):
-    task = workflow.get_task_from_id(task_id=task_id)
+    task = _get_task(workflow, task_id)
     return (
         task is not None
         and task.has_state(TaskState.READY)
@@ -828,32 +1028,34 @@ def can_user_delete_workflow(workflow: BpmnWorkflow, task_id: uuid.UUID, user_id
 def unassign_task(workflow: BpmnWorkflow, task_id: uuid.UUID):
     """Unassign a user from a task"""
     if can_be_unassigned(workflow=workflow, task_id=task_id):
-        task: Task = workflow.get_task_from_id(task_id)
+        task: Task = _get_task(workflow, task_id)
         task._set_internal_data(
             **{
                 INTERNAL_DATA_KEY_ASSIGNED_USER: None,
                 INTERNAL_DATA_KEY_ASSIGNED_DELEGATE_USER: None,
             },
         )
+        _assigned_user_changed(task)
     else:
         raise TaskCannotBeUnassignedException()
 
 
 def unassign_task_without_checks(workflow: BpmnWorkflow, task_id: uuid.UUID):
     """Unassign a user from a task"""
-    task: Task = workflow.get_task_from_id(task_id)
+    task: Task = _get_task(workflow, task_id)
     task._set_internal_data(
         **{
             INTERNAL_DATA_KEY_ASSIGNED_USER: None,
             INTERNAL_DATA_KEY_ASSIGNED_DELEGATE_USER: None,
         },
     )
+    _assigned_user_changed(task)
 
 
 def is_initiator_lane(workflow: BpmnWorkflow, lane_name: str | None) -> bool:
     is_initiator_lane = False
     if lane_name is not None:
-        lane_mapping = get_lane_mapping(workflow=workflow)
+        lane_mapping = get_task_index(workflow).lane_mapping
         initiator_property = lane_mapping.get(lane_name, {}).get("initiator", False)
         is_initiator_lane = initiator_property is not False and initiator_property is not None
     return is_initiator_lane
@@ -871,32 +1073,34 @@ def set_manually_assigned_roles(
     task_id: uuid.UUID,
     roles: set[str],
 ) -> str | None:
-    task = workflow.get_task_from_id(task_id)
+    task = _get_task(workflow, task_id)
     task._set_internal_data(**{INTERNAL_DATA_KEY_ASSIGNED_ROLES: list(roles)})
 
 
 def get_task_roles(workflow: BpmnWorkflow, task_id: uuid.UUID) -> set[str]:
-    task: Task = workflow.get_task_from_id(task_id=task_id)
+    task: Task = _get_task(workflow, task_id)
     task_spec: BpmnTaskSpec = task.task_spec
     roles = set()
     manually_assigned_roles = get_manually_assigned_roles(task)
     if manually_assigned_roles is not None:
         roles: set[str] = set(manually_assigned_roles)
     elif task_spec.lane is not None:
-        lane_mapping = get_lane_mapping(workflow=workflow)
+        lane_mapping = get_task_index(workflow).lane_mapping
         roles: set[str] = set(lane_mapping.get(task_spec.lane, {}).get("roles", set()))
     return roles
 
 
 def auto_assign_all_tasks_in_initiator_lane(workflow: BpmnWorkflow):
     """Automatically assigns all possible open usertasks to the initiator"""
-    tasks = get_ready_and_waiting_usertasks(workflow=workflow)
-    for task in tasks:
-        task_spec: BpmnTaskSpec = task.task_spec
-        if is_initiator_lane(workflow=workflow, lane_name=task_spec.lane):
-            created_by_id: uuid.UUID | None = get_created_by_id(workflow=workflow)
-            if created_by_id:
-                assign_task_without_checks(workflow=workflow, task_id=task.id, user_id=created_by_id)
+    created_by_id: uuid.UUID | None = get_created_by_id(workflow=workflow)
+    if not created_by_id:
+        return
+    index = get_task_index(workflow)
+    for lane in index.lane_mapping:
+        if is_initiator_lane(workflow=workflow, lane_name=lane):
+            for task in index.in_lane(lane):
+                if task.task_spec.manual and task.has_state(TaskState.READY | TaskState.WAITING):
+                    assign_task_without_checks(workflow=workflow, task_id=task.id, user_id=created_by_id)
 
 
 def strip_hidden_field_values(
@@ -1021,7 +1225,7 @@ def get_options_for_property(
 ) -> list[tuple[str, str]]:
     options_folder = workflow_providers.get_workflow_directory(workflow.spec.name) / "options"
     functions_env = _get_workflow_functions_env(workflow.spec.name)
-    task: Task = workflow.get_task_from_id(task_id)
+    task: Task = _get_task(workflow, task_id)
     formdata = get_react_json_schema_form_data(task=task)
     if formdata is None:
         raise FormNotFoundException()
@@ -1046,7 +1250,7 @@ def get_options_detailed_for_property(
 ) -> dict[str, dict[str, Any]]:
     options_folder = workflow_providers.get_workflow_directory(workflow.spec.name) / "options"
     functions_env = _get_workflow_functions_env(workflow.spec.name)
-    task: Task = workflow.get_task_from_id(task_id)
+    task: Task = _get_task(workflow, task_id)
     formdata = get_react_json_schema_form_data(task=task)
     if formdata is None:
         raise FormNotFoundException()
@@ -1063,7 +1267,7 @@ def get_options_detailed_for_property(
 
 
 def replace_task_data(workflow: BpmnWorkflow, task_id: uuid.UUID, task_data: dict):
-    task: Task = workflow.get_task_from_id(task_id)
+    task: Task = _get_task(workflow, task_id)
     task.data = task_data
 
     # Every write path stamps: replaced rows must not reach a form without
@@ -1073,9 +1277,10 @@ def replace_task_data(workflow: BpmnWorkflow, task_id: uuid.UUID, task_data: dic
         stamp_missing_row_ids(form_spec.uischema, task.data)
 
 
+@_changes_tasks
 def execute_erroneous_task(workflow: BpmnWorkflow, task_id: uuid.UUID):
     """Runs a task, afterwards proceeds with run_workflow"""
-    task: Task = workflow.get_task_from_id(task_id)
+    task: Task = _get_task(workflow, task_id)
     if not task.has_state(TaskState.ERROR):
         raise TaskIsNotErroneousException()
     set_stacktrace(
@@ -1083,22 +1288,23 @@ def execute_erroneous_task(workflow: BpmnWorkflow, task_id: uuid.UUID):
         task_id=task_id,
         stacktrace=None,
     )  # reset stacktrace
-    success = task.run()
+    success = _run_task(task)
     if not success:
         return False
     return run_workflow(workflow=workflow)
 
 
 def get_stacktrace(workflow: BpmnWorkflow, task_id: uuid.UUID) -> str | None:
-    task: Task = workflow.get_task_from_id(task_id)
+    task: Task = _get_task(workflow, task_id)
     return task._get_internal_data(INTERNAL_DATA_KEY_STACKTRACE, None)
 
 
 def set_stacktrace(workflow: BpmnWorkflow, task_id: uuid.UUID, stacktrace: str | None):
-    task: Task = workflow.get_task_from_id(task_id)
+    task: Task = _get_task(workflow, task_id)
     task._set_internal_data(**{INTERNAL_DATA_KEY_STACKTRACE: stacktrace})
 
 
+@_changes_tasks
 def cancel_workflow(workflow: BpmnWorkflow):
     workflow.cancel()
 
@@ -1153,13 +1359,14 @@ def _first_timer_def(task) -> TimerEventDefinition | None:
     return None
 
 
+@_changes_tasks
 def process_single_time_event(workflow: BpmnWorkflow, wte_record: TimeEvent) -> TimeEventResult:
     """
     execute a single due time event inside 'workflow'.
     No database I/O here; caller persists workflow and timer record.
     """
     # Locate task
-    task = next((t for t in workflow.get_tasks() if t.id == wte_record.timer_task_id), None)
+    task = get_task_index(workflow).get(wte_record.timer_task_id)
     if task is None or task.state != TaskState.WAITING:
         return TimeEventResult(outcome="cancelled", note="Task not waiting or not found")
 
@@ -12,16 +12,19 @@ import logging
 import re
 import traceback
 import uuid
+import weakref
+from contextlib import contextmanager
 from copy import copy, deepcopy
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict
+from types import CodeType
+from typing import Any, ClassVar, Dict
 
 import orjson
 from SpiffWorkflow.bpmn.exceptions import WorkflowDataException
 from SpiffWorkflow.bpmn.parser.BpmnParser import BpmnParser, full_tag
 from SpiffWorkflow.bpmn.parser.ProcessParser import ProcessParser
-from SpiffWorkflow.bpmn.script_engine.feel_engine import FeelLikeScriptEngine
+from SpiffWorkflow.bpmn.script_engine.feel_engine import FeelLikeScriptEngine, externalFuncs
 from SpiffWorkflow.bpmn.script_engine.python_engine import PythonScriptEngine
 from SpiffWorkflow.bpmn.script_engine.python_environment import TaskDataEnvironment
 from SpiffWorkflow.bpmn.serializer.config import ParallelMultiInstanceTask, SequentialMultiInstanceTask
@@ -61,6 +64,7 @@ from actidoo_wfe.wf.constants import (
 from actidoo_wfe.wf.exceptions import FormNotFoundException
 from actidoo_wfe.wf.form_transformation import empty_form, transform_camunda_form_from_file
 from actidoo_wfe.wf.service_task_helper import ServiceTaskHelper
+from actidoo_wfe.wf.service_task_profiling import profile_service_call
 from actidoo_wfe.wf.types import TaskToUserMapping
 
 log = logging.getLogger(__name__)
@@ -273,7 +277,8 @@ class FeelExpressionReference:
     - get(task): evaluate FEEL in the given task context
     - exists(task): True if get() returns a non-None value
     - set(): forbidden (read-only expression)
-    Note: No caching; expressions are evaluated on each access.
+    While a task runs (MyScriptEngine.task_execution), the value is evaluated once per task:
+    a multi-instance task asks for its input collection again on every child it merges.
     """
 
     def __init__(self, expr: str, bpmn_id: str):
@@ -282,7 +287,10 @@ class FeelExpressionReference:
 
     def get(self, task):
         # FEEL evaluation is routed by the script engine (leading '=' supported there)
-        return task.workflow.script_engine.evaluate(task, self.expr)
+        script_engine = task.workflow.script_engine
+        if isinstance(script_engine, MyScriptEngine):
+            return script_engine.evaluate_memoized(task, self.expr)
+        return script_engine.evaluate(task, self.expr)
 
     def exists(self, task) -> bool:
         try:
@@ -616,9 +624,20 @@ def get_serializer():
     return serializer
 
 
+# Upper bound of the compiled expressions kept by MyScriptEngine
+EXPRESSION_CACHE_SIZE = 2048
+
+
 class MyScriptEngine(FeelLikeScriptEngine):
+    # Expression text -> compiled code, shared by all engines; patching and compiling are pure functions of the text.
+    _compiled_expressions: ClassVar[dict[str, CodeType]] = {}
+
     def __init__(self, environment):
         super().__init__(environment=environment)
+        # Built on the first service call of an engine run, see forget_task_to_user_mappings()
+        self._task_to_user_mappings: "weakref.WeakKeyDictionary[BpmnWorkflow, TaskToUserMapping]" = weakref.WeakKeyDictionary()
+        # (task id, expression) -> value, only while a task runs, see task_execution()
+        self._memoized_values: dict[tuple[uuid.UUID, str], Any] | None = None
 
     def call_service(self, service_type, task):
         """This method is called for service tasks"""
@@ -646,7 +665,8 @@ class MyScriptEngine(FeelLikeScriptEngine):
                     self.environment.globals.get("DATA_MODELS", []),
                 ),
             )
-            result = service_def(sth=sth)
+            with profile_service_call(workflow_name=workflow.top_workflow.spec.name, service_name=service_type):
+                result = service_def(sth=sth)
 
         return orjson.dumps(result)
 
@@ -661,17 +681,38 @@ class MyScriptEngine(FeelLikeScriptEngine):
 
     def _evaluate(self, expression, context, external_context=None):
         if expression.startswith("="):
-            return FeelLikeScriptEngine._evaluate(
-                self,
-                expression.lstrip("= "),
-                context,
-                external_context=external_context,
-            )
-        else:
-            return self.environment.evaluate(expression, context, external_context)
-            # return PythonScriptEngine.evaluate(
-            #    self, expression, context, external_context
-            # )
+            # as FeelLikeScriptEngine._evaluate, with the patched expression compiled once
+            if external_context is None:
+                external_context = {}
+            external_context.update(externalFuncs)
+        return self.environment.evaluate(self._compile_expression(expression), context, external_context)
+
+    def _compile_expression(self, expression: str) -> CodeType:
+        code = self._compiled_expressions.get(expression)
+        if code is None:
+            source = self.patch_expression(expression.lstrip("= ")) if expression.startswith("=") else expression
+            code = compile(source, "<expression>", "eval")
+            if len(self._compiled_expressions) >= EXPRESSION_CACHE_SIZE:
+                self._compiled_expressions.clear()
+            self._compiled_expressions[expression] = code
+        return code
+
+    @contextmanager
+    def task_execution(self):
+        """Memoizes the values of evaluate_memoized() while a task runs."""
+        self._memoized_values = {}
+        try:
+            yield
+        finally:
+            self._memoized_values = None
+
+    def evaluate_memoized(self, task: Task, expression: str):
+        if self._memoized_values is None:
+            return self.evaluate(task, expression)
+        key = (task.id, expression)
+        if key not in self._memoized_values:
+            self._memoized_values[key] = self.evaluate(task, expression)
+        return self._memoized_values[key]
 
     def patch_expression(self, invalid_python, lhs=""):
         patched = super().patch_expression(invalid_python, lhs)
@@ -680,14 +721,41 @@ class MyScriptEngine(FeelLikeScriptEngine):
         return patched
 
     def get_task_to_user_mapping(self, workflow: BpmnWorkflow) -> TaskToUserMapping:
-        tasks: Dict[uuid.UUID, Task] = {t.id: t for t in workflow.get_tasks()}
-        mapping: TaskToUserMapping = dict()
-        for task in tasks.values():
-            user = task._get_internal_data(INTERNAL_DATA_KEY_ASSIGNED_USER, None)
-            if user is not None:
-                mapping[task] = user
+        """Returns the assigned user of every task of ``workflow`` that has one.
+
+        The mapping is built on the first service call of an engine run and shared by the later
+        ones; assignments made during the run are applied by update_task_to_user_mapping().
+        The states of the mapped tasks are read live by the ServiceTaskHelper."""
+        mapping = self._task_to_user_mappings.get(workflow)
+        if mapping is None:
+            mapping = dict()
+            for task in workflow.get_tasks():
+                user = task._get_internal_data(INTERNAL_DATA_KEY_ASSIGNED_USER, None)
+                if user is not None:
+                    mapping[task] = user
+            self._task_to_user_mappings[workflow] = mapping
         return mapping
 
+    def update_task_to_user_mapping(self, task: Task):
+        """Called after the assigned user of ``task`` changed, e.g. by a service task assigning an upcoming task.
+
+        The mappings of the (sub)workflow of the task and of all workflows around it are updated,
+        as their tasks include the ones of their subprocesses."""
+        user = task._get_internal_data(INTERNAL_DATA_KEY_ASSIGNED_USER, None)
+        workflow = task.workflow
+        while workflow is not None:
+            mapping = self._task_to_user_mappings.get(workflow)
+            if mapping is not None:
+                if user is not None:
+                    mapping[task] = user
+                else:
+                    mapping.pop(task, None)
+            workflow = workflow.parent_workflow
+
+    def forget_task_to_user_mappings(self):
+        """Called whenever tasks were run: the next service call builds the mapping anew."""
+        self._task_to_user_mappings.clear()
+
 
 def get_script_engine(workflow_name):
     env_globals: Dict[str, object] = {}
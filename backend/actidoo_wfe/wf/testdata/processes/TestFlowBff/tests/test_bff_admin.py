@@ -249,6 +249,42 @@ def test_admin_get_statistic_information(db_engine_ctx):
         assert status == 200
 
 
+def test_admin_get_statistic_information_buckets(db_engine_ctx):
+    with db_engine_ctx():
+        db = SessionLocal()
+        workflow = _create_completed_workflow(db=db)
+        _create_completed_workflow(db=db)
+        client = Client()
+
+        with override_get_user(client=client, user=workflow.user("admin").user), disable_role_check(client):
+            status, json_resp = client.post(
+                name="bff_admin_get_statistics_information",
+                json={
+                    "bucket": "week",
+                    "date_from": (dt_now_naive() - timedelta(days=30)).isoformat(),
+                    "date_to": (dt_now_naive() + timedelta(days=1)).isoformat(),
+                },
+                cls=ReducedWorkflowInstanceResponse,
+            )
+
+        assert status == 200
+        assert json_resp.ITEMS == []
+        buckets = [b for b in json_resp.BUCKETS if b.name == WF_NAME]
+        assert len(buckets) == 1
+        assert buckets[0].count == 2
+        assert buckets[0].bucket_start.weekday() == 0
+
+        with override_get_user(client=client, user=workflow.user("admin").user), disable_role_check(client):
+            status, json_resp = client.post(
+                name="bff_admin_get_statistics_information",
+                json={"bucket": "day", "date_to": (dt_now_naive() - timedelta(days=1)).isoformat()},
+                cls=ReducedWorkflowInstanceResponse,
+            )
+
+        assert status == 200
+        assert [b for b in json_resp.BUCKETS if b.name == WF_NAME] == []
+
+
 def test_admin_get_all_users_endpoint(db_engine_ctx):
     with db_engine_ctx():
         db = SessionLocal()
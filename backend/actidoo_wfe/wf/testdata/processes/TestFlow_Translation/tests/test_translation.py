@@ -64,10 +64,10 @@ def test_getAllowedWorkflowsToStart_translatesTitlePerUserLocale(db_engine_ctx):
         )
 
         service_i18n.compile_all()
-        # Caching: get_workflow_title_cached is @cache'd on (name, locale).
+        # Caching: workflow titles are cached per (name, revision, locale).
         # Tests run in isolated workers, but make sure prior calls don't bleed.
         from actidoo_wfe.wf import service_workflow
-        service_workflow.get_workflow_title_cached.cache_clear()
+        service_workflow.clear_workflow_metadata_cache()
 
         user = workflow.user("initiator").user
         user.locale = "en-US"
@@ -79,7 +79,7 @@ def test_getAllowedWorkflowsToStart_translatesTitlePerUserLocale(db_engine_ctx):
         assert translated.title == "English name of the process"
 
         # Different locale: German .po has its own translation for the process title.
-        service_workflow.get_workflow_title_cached.cache_clear()
+        service_workflow.clear_workflow_metadata_cache()
         user.locale = "de-DE"
         db_session.commit()
 
@@ -102,7 +102,7 @@ def test_getWorkflowStatistics_translatesTitlePerUserLocale(db_engine_ctx):
 
         service_i18n.compile_all()
         from actidoo_wfe.wf import service_workflow
-        service_workflow.get_workflow_title_cached.cache_clear()
+        service_workflow.clear_workflow_metadata_cache()
 
         user = workflow.user("initiator").user
         user.locale = "en-US"
@@ -113,7 +113,7 @@ def test_getWorkflowStatistics_translatesTitlePerUserLocale(db_engine_ctx):
         assert entry is not None
         assert entry.title == "English name of the process"
 
-        service_workflow.get_workflow_title_cached.cache_clear()
+        service_workflow.clear_workflow_metadata_cache()
         user.locale = "de-DE"
         db_session.commit()
 
@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+import time
+
+import pytest
+from starlette.requests import Request
+
+import actidoo_wfe.wf.bff.deps as deps
+import actidoo_wfe.wf.service_user as service_user
+from actidoo_wfe.auth.schema import LoginStateSchema
+from actidoo_wfe.database import setup_db
+from actidoo_wfe.settings import settings
+
+setup_db(settings=settings)
+
+
+def _login_state(**overrides) -> LoginStateSchema:
+    values = dict(
+        first_name="Workflow",
+        last_name="User",
+        username="user@example.com",
+        email="user@example.com",
+        is_logged_in=True,
+        can_access_wf=True,
+        can_access_wf_admin=False,
+        idp_user_id="id-sync",
+        roles=["wf-user"],
+    )
+    values.update(overrides)
+    return LoginStateSchema(**values)
+
+
+@pytest.fixture
+def bff_login(monkeypatch):
+    """A request with an (in-memory) session, a switchable login state and a counter of user upserts."""
+    state = {"login_state": _login_state()}
+    upserts: list[str] = []
+
+    monkeypatch.setattr(deps, "get_login_state", lambda request: state["login_state"])
+
+    upsert_user = service_user.upsert_user
+
+    def _counting_upsert_user(**kwargs):
+        upserts.append(kwargs["email"])
+        return upsert_user(**kwargs)
+
+    monkeypatch.setattr(service_user, "upsert_user", _counting_upsert_user)
+
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": [], "session": {}})
+    return request, state, upserts
+
+
+def test_get_user_skips_upsert_for_unchanged_claims(db_engine_ctx, bff_login):
+    request, _, upserts = bff_login
+    with db_engine_ctx():
+        first = deps.get_user(request=request)
+        second = deps.get_user(request=request)
+
+        assert first.id == second.id
+        assert upserts == ["user@example.com"]
+
+
+def test_get_user_upserts_when_claims_change(db_engine_ctx, bff_login):
+    request, state, upserts = bff_login
+    with db_engine_ctx():
+        deps.get_user(request=request)
+        state["login_state"] = _login_state(email="renamed@example.com")
+        user = deps.get_user(request=request)
+
+        assert user.email == "renamed@example.com"
+        assert upserts == ["user@example.com", "renamed@example.com"]
+
+
+def test_get_user_upserts_after_sync_interval(db_engine_ctx, bff_login):
+    request, _, upserts = bff_login
+    with db_engine_ctx():
+        deps.get_user(request=request)
+        request.session[deps.SESSION_USER_SYNC_KEY]["synced_at"] = int(time.time()) - settings.user_sync_interval_seconds
+        deps.get_user(request=request)
+
+        assert len(upserts) == 2
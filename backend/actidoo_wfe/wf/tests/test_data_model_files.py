@@ -29,6 +29,7 @@ from actidoo_wfe.wf.models import (
     extension_model_base,
 )
 from actidoo_wfe.wf.registry_data_model import DataModelDescriptor, data_model_registry
+from actidoo_wfe.wf.service_application import collect_dangling_attachments
 
 setup_db(settings=settings)
 
@@ -295,8 +296,23 @@ class TestAttachmentGc:
             att_id = att.id
         return instance_id, att_id
 
-    def test_delete_workflow_instance_collects_orphan_attachment(self, db_engine_ctx):
-        """delete_workflow_instance now GCs attachments left orphaned by the cascade."""
+    def _collect(self):
+        with SessionMaker() as db:
+            return collect_dangling_attachments(db=db, batch_size=2, delete_parallelism=2)
+
+    def test_delete_workflow_instance_leaves_orphan_attachment(self, db_engine_ctx):
+        """delete_workflow_instance leaves the orphaned attachment to the attachment_gc cron task."""
+        from types import SimpleNamespace
+
+        with db_engine_ctx():
+            instance_id, att_id = self._instance_with_attachment("h-orphan")
+            workflow = SimpleNamespace(task_tree=SimpleNamespace(id=instance_id))
+            with SessionMaker() as db, db.begin():
+                repository.delete_workflow_instance(db=db, workflow=workflow)
+            with SessionMaker() as db:
+                assert repository.find_attachment_by_id(db=db, attachment_id=att_id) is not None
+
+    def test_gc_collects_orphan_attachment_of_deleted_instance(self, db_engine_ctx):
         from types import SimpleNamespace
 
         with db_engine_ctx():
@@ -304,8 +320,10 @@ class TestAttachmentGc:
             workflow = SimpleNamespace(task_tree=SimpleNamespace(id=instance_id))
             with SessionMaker() as db, db.begin():
                 repository.delete_workflow_instance(db=db, workflow=workflow)
+            assert self._collect() >= 1
             with SessionMaker() as db:
                 assert repository.find_attachment_by_id(db=db, attachment_id=att_id) is None
+            assert self._collect() == 0
 
     def test_delete_workflow_instance_keeps_data_model_referenced_attachment(self, db_engine_ctx):
         from types import SimpleNamespace
@@ -323,6 +341,7 @@ class TestAttachmentGc:
             workflow = SimpleNamespace(task_tree=SimpleNamespace(id=instance_id))
             with SessionMaker() as db, db.begin():
                 repository.delete_workflow_instance(db=db, workflow=workflow)
+            self._collect()
             with SessionMaker() as db:
                 assert repository.find_attachment_by_id(db=db, attachment_id=att_id) is not None
 
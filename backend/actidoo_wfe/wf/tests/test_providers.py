@@ -62,3 +62,29 @@ def test_custom_provider_registration(tmp_path: Path):
 
     assert workflow_providers.get_workflow_directory("DummyFlow") == dummy_dir
     assert workflow_providers.get_provider("DummyFlow") is provider
+
+
+def test_rescan_picks_up_changed_workflows(tmp_path: Path):
+    (tmp_path / "FlowA").mkdir()
+    (tmp_path / "FlowA" / "flow.bpmn").write_text("<definitions/>")
+    workflow_providers.registry.register(workflow_providers.FileSystemWorkflowProvider(base_path=tmp_path, name="tmp", priority=100))
+
+    generation = workflow_providers.registry.generation
+    revision = workflow_providers.get_workflow_index_entry("FlowA").revision
+    assert workflow_providers.registry.rescan() is False
+    assert not workflow_providers.workflow_definition_available("FlowB")
+
+    (tmp_path / "FlowB").mkdir()
+    (tmp_path / "FlowB" / "flow.bpmn").write_text("<definitions/>")
+    # Served from the index until the next rescan
+    assert "FlowB" not in workflow_providers.iter_workflow_names()
+
+    assert workflow_providers.registry.rescan() is True
+    assert workflow_providers.registry.generation == generation + 1
+    assert "FlowB" in workflow_providers.iter_workflow_names()
+    assert workflow_providers.workflow_definition_available("FlowB")
+    assert workflow_providers.get_workflow_index_entry("FlowA").revision == revision
+
+    (tmp_path / "FlowA" / "flow.bpmn").write_text("<definitions></definitions>")
+    assert workflow_providers.registry.rescan() is True
+    assert workflow_providers.get_workflow_index_entry("FlowA").revision == workflow_providers.registry.generation
@@ -0,0 +1,73 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2026 ActiDoo GmbH
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from actidoo_wfe.settings import settings
+from actidoo_wfe.wf import service_task_profiling
+from actidoo_wfe.wf.service_task_profiling import get_service_task_statistics, profile_service_call, record_io
+
+
+@pytest.fixture
+def profiling(monkeypatch):
+    monkeypatch.setattr(settings, "service_task_profiling", True)
+    monkeypatch.setattr(settings, "service_task_slow_log_seconds", 3600.0)
+    monkeypatch.setattr(settings, "service_task_cprofile_dir", "")
+    monkeypatch.setattr(service_task_profiling, "_statistics", {})
+
+
+def _statistics_of(service_name):
+    return next(entry for entry in get_service_task_statistics() if entry.service_name == service_name)
+
+
+def test_calls_are_summed_per_workflow_and_service(profiling):
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        for _ in range(2):
+            with profile_service_call(workflow_name="TestFlow", service_name="send_summary"):
+                connection.execute(text("SELECT 1"))
+                connection.execute(text("SELECT 2"))
+                with record_io():
+                    pass
+        # Statements outside of a service call are not counted
+        connection.execute(text("SELECT 3"))
+
+    statistics = _statistics_of("send_summary")
+    assert (statistics.workflow_name, statistics.calls, statistics.db_statements, statistics.io_calls) == ("TestFlow", 2, 4, 2)
+
+
+def test_database_statements_in_io_blocks_count_as_database_time(profiling, monkeypatch):
+    clock = iter([0.0, 1.0, 2.0, 5.0, 10.0, 20.0])
+    monkeypatch.setattr(service_task_profiling, "time", SimpleNamespace(perf_counter=lambda: next(clock)))
+    engine = create_engine("sqlite://")
+    # call starts at 0, I/O block at 1, statement runs from 2 to 5, block ends at 10, call at 20
+    with engine.connect() as connection, profile_service_call(workflow_name="TestFlow", service_name="store_file"), record_io():
+        connection.execute(text("SELECT 1"))
+
+    statistics = _statistics_of("store_file")
+    assert (statistics.seconds, statistics.db_seconds, statistics.io_seconds) == (20.0, 3.0, 6.0)
+
+
+def test_slow_calls_are_logged_and_profiled(profiling, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "service_task_slow_log_seconds", 0.0)
+    monkeypatch.setattr(settings, "service_task_cprofile_dir", str(tmp_path))
+    warnings = []
+    monkeypatch.setattr(service_task_profiling.log, "warning", warnings.append)
+
+    with profile_service_call(workflow_name="TestFlow", service_name="create_ticket"):
+        pass
+
+    assert "workflow=TestFlow service=create_ticket" in warnings[0]
+    assert [path.name.split(".")[:2] for path in tmp_path.glob("*.prof")] == [["TestFlow", "create_ticket"]]
+
+
+def test_nothing_is_recorded_when_disabled(profiling, monkeypatch):
+    monkeypatch.setattr(settings, "service_task_profiling", False)
+
+    with profile_service_call(workflow_name="TestFlow", service_name="send_summary"), record_io():
+        pass
+
+    assert get_service_task_statistics() == []
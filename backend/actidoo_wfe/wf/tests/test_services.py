@@ -2,23 +2,27 @@
 # Copyright (c) 2025 ActiDoo GmbH
 
 import logging
+import uuid
 from datetime import timedelta
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import delete, func, select, true, update
 
 from actidoo_wfe import i18n as global_i18n
-from actidoo_wfe.database import SessionLocal, setup_db
+from actidoo_wfe.database import SessionLocal, create_null_pool_engine, setup_db
 from actidoo_wfe.helpers.time import dt_now_naive
 from actidoo_wfe.settings import settings
-from actidoo_wfe.wf import service_application, service_form, service_user
+from actidoo_wfe.wf import repository, service_application, service_form, service_user, service_workflow, spiff_customized
 from actidoo_wfe.wf.bff.bff_user import WorkflowInstancesBffTableQuerySchema
 from actidoo_wfe.wf.exceptions import (
     TaskAlreadyAssignedToDifferentUserException,
     TaskCannotBeUnassignedException,
     TaskIsNotInReadyUsertasksException,
+    WorkflowInstanceConflictError,
+    WorkflowInstanceLockedError,
 )
-from actidoo_wfe.wf.models import WorkflowInstanceTask
+from actidoo_wfe.wf.models import FormSchema, WorkflowInstance, WorkflowInstanceDelta, WorkflowInstanceTask, WorkflowSpec, WorkflowSpecFile, WorkflowTimeEvent
+from actidoo_wfe.wf.service_task_helper import ServiceTaskHelper
 from actidoo_wfe.wf.tests.helpers.workflow_dummy import WorkflowDummy
 
 log: logging.Logger = logging.getLogger(__name__)
@@ -619,3 +623,473 @@ def test_match_translation(user_locale, available, default, expected, monkeypatc
 
     result = global_i18n.match_translation(user_locale=user_locale, available=available)
     assert result == expected, f"match_translation({user_locale!r}, {available}, default={default!r}) -> {result!r}, expected {expected!r}"
+
+
+def test_form_schemas_are_shared_between_instances(db_engine_ctx):
+    with db_engine_ctx():
+        db = SessionLocal()
+        first = WorkflowDummy(
+            db_session=db,
+            users_with_roles={"initiator": ["wf-user"]},
+            workflow_name="TestFlow_Copy",
+            start_user="initiator",
+        )
+        stored_schemas = db.execute(select(func.count()).select_from(FormSchema)).scalar()
+
+        second_instance_id = service_application.start_workflow(db=db, name="TestFlow_Copy", user_id=first.user("initiator").user.id)
+        db.commit()
+
+        tasks = {
+            task.workflow_instance_id: task
+            for task in db.execute(
+                select(WorkflowInstanceTask).where(
+                    WorkflowInstanceTask.workflow_instance_id.in_([first.workflow_instance_id, second_instance_id]),
+                    WorkflowInstanceTask.state_ready == true(),
+                ),
+            ).scalars()
+        }
+
+        first_task, second_task = tasks[first.workflow_instance_id], tasks[second_instance_id]
+        assert first_task.jsonschema_hash is not None
+        assert first_task.legacy_jsonschema is None
+        assert (first_task.jsonschema_hash, first_task.uischema_hash) == (second_task.jsonschema_hash, second_task.uischema_hash)
+        assert first_task.jsonschema == second_task.jsonschema
+        assert first_task.jsonschema["type"] == "object"
+        assert db.execute(select(func.count()).select_from(FormSchema)).scalar() == stored_schemas
+
+
+def test_delta_snapshots_reconstruct_the_workflow(db_engine_ctx, monkeypatch):
+    monkeypatch.setattr(settings, "workflow_instance_delta_snapshots", True)
+    with db_engine_ctx():
+        db = SessionLocal()
+        workflow = WorkflowDummy(
+            db_session=db,
+            users_with_roles={"initiator": ["wf-user"]},
+            workflow_name="TestFlow_Copy",
+            start_user="initiator",
+        )
+        task_id = workflow.user("initiator").get_usertasks(workflow_instance_id=workflow.workflow_instance_id, expected_task_count=1)[0].id
+
+        for step in range(3):
+            restored = repository.load_workflow_instance(db=db, workflow_id=workflow.workflow_instance_id)
+            restored.get_task_from_id(task_id).data[f"step_{step}"] = {"value": step}
+            repository.store_workflow_instance(db=db, workflow=restored)
+            db.commit()
+
+        db_instance = db.execute(select(WorkflowInstance).where(WorkflowInstance.id == workflow.workflow_instance_id)).scalar_one()
+        assert db_instance.delta_count >= 3
+        assert db.execute(select(func.count()).select_from(WorkflowInstanceDelta).where(WorkflowInstanceDelta.workflow_instance_id == db_instance.id)).scalar() == db_instance.delta_count
+        assert "step_2" not in str(db_instance.data)
+
+        restored = repository.load_workflow_instance(db=db, workflow_id=workflow.workflow_instance_id)
+        assert {key: restored.get_task_from_id(task_id).data[key] for key in ["step_0", "step_1", "step_2"]} == {f"step_{step}": {"value": step} for step in range(3)}
+
+        repository.compact_workflow_instance(db=db, workflow_instance_id=db_instance.id)
+        db.commit()
+
+        db.refresh(db_instance)
+        assert db_instance.delta_count == 0
+        assert db.execute(select(func.count()).select_from(WorkflowInstanceDelta).where(WorkflowInstanceDelta.workflow_instance_id == db_instance.id)).scalar() == 0
+        compacted = repository.load_workflow_instance(db=db, workflow_id=workflow.workflow_instance_id)
+        assert service_workflow.dump(compacted) == service_workflow.dump(restored)
+
+
+def test_workflow_is_restored_once_per_transaction(db_engine_ctx, monkeypatch):
+    with db_engine_ctx():
+        db = SessionLocal()
+        workflow = WorkflowDummy(
+            db_session=db,
+            users_with_roles={"initiator": ["wf-user"]},
+            workflow_name="TestFlow_Copy",
+            start_user="initiator",
+        )
+        task_id = workflow.user("initiator").get_usertasks(workflow_instance_id=workflow.workflow_instance_id, expected_task_count=1)[0].id
+        db.commit()
+
+        restores = []
+        restore = repository.restore
+
+        def _counting_restore(serialized_data):
+            restores.append(serialized_data)
+            return restore(serialized_data=serialized_data)
+
+        monkeypatch.setattr(repository, "restore", _counting_restore)
+
+        first = repository.load_workflow_instance(db=db, workflow_id=workflow.workflow_instance_id)
+        assert repository.load_workflow_instance_by_task_id(db=db, task_id=task_id) is first
+        assert len(restores) == 1
+
+        # A locking load does not hand out what was read without the lock ...
+        locked = repository.load_workflow_instance(db=db, workflow_id=workflow.workflow_instance_id, for_update=True)
+        assert locked is not first
+        # ... but everything after it shares the locked one
+        assert repository.load_workflow_instance(db=db, workflow_id=workflow.workflow_instance_id) is locked
+        assert len(restores) == 2
+
+        db.commit()
+        assert repository.load_workflow_instance(db=db, workflow_id=workflow.workflow_instance_id) is not locked
+        assert len(restores) == 3
+
+
+def _bump_version_behind_the_session(db, workflow_instance_id):
+    """What a concurrent transaction storing the instance looks like to the ORM: the row's version moves on."""
+    db.execute(
+        update(WorkflowInstance).where(WorkflowInstance.id == workflow_instance_id).values(version=WorkflowInstance.version + 1).execution_options(synchronize_session=False),
+    )
+
+
+def test_store_detects_concurrent_change(db_engine_ctx):
+    with db_engine_ctx():
+        db = SessionLocal()
+        workflow = WorkflowDummy(
+            db_session=db,
+            users_with_roles={"initiator": ["wf-user"]},
+            workflow_name="TestFlow_Copy",
+            start_user="initiator",
+        )
+        task_id = workflow.user("initiator").get_usertasks(workflow_instance_id=workflow.workflow_instance_id, expected_task_count=1)[0].id
+        db.commit()
+
+        restored = repository.load_workflow_instance(db=db, workflow_id=workflow.workflow_instance_id)
+        restored.get_task_from_id(task_id).data["changed"] = True
+        _bump_version_behind_the_session(db, workflow.workflow_instance_id)
+
+        with pytest.raises(WorkflowInstanceConflictError):
+            repository.store_workflow_instance(db=db, workflow=restored)
+        db.rollback()
+
+
+def test_background_work_is_retried_on_conflict(db_engine_ctx):
+    with db_engine_ctx():
+        db = SessionLocal()
+        workflow = WorkflowDummy(
+            db_session=db,
+            users_with_roles={"initiator": ["wf-user"]},
+            workflow_name="TestFlow_Copy",
+            start_user="initiator",
+        )
+        task_id = workflow.user("initiator").get_usertasks(workflow_instance_id=workflow.workflow_instance_id, expected_task_count=1)[0].id
+        db.commit()
+
+        attempts = []
+
+        def work(for_update: bool):
+            attempts.append(for_update)
+            restored = repository.load_workflow_instance(db=db, workflow_id=workflow.workflow_instance_id, for_update=for_update)
+            restored.get_task_from_id(task_id).data["attempts"] = len(attempts)
+            if len(attempts) == 1:
+                _bump_version_behind_the_session(db, workflow.workflow_instance_id)
+            repository.store_workflow_instance(db=db, workflow=restored)
+
+        service_application._retry_on_conflict(db=db, work=work)
+        db.commit()
+
+        assert attempts == [False, True]
+        restored = repository.load_workflow_instance(db=db, workflow_id=workflow.workflow_instance_id)
+        assert restored.get_task_from_id(task_id).data["attempts"] == 2
+
+
+def test_locking_load_fails_fast_with_nowait(db_engine_ctx, monkeypatch):
+    monkeypatch.setattr(settings, "workflow_instance_lock_nowait", True)
+    with db_engine_ctx():
+        db = SessionLocal()
+        workflow = WorkflowDummy(
+            db_session=db,
+            users_with_roles={"initiator": ["wf-user"]},
+            workflow_name="TestFlow_Copy",
+            start_user="initiator",
+        )
+        task_id = workflow.user("initiator").get_usertasks(workflow_instance_id=workflow.workflow_instance_id, expected_task_count=1)[0].id
+        db.commit()
+
+        # Another request changing the instance right now
+        lock_engine = create_null_pool_engine(settings=settings)
+        try:
+            with lock_engine.connect() as lock_conn:
+                lock_conn.execute(select(WorkflowInstance.id).where(WorkflowInstance.id == workflow.workflow_instance_id).with_for_update())
+
+                with pytest.raises(WorkflowInstanceLockedError):
+                    repository.lock_workflow_instance_by_task_id(db=db, task_id=task_id)
+                db.rollback()
+
+                lock_conn.rollback()
+
+            assert repository.lock_workflow_instance_by_task_id(db=db, task_id=task_id).task_tree.id == workflow.workflow_instance_id
+            db.commit()
+        finally:
+            lock_engine.dispose()
+
+
+def test_persist_workflow_spec_hashes_only_changed_files(db_engine_ctx, monkeypatch, tmp_path):
+    (tmp_path / "diagram.bpmn").write_text('<bpmn:process id="Process_1">')
+    monkeypatch.setattr(repository.workflow_providers, "get_workflow_directory", lambda name: tmp_path)
+    monkeypatch.setattr(repository, "_persisted_specs", {})
+
+    hashed = []
+    hash_file = repository._hash_file
+
+    def _counting_hash_file(path):
+        hashed.append(path.name)
+        return hash_file(path)
+
+    monkeypatch.setattr(repository, "_hash_file", _counting_hash_file)
+
+    with db_engine_ctx():
+        db = SessionLocal()
+        spec_id = repository.persist_workflow_spec(db=db, name="TestFlow_SpecCache")
+        # Not committed yet: the next call cannot rely on it
+        assert repository.persist_workflow_spec(db=db, name="TestFlow_SpecCache") == spec_id
+        db.commit()
+        assert hashed == ["diagram.bpmn", "diagram.bpmn"]
+
+        assert repository.persist_workflow_spec(db=db, name="TestFlow_SpecCache") == spec_id
+        assert hashed == ["diagram.bpmn", "diagram.bpmn"]
+
+        (tmp_path / "form.json").write_text("{}")
+        assert repository.persist_workflow_spec(db=db, name="TestFlow_SpecCache") == spec_id
+        db.commit()
+        assert sorted(hashed[2:]) == ["diagram.bpmn", "form.json"]
+        assert {f.file_name for f in db.execute(select(WorkflowSpec).where(WorkflowSpec.id == spec_id)).scalar_one().files} == {"diagram.bpmn", "form.json"}
+
+
+def test_persist_workflow_spec_writes_the_spec_again_when_its_row_is_gone(db_engine_ctx, monkeypatch, tmp_path):
+    (tmp_path / "diagram.bpmn").write_text('<bpmn:process id="Process_1">')
+    monkeypatch.setattr(repository.workflow_providers, "get_workflow_directory", lambda name: tmp_path)
+    monkeypatch.setattr(repository, "_persisted_specs", {})
+
+    with db_engine_ctx():
+        db = SessionLocal()
+        spec_id = repository.persist_workflow_spec(db=db, name="TestFlow_SpecCache")
+        db.commit()
+
+        # e.g. a restored database: the files are unchanged, the row is not there anymore
+        db.execute(delete(WorkflowSpecFile).where(WorkflowSpecFile.workflow_spec_id == spec_id))
+        db.execute(delete(WorkflowSpec).where(WorkflowSpec.id == spec_id))
+        db.commit()
+
+        new_spec_id = repository.persist_workflow_spec(db=db, name="TestFlow_SpecCache")
+        db.commit()
+        assert new_spec_id != spec_id
+        assert {f.file_name for f in db.execute(select(WorkflowSpec).where(WorkflowSpec.id == new_spec_id)).scalar_one().files} == {"diagram.bpmn"}
+
+
+def test_storing_an_unchanged_instance_keeps_its_timer_rows(db_engine_ctx):
+    with db_engine_ctx():
+        db = SessionLocal()
+        workflow = WorkflowDummy(
+            db_session=db,
+            users_with_roles={"initiator": ["wf-user"]},
+            workflow_name="TestFlow_TimerEvent",
+            start_user="initiator",
+        )
+        db.commit()
+
+        def timer_rows():
+            return db.execute(
+                select(WorkflowTimeEvent.id, WorkflowTimeEvent.created_at, WorkflowTimeEvent.status).where(WorkflowTimeEvent.workflow_instance_id == workflow.workflow_instance_id),
+            ).all()
+
+        before = timer_rows()
+        assert [row.status for row in before] == ["scheduled"]
+
+        restored = repository.load_workflow_instance(db=db, workflow_id=workflow.workflow_instance_id)
+        repository.store_workflow_instance(db=db, workflow=restored)
+        db.commit()
+
+        assert timer_rows() == before
+
+
+def test_inbox_follows_role_changes(db_engine_ctx, mock_send_text_mail):
+    with db_engine_ctx():
+        db = SessionLocal()
+        workflow = WorkflowDummy(
+            db_session=db,
+            users_with_roles={"initiator": ["wf-user"], "member": ["wf-user"]},
+            workflow_name="TestFlowRoleNotifications",
+            start_user="initiator",
+        )
+        # The role-lane task becomes ready, offered to wf-test-role
+        workflow.user("initiator").submit({}, workflow.workflow_instance_id)
+        member = workflow.user("member").user
+        table_params = WorkflowInstancesBffTableQuerySchema.parse_obj({})
+
+        def ready_task_names():
+            inbox = service_application.bff_get_workflows_with_usertasks(db=db, bff_table_request_params=table_params, user_id=member.id, state="ready")
+            return [task.name for instance in inbox.ITEMS for task in instance.active_tasks]
+
+        assert ready_task_names() == []
+
+        service_user.assign_roles(db=db, user_id=member.id, role_names=["wf-user", "wf-test-role"])
+        assert len(ready_task_names()) == 1
+
+        service_user.assign_roles(db=db, user_id=member.id, role_names=["wf-user"])
+        assert ready_task_names() == []
+
+
+def test_task_index_is_rebuilt_after_tasks_ran(db_engine_ctx, mock_send_text_mail):
+    with db_engine_ctx():
+        db = SessionLocal()
+        workflow = WorkflowDummy(
+            db_session=db,
+            users_with_roles={"initiator": ["wf-user"]},
+            workflow_name="TestFlowRoleNotifications",
+            start_user="initiator",
+        )
+        restored = repository.load_workflow_instance(db=db, workflow_id=workflow.workflow_instance_id)
+        index = service_workflow.get_task_index(restored)
+        (init_task,) = service_workflow.get_ready_and_waiting_usertasks(restored)
+
+        assert service_workflow.get_task_index(restored) is index
+        assert index.get(init_task.id) is init_task
+        assert init_task in index.in_lane("Init Lane")
+
+        service_workflow.execute_user_task(
+            workflow=restored,
+            user=repository.load_user(db=db, user_id=workflow.user("initiator").user.id),
+            task_id=init_task.id,
+            cleaned_task_data={},
+        )
+
+        assert service_workflow.get_task_index(restored) is not index
+        assert [task.task_spec.lane for task in service_workflow.get_ready_and_waiting_usertasks(restored)] == ["Role Lane"]
+
+
+def test_run_workflow_stops_at_the_step_limit(monkeypatch):
+    monkeypatch.setattr(settings, "workflow_engine_max_steps", 2)
+    workflow = service_workflow.load_process_from_file("TestFlow_MultiInstance")
+
+    assert service_workflow.run_workflow(workflow) is False
+    (faulty_task,) = service_workflow.get_faulty_tasks(workflow)
+    assert "workflow_engine_max_steps" in service_workflow.get_stacktrace(workflow=workflow, task_id=faulty_task.id)
+
+    # Resumed by an admin, the run continues where it stopped
+    monkeypatch.setattr(settings, "workflow_engine_max_steps", 10_000)
+    service_workflow.execute_erroneous_task(workflow=workflow, task_id=faulty_task.id)
+    assert service_workflow.get_faulty_tasks(workflow) == []
+
+
+def test_run_workflow_does_not_reuse_a_task_index_between_engine_tasks(monkeypatch):
+    workflow = service_workflow.load_process_from_file("TestFlow_MultiInstance")
+    run_engine_task = service_workflow._run_engine_task
+    indexes = []
+
+    def _indexing_run_engine_task(workflow, task):
+        # Like a script or service task looking up (and thereby indexing) the tasks
+        indexes.append(service_workflow.get_task_index(workflow))
+        return run_engine_task(workflow, task)
+
+    monkeypatch.setattr(service_workflow, "_run_engine_task", _indexing_run_engine_task)
+    service_workflow.run_workflow(workflow)
+
+    assert len(indexes) > 1
+    assert len({id(index) for index in indexes}) == len(indexes)
+
+
+def test_task_to_user_mapping_is_shared_by_the_service_calls_of_a_run():
+    workflow = service_workflow.load_process_from_file("TestFlowRoleNotifications")
+    service_workflow.run_workflow(workflow)
+    (task,) = service_workflow.get_ready_and_waiting_usertasks(workflow)
+    engine = workflow.script_engine
+
+    mapping = engine.get_task_to_user_mapping(workflow)
+    assert engine.get_task_to_user_mapping(workflow) is mapping
+    assert task not in mapping
+
+    # Assigned by a service task: the shared mapping follows
+    user_id = uuid.uuid4()
+    service_workflow.assign_task_without_checks(workflow=workflow, task_id=task.id, user_id=user_id)
+    assert mapping[task] == str(user_id)
+    service_workflow.unassign_task_without_checks(workflow=workflow, task_id=task.id)
+    assert task not in mapping
+
+    service_workflow.run_workflow(workflow)
+    assert engine.get_task_to_user_mapping(workflow) is not mapping
+
+
+def test_task_to_user_mapping_is_built_once_per_run(monkeypatch):
+    workflow = service_workflow.load_process_from_file("TestFlow_MultiInstance")
+    engine = workflow.script_engine
+    run_engine_task = service_workflow._run_engine_task
+    mappings = []
+
+    def _run_engine_task_like_a_service_call(workflow, task):
+        mappings.append(engine.get_task_to_user_mapping(workflow))
+        return run_engine_task(workflow, task)
+
+    monkeypatch.setattr(service_workflow, "_run_engine_task", _run_engine_task_like_a_service_call)
+    service_workflow.run_workflow(workflow)
+
+    assert len(mappings) > 1
+    assert len({id(mapping) for mapping in mappings}) == 1
+
+
+def test_task_to_user_mapping_follows_assignments_in_subprocesses():
+    workflow = service_workflow.load_process_from_file("TestFlow_MultiInstance")
+    service_workflow.run_workflow(workflow)
+    task = next(t for t in service_workflow.get_ready_and_waiting_usertasks(workflow) if t.workflow is not workflow)
+    engine = workflow.script_engine
+
+    mapping = engine.get_task_to_user_mapping(workflow)
+    sub_mapping = engine.get_task_to_user_mapping(task.workflow)
+
+    user_id = uuid.uuid4()
+    service_workflow.assign_task_without_checks(workflow=workflow, task_id=task.id, user_id=user_id)
+    assert mapping[task] == sub_mapping[task] == str(user_id)
+    service_workflow.unassign_task_without_checks(workflow=workflow, task_id=task.id)
+    assert task not in mapping and task not in sub_mapping
+
+
+def test_feel_references_are_evaluated_once_per_task_run():
+    workflow = service_workflow.load_process_from_file("TestFlow_MultiInstance")
+    engine = workflow.script_engine
+    task = workflow.get_tasks()[0]
+    task.data["items"] = [1, 2]
+    reference = spiff_customized.FeelExpressionReference(expr="=items", bpmn_id="Test::inputCollection")
+
+    assert engine._compile_expression("=items") is engine._compile_expression("=items")
+    with engine.task_execution():
+        first = reference.get(task)
+        task.data["items"] = [3]
+        assert reference.get(task) is first
+    assert reference.get(task) == [3]
+
+
+def test_service_task_helper_finds_the_first_task_of_a_bpmn_id():
+    workflow = service_workflow.load_process_from_file("TestFlow_MultiInstance")
+    service_workflow.run_workflow(workflow)
+    sth = ServiceTaskHelper(workflow=workflow, task_data={}, task_to_user_mapping={}, task_uuid=workflow.task_tree.id)
+
+    parallel_forms = [task for task in workflow.get_tasks() if task.task_spec.bpmn_id == "ParallelForm"]
+    assert len(parallel_forms) > 1
+    assert sth.get_task("ParallelForm") is parallel_forms[0]
+    assert sth.get_task("Form_does_not_exist") is None
+
+
+def test_workflow_metadata_is_parsed_once_per_revision(monkeypatch, tmp_path):
+    workflow_dir = tmp_path / "TestFlowBasicStart"
+    workflow_dir.mkdir()
+    bpmn = (service_workflow.workflow_providers.get_workflow_directory("TestFlowBasicStart") / "diagram_1.bpmn").read_text()
+    (workflow_dir / "diagram_1.bpmn").write_text(bpmn)
+    registry = service_workflow.workflow_providers.registry
+    registry.register(service_workflow.workflow_providers.FileSystemWorkflowProvider(base_path=tmp_path, name="tmp", priority=100, module_base=None))
+
+    parsed = []
+    load_process_from_file = service_workflow.load_process_from_file
+
+    def _counting_load_process_from_file(name):
+        parsed.append(name)
+        return load_process_from_file(name=name)
+
+    monkeypatch.setattr(service_workflow, "load_process_from_file", _counting_load_process_from_file)
+    try:
+        assert service_workflow.get_workflow_title_cached("TestFlowBasicStart") == "Test Flow Basic Start"
+        assert service_workflow.get_workflow_owner("TestFlowBasicStart") is None
+        assert service_workflow.can_load_workflow("TestFlowBasicStart")
+        assert parsed == ["TestFlowBasicStart"]
+
+        (workflow_dir / "diagram_1.bpmn").write_text(bpmn.replace('name="Test Flow Basic Start"', 'name="Renamed Flow"'))
+        registry.rescan()
+        assert service_workflow.get_workflow_title_cached("TestFlowBasicStart") == "Renamed Flow"
+        assert parsed == ["TestFlowBasicStart", "TestFlowBasicStart"]
+    finally:
+        registry.reload()
@@ -315,5 +315,20 @@ class ReducedWorkflowState(BaseModel):
     name: str
 
 
+StatisticsBucketSize = Literal["day", "week", "month"]
+
+
+class CompletedWorkflowInstanceBucket(BaseModel):
+    """Number of instances of one workflow completed within one time bucket.
+
+    ``bucket_start`` is the first day of the bucket (weeks start on Monday)."""
+
+    name: str
+    title: str
+    bucket_start: datetime.date
+    count: int
+
+
 class ReducedWorkflowInstanceResponse(BaseModel):
-    ITEMS: List[ReducedWorkflowState]
+    ITEMS: List[ReducedWorkflowState] = Field(default_factory=list)
+    BUCKETS: List[CompletedWorkflowInstanceBucket] = Field(default_factory=list)
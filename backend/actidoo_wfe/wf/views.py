@@ -9,7 +9,8 @@ import datetime
 import uuid
 from typing import Literal
 
-from sqlalchemy import and_, false, func, null, or_, select, true
+import sqlalchemy.types as ty
+from sqlalchemy import and_, false, func, literal_column, null, or_, select, true
 from sqlalchemy.orm import Session, aliased, contains_eager, defer, load_only, selectinload
 from sqlalchemy.orm.attributes import set_committed_value
 
@@ -18,9 +19,10 @@ from actidoo_wfe.helpers.schema import CursorPaginatedDataSchema, PaginatedDataS
 from actidoo_wfe.helpers.time import dt_now_naive
 from actidoo_wfe.wf.exceptions import TaskNotFoundException
 from actidoo_wfe.wf.models import (
+    FormSchema,
+    UserInboxEntry,
     WorkflowInstance,
     WorkflowInstanceTask,
-    WorkflowInstanceTaskRole,
     WorkflowMessageSubscription,
     WorkflowRole,
     WorkflowSpec,
@@ -29,9 +31,11 @@ from actidoo_wfe.wf.models import (
     WorkflowUserRole,
 )
 from actidoo_wfe.wf.types import (
+    CompletedWorkflowInstanceBucket,
     MessageSubscriptionRepresentation,
     ReducedWorkflowInstanceResponse,
     ReducedWorkflowState,
+    StatisticsBucketSize,
     TaskState,
     UserRepresentation,
     WorkflowInstanceRepresentation,
@@ -42,19 +46,20 @@ from actidoo_wfe.wf.types import (
 
 
 def _usertask_visibility_conditions(
-    db: Session,
-    user: WorkflowUser,
+    user_id: uuid.UUID,
     state: Literal["ready", "completed"],
 ) -> list:
-    """WHERE conditions on ``WorkflowInstanceTask`` deciding which tasks (and via
-    them which instances) *user* may see in the given state.
+    """WHERE conditions on ``UserInboxEntry`` deciding which tasks (and via them
+    which instances) the user may see in the given state.
 
     Single source of truth for the task-list visibility: the single-instance
     lookup reuses exactly these conditions, so a deep link can never reveal more
-    than the list would.
+    than the list would. Role, assignment and completion are precomputed into the
+    inbox rows; only the delegations are resolved here, as they expire by time.
     """
-    user_id = user.id
-    role_names = set([r.role.name for r in user.roles])
+    if state == "completed":
+        return [UserInboxEntry.user_id == user_id, UserInboxEntry.state == "completed"]
+
     now = dt_now_naive()
     delegate_principals_subquery = (
         select(WorkflowUserDelegate.principal_user_id)
@@ -68,43 +73,16 @@ def _usertask_visibility_conditions(
         .scalar_subquery()
     )
 
-    sq_where = [
-        WorkflowInstanceTask.manual == true(),
-    ]
-
-    if state == "ready":
-        sq_where.append(WorkflowInstanceTask.state_ready == true())
-        sq_where.append(
-            or_(
-                WorkflowInstanceTask.assigned_user == user,
-                WorkflowInstanceTask.assigned_delegate_user_id == user_id,
-                and_(
-                    WorkflowInstanceTask.assigned_user_id.is_not(null()),
-                    WorkflowInstanceTask.assigned_user_id.in_(delegate_principals_subquery),
-                ),
-                and_(
-                    select(WorkflowInstanceTaskRole)
-                    .where(
-                        WorkflowInstanceTaskRole.workflow_instance_task_id == WorkflowInstanceTask.id,
-                        WorkflowInstanceTaskRole.name.in_(role_names),
-                    )
-                    .exists(),
-                    WorkflowInstanceTask.assigned_user == null(),
-                ),
-            ),
-        )
-
-    elif state == "completed":
-        sq_where.append(WorkflowInstanceTask.state_completed == true())
-        sq_where.append(
-            or_(
-                WorkflowInstanceTask.assigned_user == user,
-                WorkflowInstanceTask.completed_by_user_id == user_id,
-                WorkflowInstanceTask.completed_by_delegate_user_id == user_id,
+    return [
+        UserInboxEntry.state == "ready",
+        or_(
+            UserInboxEntry.user_id == user_id,
+            and_(
+                UserInboxEntry.user_id.in_(delegate_principals_subquery),
+                UserInboxEntry.reason == "assigned",
             ),
-        )
-
-    return sq_where
+        ),
+    ]
 
 
 def get_visible_workflow_instance(
@@ -117,16 +95,13 @@ def get_visible_workflow_instance(
     identical for "does not exist": the caller must not become an existence
     oracle for foreign instance ids.
     """
-    user: WorkflowUser = db.execute(
-        select(WorkflowUser).where(WorkflowUser.id == user_id),
-    ).scalar_one()
 
     def _participates(state: Literal["ready", "completed"]):
         return (
-            select(WorkflowInstanceTask.id)
+            select(UserInboxEntry.workflow_instance_task_id)
             .where(
-                WorkflowInstanceTask.workflow_instance_id == WorkflowInstance.id,
-                and_(*_usertask_visibility_conditions(db, user, state)),
+                UserInboxEntry.workflow_instance_id == WorkflowInstance.id,
+                and_(*_usertask_visibility_conditions(user_id, state)),
             )
             .exists()
         )
@@ -155,8 +130,8 @@ def _instance_list_loader_options():
     """
     inline_task_options = (
         defer(WorkflowInstanceTask.data, raiseload=True),
-        defer(WorkflowInstanceTask.jsonschema, raiseload=True),
-        defer(WorkflowInstanceTask.uischema, raiseload=True),
+        defer(WorkflowInstanceTask.legacy_jsonschema, raiseload=True),
+        defer(WorkflowInstanceTask.legacy_uischema, raiseload=True),
         defer(WorkflowInstanceTask.error_stacktrace, raiseload=True),
         selectinload(WorkflowInstanceTask.assigned_user),
         selectinload(WorkflowInstanceTask.assigned_delegate_user),
@@ -178,36 +153,9 @@ def bff_get_workflows_with_usertasks(
     user_id: uuid.UUID,
     state: Literal["ready", "completed"],
 ):
-    user: WorkflowUser = db.execute(
-        select(WorkflowUser).where(WorkflowUser.id == user_id),
-    ).scalar_one()
-
-    sq_where = _usertask_visibility_conditions(db, user, state)
+    sq_where = _usertask_visibility_conditions(user_id, state)
 
-    q1 = (
-        select(WorkflowInstanceTask.id.label("task_id"))
-        .select_from(WorkflowInstance)
-        .join(
-            WorkflowInstanceTask,
-            WorkflowInstanceTask.workflow_instance_id == WorkflowInstance.id,
-        )
-        .where(and_(*sq_where))
-        .order_by(WorkflowInstance.id)
-    )
-
-    task_ids = {x for x in db.execute(q1).scalars()}
-
-    sq = (
-        select(WorkflowInstance.id)
-        .distinct()
-        .select_from(WorkflowInstance)
-        .join(
-            WorkflowInstanceTask,
-            WorkflowInstanceTask.workflow_instance_id == WorkflowInstance.id,
-        )
-        .where(and_(*sq_where))
-        .order_by(WorkflowInstance.id)
-    )
+    sq = select(UserInboxEntry.workflow_instance_id).where(and_(*sq_where))
 
     q = (
         select(WorkflowInstance)
@@ -226,6 +174,9 @@ def bff_get_workflows_with_usertasks(
 
     paginated_data = bff_table.get_paginated_data()
 
+    # The visible tasks of the page's instances only
+    task_ids = _visible_task_ids(db, sq_where, [row.id for row in paginated_data.items])
+
     for row in paginated_data.items:
         filtered_active_tasks = [t for t in row.active_tasks if t.id in task_ids]
         filtered_completed_tasks = [t for t in row.completed_tasks if t.id in task_ids]
@@ -243,6 +194,19 @@ def bff_get_workflows_with_usertasks(
     return res_representation
 
 
+def _visible_task_ids(db: Session, sq_where: list, workflow_instance_ids: list[uuid.UUID]) -> set[uuid.UUID]:
+    if not workflow_instance_ids:
+        return set()
+    return set(
+        db.execute(
+            select(UserInboxEntry.workflow_instance_task_id).where(
+                and_(*sq_where),
+                UserInboxEntry.workflow_instance_id.in_(workflow_instance_ids),
+            ),
+        ).scalars(),
+    )
+
+
 def bff_user_get_initiated_workflows(
     db: Session,
     bff_table_request_params: BffTableQuerySchemaBase,
@@ -293,6 +257,22 @@ def bff_user_get_initiated_workflows(
     return res_representation
 
 
+def _load_form_schemas(db: Session, tasks) -> dict[str, dict]:
+    """The form schemas referenced by ``tasks`` by hash, in one query."""
+    hashes = {h for task in tasks for h in (task.jsonschema_hash, task.uischema_hash) if h is not None}
+    if not hashes:
+        return {}
+    return {row.hash: row.data for row in db.execute(select(FormSchema.hash, FormSchema.data).where(FormSchema.hash.in_(hashes)))}
+
+
+def _task_form_schemas(task: WorkflowInstanceTask, form_schemas: dict[str, dict]) -> dict:
+    """``jsonschema``/``uischema`` of a (detached) task, resolved without lazy loads."""
+    return dict(
+        jsonschema=form_schemas[task.jsonschema_hash] if task.jsonschema_hash is not None else task.legacy_jsonschema,
+        uischema=form_schemas[task.uischema_hash] if task.uischema_hash is not None else task.legacy_uischema,
+    )
+
+
 def bff_admin_get_all_tasks(db: Session, bff_table_request_params: BffTableQuerySchemaBase, allowed_workflow_names: set[str] = set()):
     AssignedUser = aliased(WorkflowUser)
     AssignedDelegateUser = aliased(WorkflowUser)
@@ -310,8 +290,8 @@ def bff_admin_get_all_tasks(db: Session, bff_table_request_params: BffTableQuery
             # Keep the large payloads out of MySQL's sorted page; they are loaded
             # together for the finished page below.
             defer(WorkflowInstanceTask.data, raiseload=True),
-            defer(WorkflowInstanceTask.jsonschema, raiseload=True),
-            defer(WorkflowInstanceTask.uischema, raiseload=True),
+            defer(WorkflowInstanceTask.legacy_jsonschema, raiseload=True),
+            defer(WorkflowInstanceTask.legacy_uischema, raiseload=True),
             defer(WorkflowInstanceTask.error_stacktrace, raiseload=True),
             # The nested instance representation shows neither payload blob;
             # created_by is one of its required fields and would otherwise
@@ -354,13 +334,14 @@ def bff_admin_get_all_tasks(db: Session, bff_table_request_params: BffTableQuery
             .options(
                 load_only(
                     WorkflowInstanceTask.data,
-                    WorkflowInstanceTask.jsonschema,
-                    WorkflowInstanceTask.uischema,
+                    WorkflowInstanceTask.legacy_jsonschema,
+                    WorkflowInstanceTask.legacy_uischema,
                     WorkflowInstanceTask.error_stacktrace,
                 ),
             )
             .where(WorkflowInstanceTask.id.in_([row.id for row in paginated_data.items])),
         ).all()
+    form_schemas = _load_form_schemas(db=db, tasks=paginated_data.items)
 
     for row in paginated_data.items:
         db.expunge(row)
@@ -370,6 +351,7 @@ def bff_admin_get_all_tasks(db: Session, bff_table_request_params: BffTableQuery
             WorkflowInstanceTaskAdminRepresentation.model_validate(
                 dict(
                     x.__dict__,
+                    **_task_form_schemas(task=x, form_schemas=form_schemas),
                     lane_roles=[r.name for r in x.lane_roles],
                     workflow_instance=WorkflowInstanceWithoutTasksRepresentation.model_validate(
                         x.workflow_instance,
@@ -394,6 +376,56 @@ def bff_admin_get_graph_workflow_instances(db: Session) -> ReducedWorkflowInstan
     return ReducedWorkflowInstanceResponse(ITEMS=completed_workflows)
 
 
+def _completed_at_bucket_start(bucket: StatisticsBucketSize):
+    """SQL expression mapping ``completed_at`` to the first day of its bucket (MySQL date functions)."""
+    completed_day = func.date(WorkflowInstance.completed_at, type_=ty.Date)
+    if bucket == "day":
+        return completed_day
+    if bucket == "week":
+        # WEEKDAY() is 0 for Monday
+        return func.subdate(completed_day, func.weekday(WorkflowInstance.completed_at), type_=ty.Date)
+    if bucket == "month":
+        return func.subdate(completed_day, func.dayofmonth(WorkflowInstance.completed_at) - literal_column("1"), type_=ty.Date)
+    raise ValueError(f"Unsupported bucket size: {bucket}")
+
+
+def bff_admin_get_graph_workflow_instance_buckets(
+    db: Session,
+    bucket: StatisticsBucketSize,
+    date_from: datetime.datetime | None = None,
+    date_to: datetime.datetime | None = None,
+) -> ReducedWorkflowInstanceResponse:
+    """Number of completed instances per workflow and bucket, aggregated in the database.
+
+    Served by the composite index on ``(name, completed_at)``; the result has one row
+    per workflow and bucket, independent of the number of instances.
+    """
+    bucket_start = _completed_at_bucket_start(bucket).label("bucket_start")
+
+    q = select(
+        WorkflowInstance.name,
+        func.max(WorkflowInstance.title).label("title"),
+        bucket_start,
+        func.count().label("count"),
+    ).where(
+        WorkflowInstance.is_completed == true(),
+        WorkflowInstance.completed_at.is_not(null()),
+    )
+
+    if date_from is not None:
+        q = q.where(WorkflowInstance.completed_at >= date_from)
+    if date_to is not None:
+        q = q.where(WorkflowInstance.completed_at < date_to)
+
+    q = q.group_by(WorkflowInstance.name, bucket_start).order_by(WorkflowInstance.name, bucket_start)
+
+    buckets = [
+        CompletedWorkflowInstanceBucket(name=row.name, title=row.title, bucket_start=row.bucket_start, count=row.count)
+        for row in db.execute(q)
+    ]
+    return ReducedWorkflowInstanceResponse(BUCKETS=buckets)
+
+
 def bff_admin_get_all_workflow_instances(db: Session, bff_table_request_params: BffTableQuerySchemaBase, allowed_workflow_names: set[str] = set()):
     CreatedByUser = aliased(WorkflowUser)
 
@@ -467,9 +499,12 @@ def admin_get_single_task(db: Session, task_id: uuid.UUID) -> WorkflowInstanceTa
     if task is None:
         raise TaskNotFoundException()
 
+    form_schemas = _load_form_schemas(db=db, tasks=[task])
+
     return WorkflowInstanceTaskAdminRepresentation.model_validate(
         dict(
             task.__dict__,
+            **_task_form_schemas(task=task, form_schemas=form_schemas),
             lane_roles=[r.name for r in task.lane_roles],
             workflow_instance=WorkflowInstanceWithoutTasksRepresentation.model_validate(
                 task.workflow_instance,
@@ -633,53 +668,14 @@ def get_workflows_with_usertasks(
     db: Session,
     user: WorkflowUser | UserRepresentation,
 ):
-    user_id = user.id
-    if isinstance(user, WorkflowUser):
-        role_names = {r.role.name for r in user.roles}
-    else:
-        role_names = set(user.roles)
-
+    """The instances with ready tasks assigned to the user or offered to one of the user's roles."""
     sq_where = [
-        WorkflowInstanceTask.manual == true(),
-        WorkflowInstanceTask.state_ready == true(),
-        or_(
-            WorkflowInstanceTask.assigned_user_id == user_id,
-            and_(
-                select(WorkflowInstanceTaskRole)
-                .where(
-                    WorkflowInstanceTaskRole.workflow_instance_task_id == WorkflowInstanceTask.id,
-                    WorkflowInstanceTaskRole.name.in_(role_names),
-                )
-                .exists(),
-                WorkflowInstanceTask.assigned_user_id == null(),
-            ),
-        ),
+        UserInboxEntry.user_id == user.id,
+        UserInboxEntry.state == "ready",
+        UserInboxEntry.reason.in_(["assigned", "role"]),
     ]
 
-    q1 = (
-        select(WorkflowInstanceTask.id.label("task_id"))
-        .select_from(WorkflowInstance)
-        .join(
-            WorkflowInstanceTask,
-            WorkflowInstanceTask.workflow_instance_id == WorkflowInstance.id,
-        )
-        .where(and_(*sq_where))
-        .order_by(WorkflowInstance.id)
-    )
-
-    task_ids = {x for x in db.execute(q1).scalars()}
-
-    sq = (
-        select(WorkflowInstance.id)
-        .distinct()
-        .select_from(WorkflowInstance)
-        .join(
-            WorkflowInstanceTask,
-            WorkflowInstanceTask.workflow_instance_id == WorkflowInstance.id,
-        )
-        .where(and_(*sq_where))
-        .order_by(WorkflowInstance.id)
-    )
+    sq = select(UserInboxEntry.workflow_instance_id).where(and_(*sq_where))
 
     q = (
         select(WorkflowInstance)
@@ -690,6 +686,8 @@ def get_workflows_with_usertasks(
     q = q.order_by(WorkflowInstance.created_at.desc())
     items = list(db.execute(q).scalars())
 
+    task_ids = _visible_task_ids(db, sq_where, [row.id for row in items])
+
     for row in items:
         filtered_active_tasks = [t for t in row.active_tasks if t.id in task_ids]
         filtered_completed_tasks = [t for t in row.completed_tasks if t.id in task_ids]